@@ -16,6 +16,9 @@ os.makedirs(DATA_DIR, exist_ok=True)
 if _ROOT_DIR not in sys.path:
     sys.path.insert(0, _ROOT_DIR)
 
+from core.downloadTool.bandwidth import format_snapshot, get_scheduler
+from core.project_cache import links_stats, read_name_lines
+
 # File config lưu cấu hình GUI
 CONFIG_PATH = os.path.join(DATA_DIR, 'config.json')
 
@@ -41,26 +44,12 @@ def derive_project_slug(proj_path: str) -> str:
 def compute_links_stats(links_path: str) -> tuple[int, int]:
     """
     Đếm số nhóm (dòng không phải link) và tổng số link (http/https) trong file link.
+    Kết quả cache trong data/<slug>/_introspection.json theo mtime/size/hash của file.
     """
-    groups = 0
-    total_links = 0
-    if not os.path.isfile(links_path):
-        return groups, total_links
-
     try:
-        with open(links_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                s = line.strip()
-                if not s:
-                    continue
-                if s.startswith('http://') or s.startswith('https://'):
-                    total_links += 1
-                else:
-                    groups += 1
+        return links_stats(links_path)
     except Exception:
-        pass
-
-    return groups, total_links
+        return 0, 0
 
 
 # =====================================================================
@@ -76,6 +65,15 @@ class AutoToolLogic:
     def __init__(self, data_dir: str = DATA_DIR):
         self.data_dir = data_dir
 
+    # -----------------------------------------------------------------
+    def bandwidth_snapshot(self) -> dict:
+        """Throughput hiện tại theo class của bandwidth scheduler dùng chung (xem bandwidth.snapshot)."""
+        return get_scheduler().snapshot()
+
+    def bandwidth_status(self) -> str:
+        """1 dòng mô tả throughput để hiện trên UI."""
+        return format_snapshot(self.bandwidth_snapshot())
+
     # -----------------------------------------------------------------
     def _parse_int(self, v: Any, default: int) -> int:
         try:
@@ -139,10 +137,12 @@ class AutoToolLogic:
         regen_links: bool,
         log: Callable[[str], None],
         update_progress: Callable[[float, str | None], None],
+        sequence_name: str = "Main",
     ) -> None:
         """
         - log(msg): dùng để ghi log (GUI sẽ truyền self.log)
         - update_progress(value, message): cập nhật progress bar (0–100)
+        - sequence_name: sequence đích của job (như batch_job.make_job), cho format policy
         """
 
         # Set up resource folder for this project
@@ -320,9 +320,10 @@ class AutoToolLogic:
                 log("Bắt đầu tải VIDEO...")
                 update_progress(15, "Đang tải VIDEO từ YouTube...")
                 from core.downloadTool.down_by_yt import download_main as _dl_main  # type: ignore
-                _dl_main(parent, links_txt, _type=dtype)
+                _dl_main(parent, links_txt, _type=dtype, prproj_path=proj_path, sequence_name=sequence_name)
                 video_done = True
                 log("Tải VIDEO xong.")
+                log(f"Băng thông: {self.bandwidth_status()}")
 
                 if mode_l == 'video':
                     update_progress(90, "Đã tải xong VIDEO.")
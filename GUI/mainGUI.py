@@ -9,6 +9,7 @@ from autotool_logic import (
     AutoToolLogic,
     derive_project_slug,
     compute_links_stats,
+    read_name_lines,
 )
 
 # =====================================================================
@@ -1102,56 +1103,61 @@ class AutoToolGUI(tk.Tk):
 
     def run_premier_automation(self):
         try:
-            from core.premierCore.control import run_premier_script  # type: ignore
+            from core.premierCore.control import run_premier_batch  # type: ignore
+            from core.premierCore.batch_job import make_job  # type: ignore
         except Exception:
             try:
                 import importlib
-                run_premier_script = importlib.import_module(
+                run_premier_batch = importlib.import_module(
                     "core.premierCore.control"
-                ).run_premier_script  # type: ignore
+                ).run_premier_batch  # type: ignore
+                make_job = importlib.import_module(
+                    "core.premierCore.batch_job"
+                ).make_job  # type: ignore
             except Exception as e:
-                self.log2(f"LỖI: Không thể import run_premier_script: {e}")
-                run_premier_script = None
+                self.log2(f"LỖI: Không thể import run_premier_batch: {e}")
+                run_premier_batch = None
         if not self.premier_projects:
             messagebox.showwarning("Premier", "Chưa có file .prproj nào trong danh sách.")
             return
-        if run_premier_script is None:
-            self.log2("LỖI: Không thể import run_premier_script từ control.py")
+        if run_premier_batch is None:
+            self.log2("LỖI: Không thể import run_premier_batch từ control.py")
             return
         self.log2(
             f"=== BẮT ĐẦU CHẠY PREMIER AUTOMATION ({len(self.premier_projects)} project) ==="
         )
-        num = 0
+        # 1 file batch cho mọi project: Premiere chỉ khởi động 1 lần,
+        # không ghi đè data/path.txt cho từng project
+        jobs = []
         for i, proj_path in enumerate(self.premier_projects, start=1):
             try:
-                self.log2(f"-- ({i}/{len(self.premier_projects)}) {proj_path}")
                 project_slug = self._derive_project_slug(proj_path)
                 data_folder = os.path.join(DATA_DIR, project_slug).replace('\\', '/')
-                project_path_unix = proj_path.replace('\\', '/')
                 resource_dir = os.path.join(
                     os.path.dirname(proj_path), 'resource'
                 ).replace('\\', '/')
-                path_txt_content = (
-                    f"project_slug={project_slug}\n"
-                    f"data_folder={data_folder}\n"
-                    f"project_path={project_path_unix}\n"
-                    f"resource_dir={resource_dir}\n"
-                )
-                path_txt_path = os.path.join(DATA_DIR, 'path.txt')
-                try:
-                    with open(path_txt_path, 'w', encoding='utf-8') as f:
-                        f.write(path_txt_content)
-                    self.log2(f"Đã cập nhật path.txt cho {project_slug}")
-                except Exception as e:
-                    self.log2(f"LỖI khi ghi path.txt: {e}")
-                    continue
-
-                proj_path_win = '"' + proj_path.replace('/', '\\') + '"'  # for Windows
-                num += 1
-                run_premier_script(None, proj_path_win, num)
-                self.update()
+                jobs.append(make_job(
+                    proj_path,
+                    data_folder,
+                    resource_dir=resource_dir,
+                    project_slug=project_slug,
+                ))
+                self.log2(f"-- ({i}/{len(self.premier_projects)}) {proj_path}")
             except Exception as e:
                 self.log2(f"LỖI premier item: {e}")
+        if jobs:
+            try:
+                status = run_premier_batch(jobs)
+                result = status.get("result") or {}
+                self.log2(
+                    f"Batch: {result.get('ok', 0)}/{result.get('projects', len(jobs))} project OK "
+                    f"[{status.get('state')}] {status.get('message', '')}"
+                )
+                if result.get("errors"):
+                    self.log2(f"Lỗi: {result.get('errors')}")
+            except Exception as e:
+                self.log2(f"LỖI premier batch: {e}")
+            self.update()
         self.log2("=== KẾT THÚC PREMIER AUTOMATION ===")
         try:
             self._save_config()
@@ -1354,13 +1360,9 @@ Nhấn OK để bắt đầu...
             row=2, column=0, sticky='w', pady=(0, 6)
         )
 
-        if os.path.isfile(names_path):
-            try:
-                with open(names_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    raw_names = [ln.strip() for ln in f if ln.strip()]
-            except Exception:
-                raw_names = []
-        else:
+        try:
+            raw_names = read_name_lines(names_path)
+        except Exception:
             raw_names = []
 
         ttk.Label(info_frame, text=f"File tên instance: {len(raw_names)} dòng", style="LabelSub.TLabel").grid(
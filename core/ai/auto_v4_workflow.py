@@ -11,7 +11,6 @@ import os
 import sys
 import json
 import subprocess
-import time
 from pathlib import Path
 from typing import Optional, Callable
 
@@ -28,6 +27,15 @@ from core.ai.video_scene_matcher import (
     load_keywords_from_json,
     get_video_pool_from_folder,
 )
+from core.ai.media_index import MediaIndex
+from core.ai.scene_assignment import assign_scenes, summarize_assignments
+from core.premierCore.jsx_status import format_status, status_path_for
+from core.premierCore.prproj_reader import export_track3_keywords
+
+# Thời gian chờ tối đa 1 JSX (giây); JSX báo xong sớm thì trả về ngay
+JSX_TIMEOUT_SEC = float(os.getenv("JSX_TIMEOUT_SEC", "1800"))
+# Đọc Track 3 thẳng từ .prproj trước khi cần tới Premiere ("0" để luôn chạy JSX)
+OFFLINE_PRPROJ = os.getenv("OFFLINE_PRPROJ", "1") != "0"
 
 
 class AutoV4Workflow:
@@ -62,13 +70,14 @@ class AutoV4Workflow:
         """Log với callback"""
         self.log_callback(msg)
 
-    def run_jsx_script(self, jsx_path: Path, wait_seconds: int = 10) -> bool:
+    def run_jsx_script(self, jsx_path: Path, timeout: float = JSX_TIMEOUT_SEC) -> bool:
         """
         Chạy JSX script TỰ ĐỘNG thông qua VS Code ExtendScript.
+        Chờ tới khi script ghi status done/error (data/_status_<script>.json).
 
         Args:
             jsx_path: Đường dẫn đến file .jsx
-            wait_seconds: Thời gian chờ script chạy xong
+            timeout: Thời gian chờ tối đa (giây)
 
         Returns:
             bool: True nếu thành công
@@ -83,12 +92,19 @@ class AutoV4Workflow:
             # Import control_jsx module
             from core.premierCore.control_jsx import run_jsx_in_premiere
 
-            # Chạy JSX tự động
-            self.log(f"  → Đang chạy tự động qua VS Code ExtendScript...")
+            # Chạy JSX tự động (jsxListener nếu đang chạy, ngược lại qua VS Code)
+            self.log(f"  → Đang chạy tự động...")
             success = run_jsx_in_premiere(
                 str(jsx_path),
                 premiere_version="2022",  # TODO: Make configurable
-                wait_seconds=wait_seconds
+                status_file=str(status_path_for(jsx_path)),
+                timeout=timeout,
+                on_progress=lambda st: self.log(f"  {format_status(st)}"),
+                # Qua jsxListener: truyền thẳng config, không phụ thuộc path.txt
+                params={
+                    "data_folder": str(self.data_folder).replace("\\", "/"),
+                    "project_path": str(self.project_path).replace("\\", "/"),
+                },
             )
 
             if success:
@@ -107,20 +123,29 @@ class AutoV4Workflow:
     def step1_extract_track3_keywords(self) -> bool:
         """
         Bước 1: Extract keywords từ Track 3 (TỰ ĐỘNG)
+
+        Đọc trực tiếp file .prproj đã lưu (prproj_reader.py, không cần
+        Premiere); lỗi hoặc không có keyword thì chạy extractTrack3Keywords.jsx.
         """
         self.log("\n=== STEP 1: Extract Keywords từ Track 3 ===")
 
-        # Chạy JSX script TỰ ĐỘNG (wait 15 giây cho script chạy)
-        success = self.run_jsx_script(self.jsx_extract_track3, wait_seconds=15)
+        if OFFLINE_PRPROJ and self.project_path.suffix.lower() == ".prproj" and self.project_path.exists():
+            try:
+                res = export_track3_keywords(self.project_path, self.data_folder)
+                if res["count"] > 0:
+                    self.log(f"✓ Đọc offline từ {self.project_path.name}: {res['count']} keywords")
+                    return self._validate_track3_keywords()
+                self.log("  → .prproj không có keyword ở Track 3, thử qua Premiere")
+            except Exception as e:
+                self.log(f"  → Không đọc được .prproj offline ({e}), thử qua Premiere")
+
+        # Chạy JSX script TỰ ĐỘNG (JSX báo done sau khi ghi xong JSON)
+        success = self.run_jsx_script(self.jsx_extract_track3)
 
         if not success:
             self.log("ERROR: Không chạy được extractTrack3Keywords.jsx")
             return False
 
-        # Chờ thêm 1 chút để file được ghi xong
-        self.log("Đang chờ file track3_keywords.json được ghi...")
-        time.sleep(2)
-
         # Kiểm tra file có tồn tại không
         if not self.track3_keywords_json.exists():
             self.log(f"ERROR: Không tìm thấy file: {self.track3_keywords_json}")
@@ -128,7 +153,9 @@ class AutoV4Workflow:
             self.log("  → Kiểm tra log trong Premiere/VS Code nếu có lỗi")
             return False
 
-        # Validate
+        return self._validate_track3_keywords()
+
+    def _validate_track3_keywords(self) -> bool:
         try:
             keywords = load_keywords_from_json(str(self.track3_keywords_json))
             self.log(f"✓ Loaded {len(keywords)} keywords")
@@ -164,17 +191,37 @@ class AutoV4Workflow:
             self.log("WARNING: Không có video nào trong resource folder")
             return False
 
+        # Media index: probe mỗi video 1 lần, lần sau chỉ probe file mới/đổi
+        media_index = MediaIndex(str(self.resource_folder))
+        probed = media_index.refresh()
+        self.log(f"Media index: {len(media_index.entries)} videos ({probed} probed)")
+
         # Create matcher
-        matcher = VideoSceneMatcher(gemini_api_key=self.gemini_api_key)
+        matcher = VideoSceneMatcher(gemini_api_key=self.gemini_api_key, media_index=media_index)
 
         # Find matches
         self.log("Đang phân tích videos...")
-        matches = matcher.find_best_scenes_for_keywords(keywords, videos)
+        # Batched prompts: 1 request/video cho mọi keyword (SCENE_MATCH_BATCH_MODE=none để tắt)
+        batch_mode = os.getenv("SCENE_MATCH_BATCH_MODE", "video").strip().lower()
+        matches = matcher.find_best_scenes_for_keywords(
+            keywords,
+            videos,
+            batch_mode=None if batch_mode in ("", "none") else batch_mode,
+        )
+
+        # Gán scene toàn cục: không dùng lại scene, phủ đủ duration mỗi keyword
+        assignments = assign_scenes(keywords, matches)
+        stats = summarize_assignments(assignments)
+        self.log(
+            f"Assignment: {stats['assigned']}/{stats['keywords']} keywords có scene, "
+            f"{stats['fully_covered']} phủ đủ thời lượng"
+        )
 
         # Save results
         output_data = {
             "keywords": keywords,
             "matches": matches,
+            "assignments": assignments,
         }
 
         try:
@@ -192,8 +239,8 @@ class AutoV4Workflow:
         """
         self.log("\n=== STEP 3: Auto Cut và Push vào V4 ===")
 
-        # Chạy JSX script TỰ ĐỘNG (wait 20 giây cho script xử lý)
-        success = self.run_jsx_script(self.jsx_auto_cut_v4, wait_seconds=20)
+        # Chạy JSX script TỰ ĐỘNG (chờ tới khi JSX báo hoàn thành)
+        success = self.run_jsx_script(self.jsx_auto_cut_v4)
 
         if not success:
             self.log("ERROR: Không chạy được autoCutAndPushV4.jsx")
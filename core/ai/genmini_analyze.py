@@ -44,6 +44,12 @@ def _ensure_logging_ready() -> None:
 ROOT_DIR = Path(__file__).resolve().parents[2]
 ENV_PATH = ROOT_DIR / ".env"
 
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from core.downloadTool.bandwidth import PROXY, get_scheduler
+from core.downloadTool.index_map import video_id_from_url
+
 
 def _load_env_from_dotenv(env_path: Path = ENV_PATH) -> None:
     if not env_path.exists():
@@ -320,11 +326,17 @@ def _download_proxy_video(video_url: str, out_dir: Path) -> Optional[Path]:
         cmd.extend(["--cookies", CFG.cookies_file])
 
     _vinfo("[DL] Downloading proxy (<=480p) for analysis...")
-    code, out = _run_cmd(cmd, timeout_sec=600)
+    # Băng thông chung với down_by_yt / downImage (core/downloadTool/bandwidth.py)
+    with get_scheduler().transfer(PROXY, video_url) as transfer:
+        if transfer.rate_limit:
+            cmd.extend(["--limit-rate", str(transfer.rate_limit)])
+        code, out = _run_cmd(cmd, timeout_sec=600)
+        found = list(out_dir.glob("*_proxy.mp4")) + list(out_dir.glob("*_proxy.webm")) + list(out_dir.glob("*_proxy.mkv"))
+        if found:
+            transfer.add(found[0].stat().st_size)
     if code != 0:
         LOG.warning("[DL] yt-dlp failed: %s", (out or "").strip()[:500])
 
-    found = list(out_dir.glob("*_proxy.mp4")) + list(out_dir.glob("*_proxy.webm")) + list(out_dir.glob("*_proxy.mkv"))
     return found[0] if found else None
 
 
@@ -634,11 +646,13 @@ def run_genmini_project(dl_links_path: str, segments_path: str, max_segments: in
                 if (not segs) and original:
                     segs = original[:1]
 
+                video_id = video_id_from_url(url)
                 video_map.append(
                     {
                         "video_global_index": global_idx,
                         "keyword": kw_clean,
                         "video_url": url,
+                        "video_id": video_id,
                         "video_index_in_keyword": idx,
                         "found_clips": len(segs),
                     }
@@ -651,6 +665,7 @@ def run_genmini_project(dl_links_path: str, segments_path: str, max_segments: in
                             "video_url": url,
                             "video_global_index": global_idx,
                             "video_index": idx,
+                            "video_id": video_id,
                             "segments": segs,
                         }
                     )
@@ -676,7 +691,8 @@ def build_production_timeline(segments_json: str, output_csv: str) -> int:
     max_scenes_per_keyword = CFG.timeline_max_scenes_per_keyword
     sort_by_score = CFG.timeline_sort_by_score
 
-    csv_lines = ["scene_index,character,bin_name,video_index,src_start,src_end,duration,type,notes"]
+    # video_id: file <id>.mp4 do down_by_yt đặt tên, không lệch khi thứ tự link đổi
+    csv_lines = ["scene_index,character,bin_name,video_index,video_id,src_start,src_end,duration,type,notes"]
     scene_idx = 0
 
     by_kw: Dict[str, List[Dict[str, Any]]] = {}
@@ -699,7 +715,11 @@ def build_production_timeline(segments_json: str, output_csv: str) -> int:
             if sort_by_score:
                 segs = sorted(segs, key=_seg_score, reverse=True)
             videos.append(
-                {"video_global_index": int(e.get("video_global_index", 0)), "segments": segs}
+                {
+                    "video_global_index": int(e.get("video_global_index", 0)),
+                    "video_id": e.get("video_id") or video_id_from_url(e.get("video_url") or ""),
+                    "segments": segs,
+                }
             )
 
         total_used_kw = 0
@@ -714,7 +734,7 @@ def build_production_timeline(segments_json: str, output_csv: str) -> int:
                     dur = float(item["end_sec"]) - float(item["start_sec"])
                     notes = (item.get("reason", "") or "").replace(",", ";")
                     csv_lines.append(
-                        f"{scene_idx},{kw},{_bin_slug(kw)},{v['video_global_index']},"
+                        f"{scene_idx},{kw},{_bin_slug(kw)},{v['video_global_index']},{v['video_id']},"
                         f"{float(item['start_sec']):.3f},{float(item['end_sec']):.3f},{dur:.3f},"
                         f"{item.get('type','CLIP')},{notes}"
                     )
@@ -746,7 +766,7 @@ def build_production_timeline(segments_json: str, output_csv: str) -> int:
                 dur = float(item["end_sec"]) - float(item["start_sec"])
                 notes = (item.get("reason", "") or "").replace(",", ";")
                 csv_lines.append(
-                    f"{scene_idx},{kw},{_bin_slug(kw)},{v['video_global_index']},"
+                    f"{scene_idx},{kw},{_bin_slug(kw)},{v['video_global_index']},{v['video_id']},"
                     f"{float(item['start_sec']):.3f},{float(item['end_sec']):.3f},{dur:.3f},"
                     f"{item.get('type','CLIP')},{notes}"
                 )
@@ -0,0 +1,154 @@
+"""
+media_index.py
+
+Index metadata của video local trong 1 resource folder:
+- duration, fps, resolution, codec (ffprobe, lưu trong catalog SQLite
+  `<resource_folder>/_catalog.sqlite` của core/downloadTool/catalog.py)
+- video id / url / title / tags (từ manifest của down_by_yt hoặc tên file)
+
+Catalog chỉ probe lại những file mới hoặc đổi mtime/size, nên match K
+keywords với V videos không phải gọi ffprobe/yt-dlp K×V lần, và download /
+proxy / FCP XML dùng chung 1 lần probe.
+"""
+
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+THIS_DIR = Path(__file__).parent.resolve()
+ROOT_DIR = THIS_DIR.parent.parent
+
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+# probe_media: 1 cài đặt dùng chung (catalog), giữ tên import cũ cho video_scene_matcher/proxies
+from core.downloadTool.catalog import ResourceCatalog, probe_media  # noqa: F401
+from core.downloadTool.manifest import MANIFEST_FILENAME, read_manifest
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm")
+
+# yt-dlp id YouTube: 11 ký tự [A-Za-z0-9_-]
+_RE_VIDEO_ID = re.compile(r"[A-Za-z0-9_-]{11}")
+
+
+def video_id_from_filename(filename: str) -> str:
+    """Đoán video id từ tên file ("<id>.mp4" hoặc file tạm "temp_<id>.mp4")."""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    if stem.startswith("temp_"):
+        stem = stem[len("temp_"):]
+    if _RE_VIDEO_ID.fullmatch(stem) and not stem.isdigit():
+        return stem
+    return ""
+
+
+class MediaIndex:
+    """
+    Index metadata cho mọi video trong 1 resource folder (đệ quy), đọc từ
+    catalog SQLite của folder.
+
+    Dùng:
+        index = MediaIndex(resource_folder)
+        index.refresh()                # rescan catalog (probe file mới/đổi)
+        meta = index.get(video_path)   # dict metadata hoặc None
+    """
+
+    def __init__(self, folder: str, catalog_path: Optional[str] = None):
+        self.folder = os.path.abspath(folder)
+        self.catalog_path = catalog_path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+    # ------------------------------------------------------------------
+    def _key(self, path: str) -> str:
+        rel = os.path.relpath(os.path.abspath(path), self.folder)
+        return rel.replace("\\", "/")
+
+    def refresh(self) -> int:
+        """
+        Rescan catalog rồi nạp metadata. Chỉ file mới hoặc đổi mtime/size
+        được probe. Trả về số file đã probe lại.
+        """
+        if not os.path.isdir(self.folder):
+            self.entries = {}
+            return 0
+
+        with ResourceCatalog(self.folder, self.catalog_path) as cat:
+            stats = cat.rescan()
+            rows = [r for r in cat.entries(("video",)) if r["path"].lower().endswith(VIDEO_EXTENSIONS)]
+        probed = stats["added"] + stats["updated"]
+
+        fresh: Dict[str, Dict[str, Any]] = {}
+        manifests: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            group_dir = os.path.dirname(row["abs_path"])
+            if group_dir not in manifests:
+                has_manifest = os.path.isfile(os.path.join(group_dir, MANIFEST_FILENAME))
+                manifests[group_dir] = (read_manifest(group_dir).get("items") or {}) if has_manifest else {}
+            name = os.path.basename(row["abs_path"])
+            # Manifest rẻ -> luôn merge lại (link có thể được tải lại)
+            man = manifests[group_dir].get(name) or {}
+            entry = {
+                "size": row["size"],
+                "mtime": row["mtime_ns"] / 1e9,
+                "probed": bool(row["probed"]),
+                "duration": row["duration"],
+                "fps": row["fps"],
+                "width": row["width"],
+                "height": row["height"],
+                "vcodec": row["vcodec"],
+                "acodec": row["acodec"],
+                "group": os.path.basename(group_dir) if group_dir != self.folder else "",
+                "video_id": man.get("id") or row["video_id"] or video_id_from_filename(name),
+                "url": man.get("url") or row["url"],
+                "title": man.get("title", ""),
+                "description": man.get("description", ""),
+                "tags": man.get("tags") or [],
+            }
+            if not entry["duration"] and man.get("duration"):
+                entry["duration"] = float(man["duration"])
+            fresh[row["path"]] = entry
+
+        self.entries = fresh
+        print(f"[media_index] {len(fresh)} video trong index, probe {probed} file ({self.folder})")
+        return probed
+
+    # ------------------------------------------------------------------
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(self._key(path))
+
+    def paths(self) -> List[str]:
+        return [os.path.join(self.folder, k) for k in sorted(self.entries)]
+
+    def metadata_for(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Metadata theo format của VideoSceneMatcher.analyze_video_metadata,
+        kèm thêm fps/width/height/video_id/group.
+        """
+        entry = self.get(path)
+        if entry is None:
+            return None
+        title = entry.get("title") or ""
+        if not title:
+            # Không có manifest: dùng tên group + tên file làm title tạm
+            stem = os.path.splitext(os.path.basename(path))[0]
+            title = " ".join(p for p in (entry.get("group", "").replace("_", " "), stem) if p)
+        return {
+            "title": title,
+            "description": entry.get("description", ""),
+            "tags": entry.get("tags") or [],
+            "duration": entry.get("duration", 0.0),
+            "fps": entry.get("fps", 0.0),
+            "width": entry.get("width", 0),
+            "height": entry.get("height", 0),
+            "video_id": entry.get("video_id", ""),
+            "url": entry.get("url", ""),
+            "group": entry.get("group", ""),
+        }
+
+
+def build_media_index(folder: str) -> MediaIndex:
+    """Load + refresh index của folder (tiện cho CLI / workflow)."""
+    index = MediaIndex(folder)
+    index.refresh()
+    return index
@@ -0,0 +1,180 @@
+"""
+transcript_index.py
+
+Full-text index trên transcript (phụ đề) của video local, map keyword -> mốc
+thời gian. Dùng để gợi ý scene cho keyword mà KHÔNG cần gọi AI; AI chỉ
+dùng cho keyword không tìm thấy trong transcript.
+
+Transcript được down_by_yt ghi cạnh video (`<stem>.transcript.json`,
+xem core/downloadTool/subtitles.py).
+"""
+
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+THIS_DIR = Path(__file__).parent.resolve()
+ROOT_DIR = THIS_DIR.parent.parent
+
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from core.ai.video_retrieval import tokenize
+from core.downloadTool.subtitles import load_transcript
+
+# Số cue lân cận gộp chung khi tìm cụm từ (keyword có thể vắt qua 2 cue)
+CUE_WINDOW = 1
+# Tỉ lệ token keyword tối thiểu phải xuất hiện trong cửa sổ cue
+MIN_COVERAGE = 1.0
+# Đệm trước/sau đoạn thoại (giây)
+SCENE_PAD_SEC = 0.5
+
+
+class TranscriptIndex:
+    """Posting list {token: [(video_idx, cue_idx), ...]} trên mọi transcript."""
+
+    def __init__(self):
+        self.videos: List[str] = []
+        self._video_idx: Dict[str, int] = {}
+        self.cues: List[List[Tuple[float, float, str]]] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self.videos)
+
+    def add(self, video_path: str, cues: List[Tuple[float, float, str]]) -> None:
+        vi = len(self.videos)
+        self.videos.append(video_path)
+        self._video_idx[video_path] = vi
+        self.cues.append([(float(st), float(en), str(txt)) for st, en, txt in cues])
+        for ci, (_, _, txt) in enumerate(self.cues[vi]):
+            for tok in set(tokenize(txt)):
+                self.postings[tok].append((vi, ci))
+
+    def text_of(self, video_path: str) -> str:
+        vi = self._video_idx.get(video_path)
+        if vi is None:
+            return ""
+        return " ".join(txt for _, _, txt in self.cues[vi])
+
+    def search(
+        self,
+        keyword: str,
+        max_hits: int = 5,
+        min_coverage: float = MIN_COVERAGE,
+        restrict_to: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Tìm các đoạn thoại chứa keyword.
+        Trả về [{video_path, start_time, end_time, text, score}] theo score giảm dần.
+        """
+        tokens = list(dict.fromkeys(tokenize(keyword)))
+        if not tokens:
+            return []
+
+        allowed = None
+        if restrict_to is not None:
+            allowed = {self._video_idx[p] for p in restrict_to if p in self._video_idx}
+
+        # (video_idx, cue_idx) -> set token khớp trong cửa sổ quanh cue
+        hits: Dict[Tuple[int, int], set] = defaultdict(set)
+        for tok in tokens:
+            for vi, ci in self.postings.get(tok, ()):
+                if allowed is not None and vi not in allowed:
+                    continue
+                for d in range(-CUE_WINDOW, CUE_WINDOW + 1):
+                    cj = ci + d
+                    if 0 <= cj < len(self.cues[vi]):
+                        hits[(vi, cj)].add(tok)
+
+        need = max(1, int(round(len(tokens) * min_coverage)))
+        scored = []
+        for (vi, ci), matched in hits.items():
+            if len(matched) < need:
+                continue
+            # Chỉ giữ cue thực sự chứa token (không phải cue "mượn" hoàn toàn từ hàng xóm)
+            own = set(tokenize(self.cues[vi][ci][2])) & set(tokens)
+            if not own:
+                continue
+            score = len(matched) / len(tokens) + 0.1 * len(own) / len(tokens)
+            scored.append((score, vi, ci))
+
+        scored.sort(key=lambda x: (-x[0], x[1], x[2]))
+
+        results: List[Dict[str, Any]] = []
+        used: Dict[int, List[Tuple[float, float]]] = defaultdict(list)
+        for score, vi, ci in scored:
+            st, en, txt = self.cues[vi][ci]
+            if any(st < u_en and en > u_st for u_st, u_en in used[vi]):
+                continue
+            used[vi].append((st, en))
+            results.append(
+                {
+                    "video_path": self.videos[vi],
+                    "start_time": max(0.0, round(st - SCENE_PAD_SEC, 3)),
+                    "end_time": round(en + SCENE_PAD_SEC, 3),
+                    "text": txt,
+                    "score": round(min(score, 1.0), 3),
+                }
+            )
+            if len(results) >= max_hits:
+                break
+        return results
+
+    @classmethod
+    def from_videos(cls, video_paths: List[str]) -> "TranscriptIndex":
+        """Load transcript (nếu có) của từng video và build index."""
+        index = cls()
+        for path in video_paths:
+            data = load_transcript(path)
+            if data and data.get("cues"):
+                index.add(path, data["cues"])
+        return index
+
+
+def transcript_matches_for_keyword(
+    index: TranscriptIndex,
+    keyword: str,
+    required_duration: float = 0.0,
+    max_hits: int = 5,
+    video_durations: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Chuyển hit transcript thành list match theo format scene_matches.json
+    (1 entry / video, suggested_scenes theo mốc thời gian).
+    """
+    video_durations = video_durations or {}
+    by_video: Dict[str, Dict[str, Any]] = {}
+
+    for hit in index.search(keyword, max_hits=max_hits):
+        path = hit["video_path"]
+        start, end = hit["start_time"], hit["end_time"]
+        if required_duration and end - start < required_duration:
+            end = start + required_duration
+        total = video_durations.get(path) or 0
+        if total:
+            end = min(end, total)
+
+        entry = by_video.setdefault(
+            path,
+            {
+                "video_path": path,
+                "confidence": 0.0,
+                "reason": f"Transcript match: \"{hit['text'][:120]}\"",
+                "suggested_scenes": [],
+                "duration": total,
+            },
+        )
+        entry["confidence"] = max(entry["confidence"], hit["score"])
+        entry["suggested_scenes"].append(
+            {
+                "start_time": start,
+                "end_time": round(end, 3),
+                "description": hit["text"][:200],
+            }
+        )
+
+    matches = list(by_video.values())
+    matches.sort(key=lambda x: x["confidence"], reverse=True)
+    return matches
@@ -0,0 +1,136 @@
+"""
+video_retrieval.py
+
+Inverted index BM25 để chọn nhanh top-k video cho mỗi keyword trước khi
+gọi AI. Mỗi video là 1 document gồm nhiều field có trọng số khác nhau:
+tên group folder, title, tags, subtitle text.
+
+Dùng:
+    index = VideoSearchIndex()
+    index.add(video_path, {"group": "Naruto", "title": "...", "tags": "...", "subtitles": "..."})
+    index.search("naruto luyện tập", top_k=3)  -> [(video_path, score), ...]
+"""
+
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Trọng số field (BM25F đơn giản: nhân term frequency theo field)
+DEFAULT_FIELD_WEIGHTS = {
+    "group": 3.0,
+    "title": 2.0,
+    "tags": 2.0,
+    "description": 0.5,
+    "subtitles": 1.0,
+}
+
+_RE_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _strip_accents(s: str) -> str:
+    s = s.replace("đ", "d").replace("Đ", "D")
+    return "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase + bỏ dấu tiếng Việt + tách theo ký tự chữ/số."""
+    if not text:
+        return []
+    text = _strip_accents(str(text)).lower().replace("_", " ")
+    return _RE_TOKEN.findall(text)
+
+
+class VideoSearchIndex:
+    """BM25 trên posting list {token: {doc_idx: weighted_tf}}."""
+
+    def __init__(
+        self,
+        k1: float = 1.5,
+        b: float = 0.75,
+        field_weights: Optional[Dict[str, float]] = None,
+    ):
+        self.k1 = k1
+        self.b = b
+        self.field_weights = dict(field_weights or DEFAULT_FIELD_WEIGHTS)
+        self.doc_ids: List[str] = []
+        self.doc_lens: List[float] = []
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._total_len = 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def add(self, doc_id: str, fields: Dict[str, Any]) -> None:
+        idx = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+
+        tf: Dict[str, float] = defaultdict(float)
+        length = 0.0
+        for field, value in fields.items():
+            weight = self.field_weights.get(field, 1.0)
+            if isinstance(value, (list, tuple)):
+                value = " ".join(str(v) for v in value)
+            for tok in tokenize(value):
+                tf[tok] += weight
+                length += weight
+
+        for tok, freq in tf.items():
+            self.postings[tok][idx] = freq
+        self.doc_lens.append(length)
+        self._total_len += length
+
+    def _idf(self, df: int) -> float:
+        n = len(self.doc_ids)
+        return math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[str, float]]:
+        """Trả về top_k (doc_id, score) có score > 0, score giảm dần."""
+        if not self.doc_ids:
+            return []
+
+        scores: Dict[int, float] = defaultdict(float)
+        avg_len = self._total_len / len(self.doc_lens) or 1.0
+        for tok in set(tokenize(query)):
+            posting = self.postings.get(tok)
+            if not posting:
+                continue
+            idf = self._idf(len(posting))
+            for idx, freq in posting.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self.doc_lens[idx] / avg_len)
+                scores[idx] += idf * freq * (self.k1 + 1.0) / (freq + norm)
+
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+        return [(self.doc_ids[i], round(s, 4)) for i, s in ranked]
+
+    @classmethod
+    def from_metadata(
+        cls,
+        metadata_by_video: Dict[str, Dict[str, Any]],
+        subtitle_loader: Optional[Callable[[str], str]] = None,
+        **kwargs: Any,
+    ) -> "VideoSearchIndex":
+        """
+        Build index từ {video_path: metadata} (format của
+        VideoSceneMatcher.analyze_video_metadata / MediaIndex.metadata_for).
+        """
+        index = cls(**kwargs)
+        for path, meta in metadata_by_video.items():
+            fields = {
+                "group": meta.get("group", ""),
+                "title": meta.get("title", ""),
+                "tags": meta.get("tags") or [],
+                "description": meta.get("description", ""),
+            }
+            if subtitle_loader is not None:
+                fields["subtitles"] = subtitle_loader(path) or ""
+            index.add(path, fields)
+        return index
+
+
+def rank_videos_for_keywords(
+    index: VideoSearchIndex, keywords: Iterable[str], top_k: int = 3
+) -> Dict[str, List[Tuple[str, float]]]:
+    """Tiện ích: top_k video cho từng keyword."""
+    return {kw: index.search(kw, top_k=top_k) for kw in keywords}
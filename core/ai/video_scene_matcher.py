@@ -27,6 +27,23 @@ try:
 except ImportError:
     HAS_YTDLP = False
 
+THIS_DIR = Path(__file__).parent.resolve()
+ROOT_DIR = THIS_DIR.parent.parent
+
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from core.ai.media_index import MediaIndex, probe_media
+from core.ai.video_retrieval import VideoSearchIndex
+from core.ai.transcript_index import TranscriptIndex, transcript_matches_for_keyword
+from core.ai.scene_assignment import assign_scenes
+from core.downloadTool.catalog import catalog_videos
+from core.downloadTool.subtitles import load_transcript
+
+# Batched prompts: giới hạn kích thước mỗi request (ký tự prompt / số item)
+BATCH_MAX_PROMPT_CHARS = int(os.getenv("SCENE_MATCH_BATCH_MAX_CHARS", "24000"))
+BATCH_MAX_ITEMS = int(os.getenv("SCENE_MATCH_BATCH_MAX_ITEMS", "25"))
+
 
 class VideoSceneMatcher:
     """
@@ -34,8 +51,14 @@ class VideoSceneMatcher:
     Sử dụng AI (Gemini) hoặc fallback methods.
     """
 
-    def __init__(self, gemini_api_key: Optional[str] = None):
+    def __init__(
+        self,
+        gemini_api_key: Optional[str] = None,
+        media_index: Optional[MediaIndex] = None,
+    ):
         self.gemini_api_key = gemini_api_key or os.getenv("GEMINI_API_KEY", "")
+        self.media_index = media_index
+        self._metadata_cache: Dict[str, Dict[str, Any]] = {}
 
         if HAS_GEMINI and self.gemini_api_key:
             genai.configure(api_key=self.gemini_api_key)
@@ -49,7 +72,28 @@ class VideoSceneMatcher:
     def analyze_video_metadata(self, video_path: str) -> Dict[str, Any]:
         """
         Phân tích metadata của video (title, description, tags).
+
+        File local: lấy từ media index (ffprobe + manifest), cache theo path.
+        URL: hỏi yt-dlp như cũ.
         """
+        if video_path in self._metadata_cache:
+            return self._metadata_cache[video_path]
+
+        if os.path.isfile(video_path):
+            metadata = None
+            if self.media_index is not None:
+                metadata = self.media_index.metadata_for(video_path)
+            if metadata is None:
+                info = probe_media(video_path)
+                metadata = {
+                    "title": Path(video_path).stem,
+                    "description": "",
+                    "tags": [],
+                    "duration": info.get("duration", 0),
+                }
+            self._metadata_cache[video_path] = metadata
+            return metadata
+
         if not HAS_YTDLP:
             return {"title": "", "description": "", "tags": []}
 
@@ -75,7 +119,16 @@ class VideoSceneMatcher:
     def extract_subtitle_text(self, video_path: str) -> str:
         """
         Trích xuất subtitles/captions từ video (nếu có).
+
+        File local: đọc transcript down_by_yt đã lưu cạnh video.
+        URL: chỉ báo có phụ đề hay không (qua yt-dlp).
         """
+        if os.path.isfile(video_path):
+            data = load_transcript(video_path)
+            if not data:
+                return ""
+            return " ".join(str(c[2]) for c in data.get("cues") or [])
+
         if not HAS_YTDLP:
             return ""
 
@@ -173,20 +226,159 @@ Chỉ trả về JSON, không thêm text nào khác.
 """
 
             response = self.model.generate_content(prompt)
-            text = response.text.strip()
-
-            # Parse JSON
-            # Remove markdown code blocks if present
-            text = re.sub(r"```json\n?", "", text)
-            text = re.sub(r"```\n?", "", text)
-
-            result = json.loads(text)
-            return result
+            return self._parse_ai_json(response.text)
 
         except Exception as e:
             print(f"[ai_analyze_video_for_keyword] Error: {e}")
             return self._fallback_analysis(keyword, video_metadata)
 
+    @staticmethod
+    def _parse_ai_json(text: str) -> Any:
+        """Bỏ markdown code fence (nếu có) rồi json.loads."""
+        text = (text or "").strip()
+        text = re.sub(r"```json\n?", "", text)
+        text = re.sub(r"```\n?", "", text)
+        return json.loads(text)
+
+    @staticmethod
+    def _video_context(video_metadata: Dict[str, Any]) -> str:
+        return (
+            f"Title: {video_metadata.get('title', 'N/A')}\n"
+            f"Description: {(video_metadata.get('description') or 'N/A')[:500]}\n"
+            f"Tags: {', '.join((video_metadata.get('tags') or [])[:10])}\n"
+            f"Duration: {video_metadata.get('duration', 0)} seconds"
+        )
+
+    @staticmethod
+    def _split_batches(header_len: int, item_lines: List[str]) -> List[List[int]]:
+        """Chia item thành các batch vừa BATCH_MAX_PROMPT_CHARS / BATCH_MAX_ITEMS."""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        size = header_len
+        for i, line in enumerate(item_lines):
+            if current and (
+                size + len(line) > BATCH_MAX_PROMPT_CHARS or len(current) >= BATCH_MAX_ITEMS
+            ):
+                batches.append(current)
+                current, size = [], header_len
+            current.append(i)
+            size += len(line) + 1
+        if current:
+            batches.append(current)
+        return batches
+
+    def _run_batch_prompt(self, prompt: str) -> Dict[str, Dict[str, Any]]:
+        """Gửi 1 batch prompt, trả {item_id: analysis}."""
+        response = self.model.generate_content(prompt)
+        data = self._parse_ai_json(response.text)
+        items = data.get("results", []) if isinstance(data, dict) else data
+        out: Dict[str, Dict[str, Any]] = {}
+        for item in items or []:
+            if isinstance(item, dict) and item.get("id") is not None:
+                out[str(item["id"])] = item
+        return out
+
+    _BATCH_RESPONSE_FORMAT = """
+Hãy trả lời theo format JSON, mỗi mục trong danh sách trên có đúng 1 phần tử (giữ nguyên "id"):
+{{
+    "results": [
+        {{
+            "id": "{first_id}",
+            "relevant": true/false,
+            "confidence": 0.0-1.0,
+            "reason": "Giải thích ngắn gọn",
+            "suggested_scenes": [
+                {{
+                    "start_time": 0,
+                    "end_time": 10,
+                    "description": "Mô tả ngắn"
+                }}
+            ]
+        }}
+    ]
+}}
+
+Chỉ trả về JSON, không thêm text nào khác.
+"""
+
+    @staticmethod
+    def _normalize_analysis(item: Dict[str, Any]) -> Dict[str, Any]:
+        """Giữ đúng các field của output per-pair."""
+        return {
+            "relevant": bool(item.get("relevant", False)),
+            "confidence": item.get("confidence", 0.0),
+            "reason": item.get("reason", ""),
+            "suggested_scenes": item.get("suggested_scenes", []) or [],
+        }
+
+    def ai_analyze_video_for_keywords(
+        self, keywords: List[str], video_metadata: Dict[str, Any]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Batched: 1 video, nhiều keyword -> {keyword: analysis}.
+        Context video chỉ gửi 1 lần cho mỗi batch.
+        """
+        keywords = list(dict.fromkeys(keywords))
+        if not self.use_ai:
+            return {kw: self._fallback_analysis(kw, video_metadata) for kw in keywords}
+
+        head = (
+            "Phân tích video sau và đánh giá mức độ liên quan của nội dung với TỪNG từ khóa bên dưới:\n\n"
+            + self._video_context(video_metadata)
+            + "\n\nDanh sách từ khóa:\n"
+        )
+        lines = [f'- id "k{i}": "{kw}"' for i, kw in enumerate(keywords)]
+        tail = self._BATCH_RESPONSE_FORMAT
+        results: Dict[str, Dict[str, Any]] = {}
+
+        for batch in self._split_batches(len(head) + len(tail), lines):
+            prompt = head + "\n".join(lines[i] for i in batch) + "\n" + tail.format(first_id=f"k{batch[0]}")
+            try:
+                answers = self._run_batch_prompt(prompt)
+            except Exception as e:
+                print(f"[ai_analyze_video_for_keywords] Error: {e}")
+                answers = {}
+            for i in batch:
+                kw = keywords[i]
+                item = answers.get(f"k{i}")
+                results[kw] = (
+                    self._normalize_analysis(item) if item else self._fallback_analysis(kw, video_metadata)
+                )
+        return results
+
+    def ai_analyze_videos_for_keyword(
+        self, keyword: str, videos: List[Tuple[str, Dict[str, Any]]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Batched: 1 keyword, nhiều video [(path, metadata)] -> {path: analysis}.
+        """
+        if not self.use_ai:
+            return {path: self._fallback_analysis(keyword, meta) for path, meta in videos}
+
+        head = (
+            f'Với từ khóa "{keyword}", đánh giá TỪNG video bên dưới có nội dung liên quan hay không:\n\n'
+        )
+        lines = [
+            f'### id "v{i}"\n{self._video_context(meta)}\n' for i, (_, meta) in enumerate(videos)
+        ]
+        tail = self._BATCH_RESPONSE_FORMAT
+        results: Dict[str, Dict[str, Any]] = {}
+
+        for batch in self._split_batches(len(head) + len(tail), lines):
+            prompt = head + "\n".join(lines[i] for i in batch) + "\n" + tail.format(first_id=f"v{batch[0]}")
+            try:
+                answers = self._run_batch_prompt(prompt)
+            except Exception as e:
+                print(f"[ai_analyze_videos_for_keyword] Error: {e}")
+                answers = {}
+            for i in batch:
+                path, meta = videos[i]
+                item = answers.get(f"v{i}")
+                results[path] = (
+                    self._normalize_analysis(item) if item else self._fallback_analysis(keyword, meta)
+                )
+        return results
+
     def _fallback_analysis(
         self, keyword: str, video_metadata: Dict[str, Any]
     ) -> Dict[str, Any]:
@@ -209,11 +401,29 @@ Chỉ trả về JSON, không thêm text nào khác.
             ],
         }
 
+    def build_search_index(self, video_pool: List[str]) -> VideoSearchIndex:
+        """
+        Build BM25 index (group folder, title, tags, description, subtitles)
+        cho pool video. Metadata lấy từ media index nên không tốn thêm lượt probe nào.
+        """
+        metadata_by_video = {
+            p: self.analyze_video_metadata(p) for p in video_pool if os.path.exists(p)
+        }
+        for path, meta in metadata_by_video.items():
+            if not meta.get("group"):
+                meta = dict(meta)
+                meta["group"] = os.path.basename(os.path.dirname(path))
+                metadata_by_video[path] = meta
+        return VideoSearchIndex.from_metadata(metadata_by_video, subtitle_loader=self.extract_subtitle_text)
+
     def find_best_scenes_for_keywords(
         self,
         keywords_data: List[Dict[str, Any]],
         video_pool: List[str],
         max_videos_per_keyword: int = 3,
+        search_index: Optional[VideoSearchIndex] = None,
+        batch_mode: Optional[str] = None,
+        use_transcripts: bool = True,
     ) -> Dict[str, List[Dict[str, Any]]]:
         """
         Tìm best matching scenes cho mỗi keyword từ pool videos.
@@ -222,31 +432,100 @@ Chỉ trả về JSON, không thêm text nào khác.
             keywords_data: List of {keyword, start_seconds, end_seconds, duration_seconds}
             video_pool: List of video file paths
             max_videos_per_keyword: Số videos tối đa để analyze cho mỗi keyword
+            search_index: BM25 index dùng để chọn top videos cho keyword
+                (mặc định build từ video_pool)
+            batch_mode: None = 1 request / (keyword, video);
+                "video" = 1 request / video cho mọi keyword của nó;
+                "keyword" = 1 request / keyword cho mọi video ứng viên.
+            use_transcripts: tìm keyword trong transcript trước; keyword có hit
+                lấy suggested_scenes từ mốc thời gian, không gọi AI.
 
         Returns:
             Dict mapping keyword -> list of matching videos with scenes
         """
         results = {}
 
+        if search_index is None:
+            search_index = self.build_search_index(video_pool)
+        existing_pool = [p for p in video_pool if os.path.exists(p)]
+
+        transcript_index = TranscriptIndex.from_videos(existing_pool) if use_transcripts else None
+        if transcript_index is not None and len(transcript_index):
+            print(f"[find_best_scenes] Transcript index: {len(transcript_index)} videos")
+        durations = {p: self.analyze_video_metadata(p).get("duration", 0) for p in existing_pool}
+        transcript_results: Dict[str, List[Dict[str, Any]]] = {}
+
+        # 1) Chọn video ứng viên cho từng keyword
+        candidates_by_kw: Dict[str, List[str]] = {}
         for kw_item in keywords_data:
             keyword = kw_item["keyword"]
             required_duration = kw_item["duration_seconds"]
 
             print(f"\n[find_best_scenes] Processing keyword: '{keyword}' (need {required_duration:.1f}s)")
 
-            matches = []
-
-            for video_path in video_pool[:max_videos_per_keyword]:
-                if not os.path.exists(video_path):
+            # Transcript có câu thoại khớp -> dùng luôn mốc thời gian, bỏ qua AI
+            if transcript_index is not None and len(transcript_index):
+                t_matches = transcript_matches_for_keyword(
+                    transcript_index,
+                    keyword,
+                    required_duration=required_duration,
+                    max_hits=max_videos_per_keyword * 2,
+                    video_durations=durations,
+                )
+                if t_matches:
+                    transcript_results[keyword] = t_matches[:max_videos_per_keyword]
+                    print(f"  Transcript hits in {len(t_matches)} videos, skipping AI")
                     continue
 
-                print(f"  Analyzing video: {os.path.basename(video_path)}")
+            # Chỉ gửi AI các video xếp hạng cao nhất cho keyword này
+            ranked = search_index.search(keyword, top_k=max_videos_per_keyword)
+            if ranked:
+                candidates_by_kw[keyword] = [path for path, _ in ranked]
+                print(f"  Top candidates: {', '.join(f'{os.path.basename(p)} ({sc:.2f})' for p, sc in ranked)}")
+            else:
+                # Không có token nào khớp -> giữ hành vi cũ (đầu pool)
+                candidates_by_kw[keyword] = existing_pool[:max_videos_per_keyword]
+                print("  No lexical match, falling back to first videos in pool")
+
+        # 2) AI analysis: per-pair hoặc batched
+        analyses: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        if batch_mode == "video":
+            keywords_by_video: Dict[str, List[str]] = {}
+            for keyword, paths in candidates_by_kw.items():
+                for path in paths:
+                    keywords_by_video.setdefault(path, []).append(keyword)
+            for path, kws in keywords_by_video.items():
+                print(f"  Analyzing video: {os.path.basename(path)} ({len(kws)} keywords, batched)")
+                per_kw = self.ai_analyze_video_for_keywords(kws, self.analyze_video_metadata(path))
+                for keyword, analysis in per_kw.items():
+                    analyses[(keyword, path)] = analysis
+        elif batch_mode == "keyword":
+            for keyword, paths in candidates_by_kw.items():
+                print(f"  Analyzing {len(paths)} videos for '{keyword}' (batched)")
+                videos = [(p, self.analyze_video_metadata(p)) for p in paths]
+                for path, analysis in self.ai_analyze_videos_for_keyword(keyword, videos).items():
+                    analyses[(keyword, path)] = analysis
+        else:
+            for keyword, paths in candidates_by_kw.items():
+                for path in paths:
+                    print(f"  Analyzing video: {os.path.basename(path)}")
+                    analyses[(keyword, path)] = self.ai_analyze_video_for_keyword(
+                        keyword, self.analyze_video_metadata(path)
+                    )
 
-                # Get metadata
-                metadata = self.analyze_video_metadata(video_path)
+        # 3) Gom kết quả theo format scene_matches.json
+        for kw_item in keywords_data:
+            keyword = kw_item["keyword"]
+            if keyword in transcript_results:
+                results[keyword] = transcript_results[keyword]
+                print(f"  Found {len(results[keyword])} transcript matches for '{keyword}'")
+                continue
+            paths = candidates_by_kw.get(keyword, [])
+            matches = []
 
-                # AI analysis
-                analysis = self.ai_analyze_video_for_keyword(keyword, metadata)
+            for video_path in paths:
+                analysis = analyses.get((keyword, video_path)) or {}
+                metadata = self.analyze_video_metadata(video_path)
 
                 if analysis.get("relevant", False):
                     matches.append(
@@ -279,18 +558,25 @@ def load_keywords_from_json(json_path: str) -> List[Dict[str, Any]]:
 
 def get_video_pool_from_folder(folder_path: str) -> List[str]:
     """
-    Lấy tất cả video files từ folder.
+    Lấy tất cả video files từ folder, qua catalog SQLite của resource
+    (core/downloadTool/catalog.py, rescan incremental theo mtime).
+    Không mở được catalog -> duyệt thư mục 1 lần.
     """
-    video_extensions = [".mp4", ".mov", ".avi", ".mkv", ".webm"]
-    videos = []
+    video_extensions = (".mp4", ".mov", ".avi", ".mkv", ".webm")
 
     folder = Path(folder_path)
     if not folder.exists():
-        return videos
+        return []
 
-    for ext in video_extensions:
-        videos.extend([str(f) for f in folder.rglob(f"*{ext}")])
+    try:
+        return [p for p in catalog_videos(str(folder)) if p.lower().endswith(video_extensions)]
+    except Exception as e:
+        print(f"[VideoSceneMatcher][WARN] Catalog lỗi ({e}) -> duyệt thư mục")
 
+    videos = []
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames[:] = [d for d in dirnames if not d.startswith((".", "_"))]
+        videos.extend(os.path.join(dirpath, f) for f in sorted(filenames) if f.lower().endswith(video_extensions))
     return videos
 
 
@@ -305,6 +591,12 @@ def main():
     parser.add_argument("--video-folder", required=True, help="Folder containing videos")
     parser.add_argument("--output", default="scene_matches.json", help="Output JSON file")
     parser.add_argument("--gemini-key", help="Gemini API key")
+    parser.add_argument(
+        "--batch-mode",
+        choices=["none", "video", "keyword"],
+        default="video",
+        help="Gộp prompt AI theo video hoặc theo keyword",
+    )
 
     args = parser.parse_args()
 
@@ -316,16 +608,22 @@ def main():
     videos = get_video_pool_from_folder(args.video_folder)
     print(f"Found {len(videos)} videos in {args.video_folder}")
 
+    # Index metadata video (probe 1 lần, cache theo mtime/size)
+    media_index = MediaIndex(args.video_folder)
+    media_index.refresh()
+
     # Create matcher
-    matcher = VideoSceneMatcher(gemini_api_key=args.gemini_key)
+    matcher = VideoSceneMatcher(gemini_api_key=args.gemini_key, media_index=media_index)
 
     # Find matches
-    results = matcher.find_best_scenes_for_keywords(keywords, videos)
+    batch_mode = None if args.batch_mode == "none" else args.batch_mode
+    results = matcher.find_best_scenes_for_keywords(keywords, videos, batch_mode=batch_mode)
 
     # Save results
     output_data = {
         "keywords": keywords,
         "matches": results,
+        "assignments": assign_scenes(keywords, results),
     }
 
     with open(args.output, "w", encoding="utf-8") as f:
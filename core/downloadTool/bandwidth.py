@@ -0,0 +1,208 @@
+"""
+bandwidth.py
+-----------------------------------
+Ngân sách băng thông chung cho mọi luồng tải trong 1 process (down_by_yt,
+downImage, proxy phân tích của genmini), chia theo class:
+
+    video_priority - video timeline cần trước (video đầu mỗi keyword, tải lại sau verify)
+    video          - phần còn lại của dl_links.txt
+    proxy          - proxy <=480p genmini tải để phân tích
+    image          - ảnh (downImage)
+
+Tổng BANDWIDTH_TOTAL_KBPS (0 = không giới hạn) chia theo BANDWIDTH_SHARES
+giữa các class đang có transfer (class rảnh nhường phần của mình).
+
+- Tải trong process hiện tại (downImage): throttle() theo token bucket
+- Tải ở process con (yt-dlp): rate_limit của transfer truyền vào
+  `ratelimit` / `--limit-rate`, byte báo về qua add() để đo throughput
+
+GUI đọc snapshot() (throughput từng class trong BANDWIDTH_WINDOW_SEC giây gần nhất).
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+# ---------------------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------------------
+BANDWIDTH_TOTAL_KBPS = float(os.environ.get("BANDWIDTH_TOTAL_KBPS", "0"))
+BANDWIDTH_SHARES = os.environ.get("BANDWIDTH_SHARES", "video_priority=4,video=3,proxy=2,image=1")
+BANDWIDTH_WINDOW_SEC = float(os.environ.get("BANDWIDTH_WINDOW_SEC", "5"))
+
+VIDEO_PRIORITY = "video_priority"
+VIDEO = "video"
+PROXY = "proxy"
+IMAGE = "image"
+
+# yt-dlp không nhận ratelimit quá nhỏ có ý nghĩa; sàn 32 KB/s
+MIN_RATE_BPS = 32 * 1024
+
+
+def parse_shares(spec: str) -> Dict[str, float]:
+    """'video=3,image=1' -> {"video": 3.0, "image": 1.0} (bỏ mục sai)."""
+    shares: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        name, value = part.split("=", 1)
+        try:
+            w = float(value)
+        except ValueError:
+            continue
+        if name.strip() and w > 0:
+            shares[name.strip()] = w
+    return shares
+
+
+class Transfer:
+    """1 lượt tải đang chạy; dùng qua `with scheduler.transfer(cls) as t`."""
+
+    def __init__(self, scheduler: "BandwidthScheduler", cls: str, label: str):
+        self.scheduler = scheduler
+        self.cls = cls
+        self.label = label
+        self.bytes = 0
+
+    @property
+    def rate_limit(self) -> Optional[int]:
+        """Byte/s cho riêng transfer này (None = không giới hạn)."""
+        return self.scheduler.rate_for(self.cls, per_transfer=True)
+
+    def add(self, nbytes: int) -> None:
+        """Ghi nhận byte đã tải (không chờ)."""
+        if nbytes > 0:
+            self.bytes += nbytes
+            self.scheduler._record(self.cls, nbytes)
+
+    def throttle(self, nbytes: int) -> None:
+        """Chờ đủ token của class rồi ghi nhận byte (tải trong process này)."""
+        self.scheduler._consume(self.cls, nbytes)
+        self.add(nbytes)
+
+    def __enter__(self) -> "Transfer":
+        self.scheduler._start(self)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.scheduler._finish(self)
+
+
+class BandwidthScheduler:
+    def __init__(self, total_kbps: float = BANDWIDTH_TOTAL_KBPS, shares: Optional[Dict[str, float]] = None,
+                 window_sec: float = BANDWIDTH_WINDOW_SEC):
+        self.total_bps = int(total_kbps * 1024) if total_kbps > 0 else 0
+        self.shares = shares or parse_shares(BANDWIDTH_SHARES)
+        self.window_sec = window_sec
+        self._lock = threading.Lock()
+        self._active: Dict[str, int] = {}
+        self._bytes: Dict[str, int] = {}
+        self._samples: Dict[str, Deque[Tuple[float, int]]] = {}
+        # token bucket mỗi class: (token, thời điểm cập nhật)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def transfer(self, cls: str, label: str = "") -> Transfer:
+        return Transfer(self, cls, label)
+
+    def _share(self, cls: str) -> float:
+        return self.shares.get(cls, 1.0)
+
+    def rate_for(self, cls: str, per_transfer: bool = False) -> Optional[int]:
+        """Byte/s của class (hoặc của 1 transfer trong class) theo các class đang tải."""
+        if not self.total_bps:
+            return None
+        with self._lock:
+            active = {c for c, n in self._active.items() if n > 0} | {cls}
+            rate = self.total_bps * self._share(cls) / sum(self._share(c) for c in active)
+            if per_transfer:
+                rate /= max(1, self._active.get(cls, 0))
+        return max(MIN_RATE_BPS, int(rate))
+
+    def _start(self, t: Transfer) -> None:
+        with self._lock:
+            self._active[t.cls] = self._active.get(t.cls, 0) + 1
+
+    def _finish(self, t: Transfer) -> None:
+        with self._lock:
+            self._active[t.cls] = max(0, self._active.get(t.cls, 0) - 1)
+
+    def _record(self, cls: str, nbytes: int) -> None:
+        now = time.time()
+        with self._lock:
+            self._bytes[cls] = self._bytes.get(cls, 0) + nbytes
+            samples = self._samples.setdefault(cls, deque())
+            samples.append((now, nbytes))
+            while samples and samples[0][0] < now - self.window_sec:
+                samples.popleft()
+
+    def _consume(self, cls: str, nbytes: int) -> None:
+        rate = self.rate_for(cls)
+        if not rate:
+            return
+        with self._lock:
+            now = time.time()
+            tokens, last = self._buckets.get(cls, (0.0, now))
+            # Bucket tối đa 1 giây băng thông
+            tokens = min(float(rate), tokens + (now - last) * rate) - nbytes
+            self._buckets[cls] = (tokens, now)
+        if tokens < 0:
+            time.sleep(-tokens / rate)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        {"limit_bps", "throughput_bps", "classes": {cls: {"active", "limit_bps",
+         "throughput_bps", "bytes"}}} - throughput trung bình trong cửa sổ đo.
+        """
+        now = time.time()
+        classes: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            names = set(self._active) | set(self._bytes)
+            for cls in sorted(names):
+                samples = self._samples.get(cls) or deque()
+                recent = sum(n for ts, n in samples if ts >= now - self.window_sec)
+                classes[cls] = {
+                    "active": self._active.get(cls, 0),
+                    "throughput_bps": int(recent / self.window_sec),
+                    "bytes": self._bytes.get(cls, 0),
+                }
+        for cls, info in classes.items():
+            info["limit_bps"] = self.rate_for(cls) if info["active"] else None
+        return {
+            "limit_bps": self.total_bps or None,
+            "throughput_bps": sum(c["throughput_bps"] for c in classes.values()),
+            "classes": classes,
+        }
+
+
+_scheduler: Optional[BandwidthScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> BandwidthScheduler:
+    """Scheduler dùng chung của process (tạo lần đầu theo env)."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = BandwidthScheduler()
+        return _scheduler
+
+
+def snapshot() -> Dict[str, Any]:
+    return get_scheduler().snapshot()
+
+
+def format_snapshot(snap: Dict[str, Any]) -> str:
+    """'1.20 MB/s (giới hạn 2.00 MB/s) | video: 1.10 MB/s, 350.0 MB' cho log/GUI."""
+    def rate(bps: Optional[int]) -> str:
+        return f"{(bps or 0) / 1024 / 1024:.2f} MB/s"
+
+    head = rate(snap.get("throughput_bps"))
+    if snap.get("limit_bps"):
+        head += f" (giới hạn {rate(snap['limit_bps'])})"
+    parts = [
+        f"{cls}: {rate(c['throughput_bps'])}, {c['bytes'] / 1024 / 1024:.1f} MB"
+        for cls, c in (snap.get("classes") or {}).items()
+    ]
+    return head + (" | " + "; ".join(parts) if parts else "")
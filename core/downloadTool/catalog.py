@@ -0,0 +1,453 @@
+"""
+catalog.py
+-----------------------------------
+Catalog SQLite cho 1 thư mục resource (`<resource>/_catalog.sqlite`):
+mỗi file media 1 dòng với path, video id, url, keyword (group), size,
+mtime, duration, codec và checksum.
+
+- down_by_yt ghi ngay khi tải xong file (record_file)
+- rescan(): đồng bộ với filesystem. Thư mục có mtime không đổi thì không
+  liệt kê lại (thêm/xoá/đổi tên file đều đổi mtime thư mục) nhưng vẫn stat
+  từng file đã biết (file bị sửa tại chỗ ngoài tool không đổi mtime thư
+  mục); deep=True liệt kê lại mọi thư mục
+- Metadata video (duration, fps, kích thước, codec) probe 1 lần bằng
+  probe_media() khi file mới/đổi; MediaIndex dùng lại, không probe riêng
+- Consumer (get_video_pool_from_folder, MediaIndex, fcp_xml.ClipResolver
+  -> import_list/subclips/verify, mezzanine, proxies) query catalog thay
+  vì duyệt cây thư mục
+
+checksum = blake2b(size + 1 MB đầu + 1 MB cuối): đủ phát hiện file khác
+nhau mà không phải đọc hết file vài GB.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+try:
+    from .manifest import MANIFEST_FILENAME, read_manifest  # type: ignore
+except Exception:
+    from core.downloadTool.manifest import MANIFEST_FILENAME, read_manifest  # type: ignore
+
+CATALOG_FILENAME = "_catalog.sqlite"
+CATALOG_VERSION = 2
+CHECKSUM_SAMPLE = 1024 * 1024
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".mxf", ".mkv", ".avi", ".m4v", ".webm", ".wmv", ".mts")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a")
+MEDIA_EXTENSIONS = VIDEO_EXTENSIONS + IMAGE_EXTENSIONS + AUDIO_EXTENSIONS
+
+FFPROBE_PATH = shutil.which("ffprobe")
+HAS_FFPROBE = FFPROBE_PATH is not None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    path      TEXT PRIMARY KEY,      -- tương đối so với resource, dấu /
+    grp       TEXT NOT NULL,         -- thư mục con cấp 1 (= keyword / bin)
+    kind      TEXT NOT NULL,         -- video | image | audio
+    video_id  TEXT NOT NULL DEFAULT '',
+    url       TEXT NOT NULL DEFAULT '',
+    size      INTEGER NOT NULL,
+    mtime_ns  INTEGER NOT NULL,
+    duration  REAL NOT NULL DEFAULT 0,
+    width     INTEGER NOT NULL DEFAULT 0,
+    height    INTEGER NOT NULL DEFAULT 0,
+    fps       REAL NOT NULL DEFAULT 0,
+    vcodec    TEXT NOT NULL DEFAULT '',
+    acodec    TEXT NOT NULL DEFAULT '',
+    checksum  TEXT NOT NULL DEFAULT '',
+    probed    INTEGER NOT NULL DEFAULT 0,   -- 1 = đã chạy ffprobe (kể cả lỗi)
+    updated   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS media_grp ON media(grp);
+CREATE INDEX IF NOT EXISTS media_video_id ON media(video_id);
+CREATE TABLE IF NOT EXISTS dirs (
+    path      TEXT PRIMARY KEY,      -- tương đối, '' = gốc resource
+    parent    TEXT,
+    mtime_ns  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _kind(name: str) -> str:
+    ext = os.path.splitext(name)[1].lower()
+    if ext in VIDEO_EXTENSIONS:
+        return "video"
+    if ext in IMAGE_EXTENSIONS:
+        return "image"
+    if ext in AUDIO_EXTENSIONS:
+        return "audio"
+    return ""
+
+
+def _skip_dir(name: str) -> bool:
+    # _proxy, _original, _subclips, .cache... không phải media nguồn
+    return name.startswith((".", "_"))
+
+
+def _parse_rate(rate: Optional[str]) -> float:
+    if not rate or rate in ("0/0", "0"):
+        return 0.0
+    try:
+        if "/" in rate:
+            num, den = rate.split("/", 1)
+            return round(float(num) / float(den), 3) if float(den) else 0.0
+        return float(rate)
+    except Exception:
+        return 0.0
+
+
+def probe_media(path: str, timeout_sec: int = 30) -> Dict[str, Any]:
+    """
+    Chạy ffprobe 1 lần để lấy duration, fps, width, height, codec.
+    Trả dict rỗng nếu không có ffprobe hoặc file không đọc được.
+    """
+    if not HAS_FFPROBE:
+        return {}
+
+    cmd = [
+        FFPROBE_PATH,
+        "-v", "error",
+        "-print_format", "json",
+        "-show_format",
+        "-show_streams",
+        path,
+    ]
+    try:
+        p = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="ignore",
+            timeout=timeout_sec,
+        )
+        if p.returncode != 0:
+            return {}
+        data = json.loads(p.stdout or "{}")
+    except Exception as e:
+        print(f"[catalog] ffprobe lỗi {os.path.basename(path)}: {e}")
+        return {}
+
+    fmt = data.get("format") or {}
+    streams = data.get("streams") or []
+    video = next((s for s in streams if s.get("codec_type") == "video"), None) or {}
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None) or {}
+
+    try:
+        duration = float(fmt.get("duration") or video.get("duration") or 0)
+    except Exception:
+        duration = 0.0
+
+    return {
+        "duration": round(duration, 3),
+        "fps": _parse_rate(video.get("avg_frame_rate") or video.get("r_frame_rate")),
+        "width": int(video.get("width") or 0),
+        "height": int(video.get("height") or 0),
+        "vcodec": video.get("codec_name") or "",
+        "acodec": audio.get("codec_name") or "",
+        "has_video": bool(video),
+    }
+
+
+def quick_checksum(path: str, size: Optional[int] = None) -> str:
+    if size is None:
+        size = os.path.getsize(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(size).encode())
+    with open(path, "rb") as f:
+        h.update(f.read(CHECKSUM_SAMPLE))
+        if size > 2 * CHECKSUM_SAMPLE:
+            f.seek(-CHECKSUM_SAMPLE, os.SEEK_END)
+            h.update(f.read(CHECKSUM_SAMPLE))
+    return h.hexdigest()
+
+
+class ResourceCatalog:
+    """
+    Dùng:
+        cat = ResourceCatalog(resource_dir)
+        cat.rescan()                      # incremental
+        cat.videos()                      # [abs path] mọi video
+        cat.videos(group="Naruto")
+        cat.find_by_id("dQw4w9WgXcQ")
+        cat.close()
+    """
+
+    def __init__(self, resource_dir: str, db_path: Optional[str] = None, probe: bool = True):
+        self.root = os.path.abspath(resource_dir)
+        self.db_path = db_path or os.path.join(self.root, CATALOG_FILENAME)
+        self.probe = probe
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        row = self.conn.execute("SELECT value FROM meta WHERE key='version'").fetchone()
+        if row is None or row["value"] != str(CATALOG_VERSION):
+            # Schema có thể đã đổi: dựng lại bảng, rescan sau sẽ nạp lại
+            self.conn.executescript("DROP TABLE IF EXISTS media; DROP TABLE IF EXISTS dirs;")
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES('version', ?)", (str(CATALOG_VERSION),))
+            self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "ResourceCatalog":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    def _rel(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), self.root).replace("\\", "/")
+
+    def _abs(self, rel: str) -> str:
+        return os.path.join(self.root, *rel.split("/"))
+
+    @staticmethod
+    def _group(rel: str) -> str:
+        return rel.split("/", 1)[0] if "/" in rel else ""
+
+    def _probe(self, path: str) -> Dict[str, Any]:
+        return probe_media(path) if self.probe else {}
+
+    def _needs_probe(self, rel: str, probed: int) -> bool:
+        """Video ghi lúc chưa có ffprobe (hoặc probe=False) -> probe khi đã có."""
+        return self.probe and HAS_FFPROBE and not probed and _kind(rel) == "video"
+
+    def _upsert(self, path: str, st: os.stat_result, url: str = "", video_id: str = "",
+                manifest_entry: Optional[Dict[str, Any]] = None) -> None:
+        rel = self._rel(path)
+        kind = _kind(path)
+        probed = int(kind == "video" and self.probe and HAS_FFPROBE)
+        info = self._probe(path) if probed else {}
+        man = manifest_entry or {}
+        duration = info.get("duration") or float(man.get("duration") or 0)
+        self.conn.execute(
+            """INSERT OR REPLACE INTO media
+               (path, grp, kind, video_id, url, size, mtime_ns, duration, width, height, fps,
+                vcodec, acodec, checksum, probed, updated)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                rel, self._group(rel), kind,
+                video_id or man.get("id") or "", url or man.get("url") or "",
+                st.st_size, st.st_mtime_ns, duration,
+                info.get("width", 0), info.get("height", 0), info.get("fps", 0.0),
+                info.get("vcodec", ""), info.get("acodec", ""),
+                quick_checksum(path, st.st_size), probed, time.time(),
+            ),
+        )
+
+    # ------------------------------------------------------------------
+    def record_file(self, path: str, url: str = "", video_id: str = "") -> None:
+        """Ghi/cập nhật 1 file vừa tải (down_by_yt)."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        if not _kind(path):
+            return
+        self._upsert(path, st, url=url, video_id=video_id)
+        self.conn.commit()
+
+    def remove_file(self, path: str) -> None:
+        self.conn.execute("DELETE FROM media WHERE path = ?", (self._rel(path),))
+        self.conn.commit()
+
+    def rescan(self, deep: bool = False) -> Dict[str, int]:
+        """
+        Đồng bộ catalog với filesystem. Trả về {"dirs", "listed", "added",
+        "updated", "removed"} (listed = số thư mục phải liệt kê lại).
+        Thư mục không đổi mtime vẫn stat từng file đã biết (sửa tại chỗ);
+        deep=True liệt kê lại cả thư mục không đổi.
+        """
+        stats = {"dirs": 0, "listed": 0, "added": 0, "updated": 0, "removed": 0}
+        if not os.path.isdir(self.root):
+            return stats
+
+        known_dirs = {r["path"]: r["mtime_ns"] for r in self.conn.execute("SELECT path, mtime_ns FROM dirs")}
+        children: Dict[str, List[str]] = {}
+        for r in self.conn.execute("SELECT path, parent FROM dirs"):
+            children.setdefault(r["parent"], []).append(r["path"])
+
+        seen_dirs = set()
+        stack = [""]
+        while stack:
+            rel_dir = stack.pop()
+            abs_dir = self._abs(rel_dir) if rel_dir else self.root
+            try:
+                dir_mtime = os.stat(abs_dir).st_mtime_ns
+            except OSError:
+                continue
+            seen_dirs.add(rel_dir)
+            stats["dirs"] += 1
+
+            if known_dirs.get(rel_dir) == dir_mtime and not deep:
+                # Không đổi: không liệt kê, chỉ stat file đã biết rồi đi tiếp
+                # vào thư mục con đã biết
+                self._restat_dir(rel_dir, abs_dir, stats)
+                stack.extend(children.get(rel_dir, []))
+                continue
+
+            stats["listed"] += 1
+            self._sync_dir(rel_dir, abs_dir, stats, stack)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO dirs(path, parent, mtime_ns) VALUES (?, ?, ?)",
+                (rel_dir, rel_dir.rsplit("/", 1)[0] if "/" in rel_dir else ("" if rel_dir else None), dir_mtime),
+            )
+
+        # Thư mục đã biến mất -> xoá cả file bên trong
+        for rel_dir in set(known_dirs) - seen_dirs:
+            self.conn.execute("DELETE FROM dirs WHERE path = ?", (rel_dir,))
+            prefix = rel_dir + "/"
+            cur = self.conn.execute(
+                "DELETE FROM media WHERE substr(path, 1, ?) = ? AND instr(substr(path, ?), '/') = 0",
+                (len(prefix), prefix, len(prefix) + 1),
+            )
+            stats["removed"] += cur.rowcount
+        self.conn.commit()
+        return stats
+
+    def _dir_rows(self, rel_dir: str) -> Dict[str, Tuple[int, int, int]]:
+        """{rel path: (size, mtime_ns, probed)} của file nằm ngay trong rel_dir."""
+        if rel_dir:
+            prefix = rel_dir + "/"
+            cur = self.conn.execute(
+                "SELECT path, size, mtime_ns, probed FROM media "
+                "WHERE substr(path, 1, ?) = ? AND instr(substr(path, ?), '/') = 0",
+                (len(prefix), prefix, len(prefix) + 1),
+            )
+        else:
+            cur = self.conn.execute("SELECT path, size, mtime_ns, probed FROM media WHERE instr(path, '/') = 0")
+        return {r["path"]: (r["size"], r["mtime_ns"], r["probed"]) for r in cur}
+
+    def _refresh(self, rel: str, path: str, st: os.stat_result, old: Optional[Tuple[int, int, int]],
+                 abs_dir: str, manifest: Dict[str, Any], stats: Dict[str, int]) -> None:
+        """Ghi lại file nếu mới / đổi size-mtime / chưa probe. manifest: cache theo thư mục."""
+        if old and old[:2] == (st.st_size, st.st_mtime_ns) and not self._needs_probe(rel, old[2]):
+            return
+        if "items" not in manifest:
+            has_manifest = os.path.isfile(os.path.join(abs_dir, MANIFEST_FILENAME))
+            manifest["items"] = (read_manifest(abs_dir).get("items") or {}) if has_manifest else {}
+        self._upsert(path, st, manifest_entry=manifest["items"].get(os.path.basename(path)))
+        stats["updated" if old else "added"] += 1
+
+    def _restat_dir(self, rel_dir: str, abs_dir: str, stats: Dict[str, int]) -> None:
+        manifest: Dict[str, Any] = {}
+        for rel, old in self._dir_rows(rel_dir).items():
+            path = self._abs(rel)
+            try:
+                st = os.stat(path)
+            except OSError:
+                self.conn.execute("DELETE FROM media WHERE path = ?", (rel,))
+                stats["removed"] += 1
+                continue
+            self._refresh(rel, path, st, old, abs_dir, manifest, stats)
+
+    def _sync_dir(self, rel_dir: str, abs_dir: str, stats: Dict[str, int], stack: List[str]) -> None:
+        prefix = rel_dir + "/" if rel_dir else ""
+        existing = self._dir_rows(rel_dir)
+
+        manifest: Dict[str, Any] = {}
+        present = set()
+        try:
+            entries = list(os.scandir(abs_dir))
+        except OSError as e:
+            print(f"[catalog][WARN] Không đọc được {abs_dir}: {e}")
+            return
+        for de in entries:
+            if de.is_dir(follow_symlinks=False):
+                if not _skip_dir(de.name):
+                    stack.append(prefix + de.name)
+                continue
+            if not _kind(de.name) or ".part" in de.name:
+                continue
+            rel = prefix + de.name
+            present.add(rel)
+            try:
+                st = de.stat()
+            except OSError:
+                continue
+            self._refresh(rel, de.path, st, existing.get(rel), abs_dir, manifest, stats)
+
+        for rel in set(existing) - present:
+            self.conn.execute("DELETE FROM media WHERE path = ?", (rel,))
+            stats["removed"] += 1
+
+    # ------------------------------------------------------------------
+    def files(self, kinds: Iterable[str] = ("video",), group: Optional[str] = None) -> List[str]:
+        """Path tuyệt đối, sắp theo path."""
+        kinds = list(kinds)
+        sql = f"SELECT path FROM media WHERE kind IN ({','.join('?' * len(kinds))})"
+        args: List[Any] = list(kinds)
+        if group is not None:
+            sql += " AND grp = ?"
+            args.append(group)
+        sql += " ORDER BY path"
+        return [self._abs(r["path"]) for r in self.conn.execute(sql, args)]
+
+    def videos(self, group: Optional[str] = None) -> List[str]:
+        return self.files(("video",), group)
+
+    def entries(self, kinds: Iterable[str] = ("video",)) -> List[Dict[str, Any]]:
+        """Dòng media (dict, thêm "abs_path"), sắp theo path."""
+        kinds = list(kinds)
+        cur = self.conn.execute(
+            f"SELECT * FROM media WHERE kind IN ({','.join('?' * len(kinds))}) ORDER BY path", kinds
+        )
+        return [dict(r, abs_path=self._abs(r["path"])) for r in cur]
+
+    def dirs(self) -> List[str]:
+        """Thư mục con (tương đối, dấu /) đã quét, không gồm gốc; thứ tự duyệt cây theo tên."""
+        rels = [r["path"] for r in self.conn.execute("SELECT path FROM dirs WHERE path != ''")]
+        return sorted(rels, key=lambda p: p.split("/"))
+
+    def groups(self) -> List[str]:
+        return [r["grp"] for r in self.conn.execute("SELECT DISTINCT grp FROM media WHERE grp != '' ORDER BY grp")]
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT * FROM media WHERE path = ?", (self._rel(path),)).fetchone()
+        return dict(row) if row else None
+
+    def find_by_id(self, video_id: str) -> List[str]:
+        return [self._abs(r["path"]) for r in
+                self.conn.execute("SELECT path FROM media WHERE video_id = ? ORDER BY path", (video_id,))]
+
+
+def catalog_videos(resource_dir: str, group: Optional[str] = None, rescan: bool = True) -> List[str]:
+    """Video trong resource qua catalog (rescan incremental trước nếu rescan=True)."""
+    with ResourceCatalog(resource_dir) as cat:
+        if rescan:
+            cat.rescan()
+        return cat.videos(group)
+
+
+# Test function
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rescan catalog SQLite của thư mục resource")
+    parser.add_argument("resource")
+    parser.add_argument("--deep", action="store_true", help="Stat lại cả file trong thư mục không đổi mtime")
+    args = parser.parse_args()
+
+    t0 = time.time()
+    with ResourceCatalog(args.resource) as cat:
+        res = cat.rescan(deep=args.deep)
+        print(f"[catalog] {res} trong {time.time() - t0:.2f}s; {len(cat.videos())} video")
@@ -12,6 +12,7 @@ from typing import Optional, Dict, List
 
 # Try relative import first (when running as a module), then fallback to absolute
 try:
+    from .bandwidth import IMAGE, get_scheduler  # type: ignore
     from .folder_handle import create_folder  # type: ignore
 except Exception:
     THIS_FILE = os.path.abspath(__file__)
@@ -20,6 +21,7 @@ except Exception:
     ROOT_DIR = os.path.dirname(CORE_DIR)
     if ROOT_DIR not in sys.path:
         sys.path.insert(0, ROOT_DIR)
+    from core.downloadTool.bandwidth import IMAGE, get_scheduler  # type: ignore
     try:
         from core.downloadTool.folder_handle import create_folder  # type: ignore
     except Exception:
@@ -135,11 +137,13 @@ def download_image(
             target_path = f"{base_no_ext}_{counter}{ext_final}"
             counter += 1
 
-        with open(target_path, 'wb') as fout:
+        # Băng thông chung với down_by_yt / genmini (bandwidth.py)
+        with open(target_path, 'wb') as fout, get_scheduler().transfer(IMAGE, image_url) as transfer:
             while True:
                 chunk = resp.read(64 * 1024)
                 if not chunk:
                     break
+                transfer.throttle(len(chunk))
                 fout.write(chunk)
 
     return target_path
@@ -7,7 +7,7 @@ Dùng yt-dlp để tải VIDEO/AUDIO.
 - mp3: nếu có ffmpeg thì convert mp3, nếu không thì tải audio gốc
 
 ✅ MODE (theo yêu cầu):
-- KHÔNG check subtitles
+- KHÔNG check/lọc theo subtitles (phụ đề chỉ tải kèm nếu có, để search transcript)
 - KHÔNG filter link
 - CHỈ download đúng thứ tự link trong file
 """
@@ -15,13 +15,13 @@ Dùng yt-dlp để tải VIDEO/AUDIO.
 import os
 import re
 import shutil
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 # ---------------------------------------------------------------------------
-# CONFIG: đặt tên file theo index
+# CONFIG: file đặt tên theo video id (<id>.mp4), vị trí link ghi trong
+# <group>/_index_map.json (index_map.py)
 # ---------------------------------------------------------------------------
 INDEX_START = 0     # 0-based để khớp video_index trong CSV
-INDEX_PAD = 4       # 0000, 0001...
 
 # Cookie (nếu cần)
 COOKIES_FILE = os.environ.get("YTDLP_COOKIES_FILE", "").strip()
@@ -34,6 +34,13 @@ YTDLP_RETRIES = int(os.environ.get("YTDLP_RETRIES", "10"))
 YTDLP_SLEEP_INTERVAL = float(os.environ.get("YTDLP_SLEEP_INTERVAL", "2"))
 YTDLP_MAX_SLEEP_INTERVAL = float(os.environ.get("YTDLP_MAX_SLEEP_INTERVAL", "6"))
 
+# Lượt đầu chỉ tải N video đầu tiên tải được của mỗi keyword (class băng thông
+# video_priority), rồi mới tải phần còn lại; 0 = tải tuần tự từng group như cũ
+DOWNLOAD_PRIORITY_FIRST = int(os.environ.get("DOWNLOAD_PRIORITY_FIRST", "1"))
+
+# Tải kèm phụ đề VTT (nếu video có) -> transcript gọn cạnh file video
+YTDLP_WRITE_SUBS = (os.environ.get("YTDLP_WRITE_SUBS", "1") or "1").strip().lower() in ("1", "true", "yes", "on")
+
 # ---------------------------------------------------------------------------
 # Detect ffmpeg
 # ---------------------------------------------------------------------------
@@ -60,11 +67,51 @@ def ensure_folder(parent: str, name: str) -> str:
     return path
 
 
+# ---------------------------------------------------------------------------
+# Manifest (file -> url/id/title...) cho mỗi group
+# ---------------------------------------------------------------------------
+try:
+    from .bandwidth import VIDEO, VIDEO_PRIORITY  # type: ignore
+    from .catalog import ResourceCatalog  # type: ignore
+    from .format_policy import FormatPolicy, build_policy, resolve_target  # type: ignore
+    from .index_map import media_by_id, migrate_legacy_names, read_index_map, video_id_from_url, write_index_map  # type: ignore
+    from .manifest import record_download  # type: ignore
+    from .skip_list import read_skip_list  # type: ignore
+    from .supervisor import DownloadSupervisor  # type: ignore
+    from .subtitles import SUB_LANGS, convert_vtt_sidecars  # type: ignore
+except Exception:
+    import sys
+    _ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    if _ROOT not in sys.path:
+        sys.path.insert(0, _ROOT)
+    from core.downloadTool.bandwidth import VIDEO, VIDEO_PRIORITY  # type: ignore
+    from core.downloadTool.catalog import ResourceCatalog  # type: ignore
+    from core.downloadTool.format_policy import FormatPolicy, build_policy, resolve_target  # type: ignore
+    from core.downloadTool.index_map import media_by_id, migrate_legacy_names, read_index_map, video_id_from_url, write_index_map  # type: ignore
+    from core.downloadTool.manifest import record_download  # type: ignore
+    from core.downloadTool.skip_list import read_skip_list  # type: ignore
+    from core.downloadTool.supervisor import DownloadSupervisor  # type: ignore
+    from core.downloadTool.subtitles import SUB_LANGS, convert_vtt_sidecars  # type: ignore
+
+# Transcode mezzanine sau khi tải (tuỳ chọn, env MEZZANINE_PRESET)
+try:
+    from .mezzanine import MEZZANINE_PRESET, transcode_folder  # type: ignore
+except Exception:
+    from core.downloadTool.mezzanine import MEZZANINE_PRESET, transcode_folder  # type: ignore
+
+# Kiểm tra file mới tải (ffprobe) + quarantine/tải lại (env VERIFY_DOWNLOADS)
+try:
+    from .verify import REPORT_FILENAME, VERIFY_DOWNLOADS, verify_and_requeue  # type: ignore
+except Exception:
+    from core.downloadTool.verify import REPORT_FILENAME, VERIFY_DOWNLOADS, verify_and_requeue  # type: ignore
+
+
 # ---------------------------------------------------------------------------
 # Import yt-dlp
 # ---------------------------------------------------------------------------
 try:
-    from yt_dlp import YoutubeDL
+    # Chỉ kiểm tra có yt-dlp; tải thật ở supervisor.py (process con)
+    import yt_dlp  # noqa: F401
 except ImportError:
     raise ImportError(
         "\nThiếu thư viện yt-dlp!\n"
@@ -113,13 +160,40 @@ def parse_links_from_txt(file_path: str) -> Dict[str, List[str]]:
     return groups
 
 
+def _downloaded_filename(info: dict, group_dir: str, video_id: str) -> Optional[str]:
+    """Tên file (basename) yt-dlp vừa ghi cho `video_id`."""
+    for rd in info.get("requested_downloads") or []:
+        fp = rd.get("filepath") or rd.get("_filename")
+        if fp and os.path.isfile(fp):
+            return os.path.basename(fp)
+
+    prefix = f"{video_id}."
+    for name in sorted(os.listdir(group_dir)):
+        if name.startswith(prefix) and not name.endswith((".part", ".ytdl", ".vtt", ".json")):
+            return name
+    return None
+
+
 # ---------------------------------------------------------------------------
 # Download 1 group link vào 1 folder con
 # ---------------------------------------------------------------------------
-def _download_group(group_name: str, links: List[str], parent_folder: str, media_type: str):
+def _download_group(group_name: str, links: List[str], parent_folder: str, media_type: str,
+                    catalog: Optional[ResourceCatalog] = None,
+                    supervisor: Optional[DownloadSupervisor] = None,
+                    max_new: Optional[int] = None, bw_class: str = VIDEO,
+                    policy: Optional[FormatPolicy] = None,
+                    failed: Optional[Set[str]] = None) -> List[str]:
+    """
+    Tải các link chưa có file; trả về path các file mới tải.
+    policy: giới hạn độ phân giải/fps theo sequence (format_policy.py).
+    max_new: dừng tải khi group đã có max_new video (tính cả file có sẵn);
+    index map vẫn ghi đủ mọi link.
+    failed: URL đã lỗi trong lượt chạy này (đã hết retry ở supervisor) -> bỏ
+    qua; URL lỗi mới được thêm vào.
+    """
     if not links:
         print(f"[down_by_yt][INFO] Group '{group_name}' không có link → bỏ qua.")
-        return
+        return []
 
     group_dir = ensure_folder(parent_folder, group_name)
 
@@ -128,7 +202,7 @@ def _download_group(group_name: str, links: List[str], parent_folder: str, media
 
     # Base ydl options
     ydl_opts = {
-        "outtmpl": {"default": os.path.join(group_dir, "temp_%(id)s.%(ext)s")},
+        "outtmpl": {"default": os.path.join(group_dir, "%(id)s.%(ext)s")},
         "noplaylist": True,
         "ignoreerrors": True,
         "restrictfilenames": True,
@@ -171,56 +245,150 @@ def _download_group(group_name: str, links: List[str], parent_folder: str, media
 
     # ======================== VIDEO (mp4 H.264) ========================
     else:
+        policy = policy or build_policy("best")
         if HAS_FFMPEG:
             ydl_opts.update({
-                "format": (
-                    "bv*[ext=mp4][vcodec^=avc1]+ba[ext=m4a]/"
-                    "b[ext=mp4][vcodec^=avc1]"
-                ),
+                "format": policy.video_format(merged=True),
                 "merge_output_format": "mp4",
                 "final_ext": "mp4",
             })
             print("[down_by_yt] Dùng profile VIDEO MP4(H.264) + merge bằng ffmpeg cho Premiere.")
         else:
             ydl_opts.update({
-                "format": "b[ext=mp4][vcodec^=avc1]",
+                "format": policy.video_format(merged=False),
                 "final_ext": "mp4",
             })
             print(
                 "[down_by_yt][WARN] ffmpeg KHÔNG có, chỉ tải được progressive MP4 H.264.\n"
                 "  Nếu video không có định dạng này thì sẽ bị SKIP."
             )
-
-    # ✅ KHÔNG FILTER GÌ HẾT: tải đúng thứ tự links
-    with YoutubeDL(ydl_opts) as ydl:
-        for idx, url in enumerate(links, start=INDEX_START):
-            tmpl = os.path.join(group_dir, f"{idx:0{INDEX_PAD}d}.%(ext)s")
-
-            # outtmpl là dict -> update "default"
-            if isinstance(ydl.params.get("outtmpl"), dict):
-                ydl.params["outtmpl"]["default"] = tmpl
-            else:
-                ydl.params["outtmpl"] = {"default": tmpl}
-
-            print(f"[down_by_yt]   ({idx - INDEX_START + 1}/{len(links)}) Download -> index={idx}: {url}")
+        if policy.format_sort():
+            # Giới hạn cạnh ngắn / fps theo sequence đích
+            ydl_opts["format_sort"] = policy.format_sort()
+
+    if media_type != "mp3" and YTDLP_WRITE_SUBS:
+        ydl_opts.update({
+            "writesubtitles": True,
+            "writeautomaticsub": True,
+            "subtitleslangs": SUB_LANGS,
+            "subtitlesformat": "vtt",
+        })
+
+    # File kiểu cũ 0000.mp4 -> <id>.mp4 (theo manifest) để không phải tải lại
+    migrate_legacy_names(group_dir)
+    existing = media_by_id(group_dir)
+    skip = read_skip_list()
+    index_items = []
+    new_files: List[str] = []
+    have = 0
+    # Mỗi video tải trong process con có watchdog + retry theo loại lỗi (supervisor.py)
+    supervisor = supervisor or DownloadSupervisor()
+
+    # ✅ KHÔNG FILTER GÌ HẾT: giữ đúng thứ tự links trong index map
+    for idx, url in enumerate(links, start=INDEX_START):
+        n = idx - INDEX_START + 1
+        video_id = video_id_from_url(url)
+        item = {"index": idx, "id": video_id, "url": url, "file": ""}
+        index_items.append(item)
+
+        if video_id and video_id in existing:
+            item["file"] = existing[video_id]
+            have += 1
+            print(f"[down_by_yt]   ({n}/{len(links)}) Đã có {existing[video_id]} -> index={idx}, bỏ qua tải")
+            continue
+        if video_id and video_id in skip:
+            print(f"[down_by_yt]   ({n}/{len(links)}) Skip list ({skip[video_id].get('error', '')[:80]}) -> index={idx}")
+            continue
+        if failed is not None and url in failed:
+            print(f"[down_by_yt]   ({n}/{len(links)}) Đã lỗi ở lượt trước -> index={idx}, bỏ qua")
+            continue
+        if max_new is not None and have >= max_new:
+            continue
+
+        print(f"[down_by_yt]   ({n}/{len(links)}) Download -> index={idx}: {url}")
+        info, err_class, err = supervisor.download(url, ydl_opts, bw_class)
+        if not info:
+            print(f"[down_by_yt][ERROR] Lỗi tải ({err_class or 'không có info'}) {url}")
+            if failed is not None:
+                failed.add(url)
+            continue
+
+        video_id = info.get("id") or video_id
+        item["id"] = video_id
+        filename = _downloaded_filename(info, group_dir, video_id)
+        if filename:
+            item["file"] = filename
+            existing[video_id] = filename
+            new_files.append(os.path.join(group_dir, filename))
+            have += 1
             try:
-                ydl.download([url])
+                extra = {"format_policy": policy.describe()} if policy and media_type != "mp3" else None
+                record_download(group_dir, filename, url, info, extra)
             except Exception as e:
-                print(f"[down_by_yt][ERROR] Lỗi tải {url}: {e}")
+                print(f"[down_by_yt][WARN] Không ghi được manifest cho {filename}: {e}")
+            if catalog is not None:
+                try:
+                    catalog.record_file(os.path.join(group_dir, filename), url=url, video_id=video_id)
+                except Exception as e:
+                    print(f"[down_by_yt][WARN] Không ghi được catalog cho {filename}: {e}")
+            if YTDLP_WRITE_SUBS and media_type != "mp3":
+                transcript = convert_vtt_sidecars(os.path.join(group_dir, filename))
+                if transcript:
+                    print(f"[down_by_yt]   Transcript -> {os.path.basename(transcript)}")
+
+    try:
+        write_index_map(group_dir, index_items)
+    except Exception as e:
+        print(f"[down_by_yt][WARN] Không ghi được index map: {e}")
+    return new_files
+
+
+def redownload_groups(parent_folder: str, group_dirs: List[str], _type: str = "mp4",
+                      catalog: Optional[ResourceCatalog] = None,
+                      supervisor: Optional[DownloadSupervisor] = None,
+                      policy: Optional[FormatPolicy] = None) -> List[str]:
+    """
+    Tải lại file còn thiếu (vd. vừa bị quarantine) của các group, theo link
+    trong _index_map.json (giữ nguyên thứ tự/index). Timeline đang chờ các
+    file này nên dùng class băng thông video_priority.
+    """
+    new_files: List[str] = []
+    for group_dir in group_dirs:
+        items = sorted(read_index_map(group_dir).get("items") or [], key=lambda it: it.get("index", 0))
+        links = [it.get("url") or "" for it in items]
+        if not links or not all(links):
+            print(f"[down_by_yt][WARN] Index map thiếu link: {group_dir} → không tải lại được")
+            continue
+        new_files.extend(_download_group(os.path.basename(group_dir), links, parent_folder, _type,
+                                         catalog, supervisor, bw_class=VIDEO_PRIORITY, policy=policy))
+    return new_files
 
 
 # ---------------------------------------------------------------------------
 # Public
 # ---------------------------------------------------------------------------
-def download_main(parent_folder: str, txt_name: str, _type: str = "mp4"):
+def download_main(parent_folder: str, txt_name: str, _type: str = "mp4",
+                  prproj_path: str = "", sequence_name: str = "", format_profile: str = "",
+                  sequence_size: str = "", sequence_fps: float = 0.0):
+    """
+    prproj_path / sequence_name hoặc sequence_size ("1920x1080") + sequence_fps:
+    sequence đích cho format policy (format_profile, mặc định env DOWNLOAD_FORMAT_PROFILE).
+    """
     print("[down_by_yt] === START download_main ===")
     print(f"[down_by_yt] parent_folder = {parent_folder}")
     print(f"[down_by_yt] txt_name      = {txt_name}")
     print(f"[down_by_yt] type          = {_type}")
     print(f"[down_by_yt] ffmpeg        = {FFMPEG_PATH if HAS_FFMPEG else 'NOT FOUND'}")
-    print(f"[down_by_yt] index naming  = start={INDEX_START}, pad={INDEX_PAD}")
+    print(f"[down_by_yt] naming        = <video id>.ext + _index_map.json (start={INDEX_START})")
     print(f"[down_by_yt] MODE          = download-only (no subtitle filter/check)")
+    print(f"[down_by_yt] subtitles     = {','.join(SUB_LANGS) if YTDLP_WRITE_SUBS else 'OFF'}")
     print(f"[down_by_yt] player_client = {YTDLP_PLAYER_CLIENT}")
+    print(f"[down_by_yt] mezzanine     = {MEZZANINE_PRESET or 'OFF'}")
+    policy = build_policy(format_profile, resolve_target(prproj_path, sequence_name, sequence_size, sequence_fps))
+    desc = policy.describe()
+    print(f"[down_by_yt] format policy = {desc['profile']} "
+          f"(sequence {desc['target'] or '?'} {desc['target_source']}, "
+          f"cạnh ngắn <= {desc['max_short_side'] or '-'}, fps <= {desc['max_fps'] or '-'})")
 
     try:
         os.makedirs(parent_folder, exist_ok=True)
@@ -244,9 +412,60 @@ def download_main(parent_folder: str, txt_name: str, _type: str = "mp4"):
         print(f"[down_by_yt][WARN] Loại '{_type}' không hợp lệ → dùng 'mp4'.")
         media_type = "mp4"
 
+    try:
+        catalog: Optional[ResourceCatalog] = ResourceCatalog(parent_folder)
+    except Exception as e:
+        print(f"[down_by_yt][WARN] Không mở được catalog: {e}")
+        catalog = None
+
+    supervisor = DownloadSupervisor()
+    new_files: List[str] = []
+    # Link đã lỗi ở lượt ưu tiên không tải lại (tránh tốn retry/backoff 2 lần)
+    failed: Set[str] = set()
+    if DOWNLOAD_PRIORITY_FIRST > 0 and total_groups > 1:
+        print(f"[down_by_yt] --- Ưu tiên {DOWNLOAD_PRIORITY_FIRST} video đầu mỗi keyword ---")
+        for group, links in groups.items():
+            new_files.extend(_download_group(group, links, parent_folder, media_type, catalog, supervisor,
+                                             max_new=DOWNLOAD_PRIORITY_FIRST, bw_class=VIDEO_PRIORITY, policy=policy,
+                                             failed=failed))
     for idx, (group, links) in enumerate(groups.items(), start=1):
         print(f"[down_by_yt] --- ({idx}/{total_groups}) Group '{group}' ---")
-        _download_group(group, links, parent_folder, media_type)
+        new_files.extend(_download_group(group, links, parent_folder, media_type, catalog, supervisor,
+                                         policy=policy, failed=failed))
+    print(f"[down_by_yt] Supervisor: {supervisor.stats}")
+
+    if media_type == "mp4" and VERIFY_DOWNLOADS and new_files:
+        print(f"[down_by_yt] --- Kiểm tra {len(new_files)} file mới ---")
+        try:
+            res = verify_and_requeue(
+                new_files,
+                requeue=lambda dirs: redownload_groups(parent_folder, dirs, media_type, catalog, supervisor, policy),
+                report_path=os.path.join(parent_folder, REPORT_FILENAME),
+            )
+            print(f"[down_by_yt] Verify: {res['ok']}/{res['checked']} OK, "
+                  f"vẫn lỗi {len(res['still_bad'])} → {REPORT_FILENAME}")
+        except Exception as e:
+            print(f"[down_by_yt][ERROR] Verify lỗi: {e}")
+
+    if media_type == "mp4" and MEZZANINE_PRESET not in ("", "0", "off", "none"):
+        # Khung hình theo sequence đích nếu biết, không thì MEZZANINE_SIZE
+        target = policy.target
+        mezz_size = f"{target.width}x{target.height}" if target else ""
+        print(f"[down_by_yt] --- Mezzanine transcode ({MEZZANINE_PRESET}, {mezz_size or 'MEZZANINE_SIZE'}) ---")
+        try:
+            res = transcode_folder(parent_folder, size=mezz_size, catalog=catalog)
+            print(f"[down_by_yt] Mezzanine: {res['ok']}/{res['total']} OK, {len(res['failed'])} lỗi")
+        except Exception as e:
+            print(f"[down_by_yt][ERROR] Mezzanine transcode lỗi: {e}")
+
+    if catalog is not None:
+        # Bắt các file đổi tên/chuyển thư mục (mezzanine, migrate tên cũ)
+        try:
+            res = catalog.rescan()
+            print(f"[down_by_yt] Catalog: +{res['added']} ~{res['updated']} -{res['removed']}")
+        except Exception as e:
+            print(f"[down_by_yt][WARN] Rescan catalog lỗi: {e}")
+        catalog.close()
 
     print("[down_by_yt] === END download_main ===")
 
@@ -0,0 +1,180 @@
+"""
+format_policy.py
+-----------------------------------
+Chọn format yt-dlp theo sequence đích thay vì luôn lấy avc1 tốt nhất
+(tránh kéo nguồn 4K về cho sequence 1080p/720p).
+
+Sequence đích (frame size + fps), theo thứ tự ưu tiên:
+    1. tham số truyền vào (job config)
+    2. .prproj (prproj_reader qua cache project_cache, sequence theo tên
+       hoặc sequence đầu tiên)
+    3. env DOWNLOAD_SEQUENCE_SIZE=1920x1080, DOWNLOAD_SEQUENCE_FPS=25
+
+Profile (env DOWNLOAD_FORMAT_PROFILE, mặc định "match"):
+    best      - như cũ, không giới hạn
+    match     - cạnh ngắn <= sequence, fps <= sequence
+    match_res - chỉ giới hạn độ phân giải
+    headroom  - cho phép 1 bậc độ phân giải trên sequence (reframe/zoom), fps <= sequence
+
+Giới hạn đi qua `format_sort` của yt-dlp (res:<cạnh ngắn>, fps:<fps>), không
+lọc trong format string: `res` là cạnh NGẮN của chính nguồn nên nguồn ngang
+hay dọc đều bị giới hạn đúng với sequence ngang hay dọc, và nguồn không có
+bản nhỏ hơn vẫn tải được (lấy bản nhỏ nhất còn lớn hơn mức giới hạn).
+Policy ghi vào manifest ("format_policy").
+"""
+
+import math
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+DOWNLOAD_FORMAT_PROFILE = (os.environ.get("DOWNLOAD_FORMAT_PROFILE", "match") or "match").strip().lower()
+DOWNLOAD_SEQUENCE_SIZE = (os.environ.get("DOWNLOAD_SEQUENCE_SIZE", "") or "").strip().lower()
+DOWNLOAD_SEQUENCE_FPS = float(os.environ.get("DOWNLOAD_SEQUENCE_FPS", "0") or 0)
+
+PROFILES = ("best", "match", "match_res", "headroom")
+# Các bậc độ phân giải (cạnh ngắn) YouTube thường có
+STANDARD_HEIGHTS = (144, 240, 360, 480, 720, 1080, 1440, 2160, 4320)
+
+# Format gốc của down_by_yt (MP4 H.264 + m4a)
+_MERGED = "bv*[ext=mp4][vcodec^=avc1]+ba[ext=m4a]"
+_PROGRESSIVE = "b[ext=mp4][vcodec^=avc1]"
+
+
+@dataclass
+class SequenceTarget:
+    width: int
+    height: int
+    fps: float
+    source: str = ""
+
+    @property
+    def short_side(self) -> int:
+        return min(self.width, self.height)
+
+    def label(self) -> str:
+        return f"{self.width}x{self.height}@{self.fps:g}"
+
+
+def target_from_prproj(prproj_path: str, sequence_name: str = "") -> Optional[SequenceTarget]:
+    """Frame size + fps của sequence `sequence_name` (hoặc sequence đầu có frame size) trong .prproj."""
+    if not prproj_path or not os.path.isfile(prproj_path):
+        return None
+    try:
+        try:
+            from ..project_cache import get_project_introspection
+        except (ImportError, ValueError):
+            from core.project_cache import get_project_introspection
+        sequences = get_project_introspection(prproj_path).sequences()
+    except Exception as e:
+        print(f"[format_policy][WARN] Không đọc được sequence từ {prproj_path}: {e}")
+        return None
+    usable = [s for s in sequences if s.get("width") and s.get("height")]
+    if sequence_name:
+        usable = [s for s in usable if s.get("name") == sequence_name] or usable
+    if not usable:
+        return None
+    s = usable[0]
+    return SequenceTarget(int(s["width"]), int(s["height"]), float(s.get("fps") or 0),
+                          source=f"prproj:{s.get('name', '')}")
+
+
+def _parse_size(size: str) -> Optional[Dict[str, int]]:
+    try:
+        w, h = size.lower().split("x", 1)
+        return {"width": int(w), "height": int(h)}
+    except (ValueError, AttributeError):
+        return None
+
+
+def resolve_target(
+    prproj_path: str = "",
+    sequence_name: str = "",
+    size: str = "",
+    fps: float = 0.0,
+) -> Optional[SequenceTarget]:
+    """Tham số (job config) > .prproj > env; None nếu không biết sequence."""
+    explicit = _parse_size(size)
+    if explicit:
+        return SequenceTarget(explicit["width"], explicit["height"], float(fps or 0), source="config")
+    target = target_from_prproj(prproj_path, sequence_name)
+    if target:
+        if fps:
+            target.fps = float(fps)
+        return target
+    env = _parse_size(DOWNLOAD_SEQUENCE_SIZE)
+    if env:
+        return SequenceTarget(env["width"], env["height"], float(fps or DOWNLOAD_SEQUENCE_FPS), source="env")
+    return None
+
+
+@dataclass
+class FormatPolicy:
+    profile: str
+    target: Optional[SequenceTarget]
+    max_short_side: Optional[int] = None
+    max_fps: Optional[int] = None
+
+    @staticmethod
+    def video_format(merged: bool = True) -> str:
+        """Format string yt-dlp (MP4 H.264); chọn bản nào trong đó do format_sort()."""
+        return f"{_MERGED}/{_PROGRESSIVE}" if merged else _PROGRESSIVE
+
+    def format_sort(self) -> List[str]:
+        """
+        `format_sort` cho YoutubeDL ([] = thứ tự mặc định). res:N = bản có cạnh
+        ngắn lớn nhất <= N, không có thì bản nhỏ nhất > N; fps tương tự.
+        """
+        fields = []
+        if self.max_short_side:
+            fields.append(f"res:{self.max_short_side}")
+        if self.max_fps:
+            fields.append(f"fps:{self.max_fps}")
+        return fields
+
+    def describe(self) -> Dict[str, Any]:
+        """Ghi vào manifest."""
+        return {
+            "profile": self.profile,
+            "target": self.target.label() if self.target else "",
+            "target_source": self.target.source if self.target else "",
+            "max_short_side": self.max_short_side or 0,
+            "max_fps": self.max_fps or 0,
+        }
+
+
+def build_policy(profile: str = "", target: Optional[SequenceTarget] = None) -> FormatPolicy:
+    profile = (profile or DOWNLOAD_FORMAT_PROFILE).lower()
+    if profile not in PROFILES:
+        print(f"[format_policy][WARN] Profile '{profile}' không hợp lệ → dùng 'best' (có: {', '.join(PROFILES)})")
+        profile = "best"
+    policy = FormatPolicy(profile=profile, target=target)
+    if profile == "best" or target is None:
+        return policy
+
+    short = target.short_side
+    if profile == "headroom":
+        higher = [h for h in STANDARD_HEIGHTS if h > short]
+        short = higher[0] if higher else short
+    policy.max_short_side = short
+    if profile in ("match", "headroom") and target.fps > 0:
+        # 29.97 -> 30, 23.976 -> 24
+        policy.max_fps = int(math.ceil(target.fps - 0.01))
+    return policy
+
+
+# Test function
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Xem format yt-dlp theo sequence đích")
+    parser.add_argument("--prproj", default="")
+    parser.add_argument("--sequence", default="")
+    parser.add_argument("--size", default="")
+    parser.add_argument("--fps", type=float, default=0.0)
+    parser.add_argument("--profile", default="", choices=[""] + list(PROFILES))
+    args = parser.parse_args()
+
+    pol = build_policy(args.profile, resolve_target(args.prproj, args.sequence, args.size, args.fps))
+    print(pol.describe())
+    print(pol.video_format(), pol.format_sort())
@@ -17,6 +17,9 @@ ROOT_DIR = os.path.dirname(CORE_DIR)
 if ROOT_DIR not in sys.path:
     sys.path.insert(0, ROOT_DIR)
 
+# Video lỗi vĩnh viễn (private/đã xoá...) do down_by_yt ghi lại
+from core.downloadTool.skip_list import read_skip_list
+
 # Optional: nếu bạn có module sinh link ảnh riêng
 try:
     from core.downloadTool.downImage import gen_image_links_from_yt_txt
@@ -255,6 +258,8 @@ def _write_video_links_txt(
     lines: List[str] = []
 
     global_seen: set[str] = set()
+    skip = read_skip_list()
+    skipped = 0
 
     for kw in keywords:
         # search nhiều hơn để lấy đủ VPK
@@ -269,6 +274,12 @@ def _write_video_links_txt(
             if not url:
                 continue
 
+            # bỏ video down_by_yt đã biết là không tải được
+            vid = _extract_video_id(url)
+            if vid and vid in skip:
+                skipped += 1
+                continue
+
             # tránh trùng trong cùng keyword
             if url in local_seen:
                 continue
@@ -299,6 +310,9 @@ def _write_video_links_txt(
                 f"(search_n={search_n}, global_dedup={global_dedup})"
             )
 
+    if skipped:
+        print(f"[get_link] Bỏ {skipped} link nằm trong skip list")
+
     Path(output_txt).parent.mkdir(parents=True, exist_ok=True)
     Path(output_txt).write_text("\n".join(lines), encoding="utf-8")
     return total_links
@@ -4,6 +4,7 @@
    (improved: also extract start/end time for each text if possible)
 '''
 import gzip
+import io
 import os
 import xml.etree.ElementTree as ET
 
@@ -21,23 +22,15 @@ def _sanitize_keyword(name: str) -> str:
     name = ' '.join(name.split()).strip()
     return name
 
-def _read_prproj_xml(path: str) -> ET.Element:
-    with gzip.open(path, "rb") as f:
-        xml_data = f.read().decode("utf-8", errors="replace")
-    return ET.fromstring(xml_data)
+# Con trực tiếp của ClipItem cần giữ lại tới khi ClipItem đóng
+_CLIP_TIME_TAGS = ("Start", "End", "InPoint", "OutPoint")
+DEFAULT_TIMEBASE = 25
 
-def _build_parent_map(root: ET.Element):
-    return {child: parent for parent in root.iter() for child in parent}
 
-def _get_timebase(root: ET.Element) -> int:
-    # Premiere thường có Sequence/Rate/Timebase
-    seq = root.find(".//Sequence")
-    if seq is not None:
-        tb = seq.find(".//Rate/Timebase")
-        if tb is not None and tb.text and tb.text.isdigit():
-            return int(tb.text)
-    # fallback
-    return 25
+def _open_prproj_stream(path: str):
+    """Stream text của .prproj (gzip giải nén dần, không đọc cả file vào RAM)."""
+    return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", errors="replace")
+
 
 def _text_or_none(elem: ET.Element, tag_name: str):
     if elem is None:
@@ -59,6 +52,81 @@ def _extract_start_end(clip_item: ET.Element):
         return in_p, out_p
     return None, None
 
+def _iter_text_instances(path: str):
+    """
+    Duyệt .prproj bằng iterparse, chỉ giữ stack tổ tiên đang mở:
+      - VideoFilterComponent đóng -> lấy Component/InstanceName, gắn vào
+        ClipItem gần nhất trên stack
+      - ClipItem đóng -> Start/End (hoặc InPoint/OutPoint) của nó
+      - Timebase: Rate/Timebase đầu tiên trong Sequence đầu tiên
+    Element xử lý xong bị gỡ khỏi cha nên bộ nhớ ~ độ sâu cây.
+    Trả về (danh sách (name, start, end) theo thứ tự tài liệu, timebase).
+    """
+    stack = []           # [(elem, record | None)]
+    found = []           # [(order, item)]
+    order = 0
+    timebase = None
+    seq_depth = -1       # độ sâu của Sequence đầu tiên khi đang ở trong nó
+    seq_seen = False
+
+    with _open_prproj_stream(path) as f:
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                rec = None
+                if elem.tag == "ClipItem":
+                    rec = {"items": []}
+                elif elem.tag == "VideoFilterComponent":
+                    order += 1
+                    rec = {"order": order, "inst": None}
+                elif elem.tag == "Sequence" and not seq_seen:
+                    seq_seen = True
+                    seq_depth = len(stack)
+                stack.append((elem, rec))
+                continue
+
+            _, rec = stack.pop()
+            parent = stack[-1][0] if stack else None
+
+            if elem.tag == "InstanceName" and parent is not None and parent.tag == "Component" \
+                    and len(stack) >= 2 and stack[-2][0].tag == "VideoFilterComponent":
+                # Component/InstanceName đầu tiên của VideoFilterComponent
+                vfc_rec = stack[-2][1]
+                if vfc_rec["inst"] is None:
+                    vfc_rec["inst"] = elem.text or ""
+            elif elem.tag == "VideoFilterComponent":
+                name = _sanitize_keyword(rec["inst"].strip()) if rec["inst"] else ""
+                if name:
+                    item = {"name": name, "start": None, "end": None}
+                    found.append((rec["order"], item))
+                    # Lần lên ClipItem gần nhất
+                    for anc, anc_rec in reversed(stack):
+                        if anc.tag == "ClipItem":
+                            anc_rec["items"].append(item)
+                            break
+            elif elem.tag == "ClipItem":
+                start, end = _extract_start_end(elem)
+                for item in rec["items"]:
+                    item["start"], item["end"] = start, end
+            elif elem.tag == "Timebase" and timebase is None and seq_depth >= 0 \
+                    and parent is not None and parent.tag == "Rate":
+                tb = elem.text
+                timebase = int(tb) if tb and tb.isdigit() else DEFAULT_TIMEBASE
+            elif elem.tag == "Sequence" and len(stack) == seq_depth:
+                seq_depth = -1
+                if timebase is None:
+                    timebase = DEFAULT_TIMEBASE
+
+            # Giữ Start/End... của ClipItem cha tới khi ClipItem đóng, còn lại gỡ bỏ
+            if parent is not None and not (parent.tag == "ClipItem" and elem.tag in _CLIP_TIME_TAGS):
+                elem.clear()
+                if len(parent) and parent[-1] is elem:
+                    del parent[-1]
+                else:
+                    parent.remove(elem)
+
+    found.sort(key=lambda x: x[0])
+    return [r for _, r in found], timebase or DEFAULT_TIMEBASE
+
 def extract_text_instances_with_timing(path: str, save_txt: str = "list_names.txt"):
     """
     Trả về danh sách dict:
@@ -72,31 +140,24 @@ def extract_text_instances_with_timing(path: str, save_txt: str = "list_names.tx
 
     Ghi file nếu save_txt != None (mỗi dòng: name|start_frame|end_frame|start_seconds|end_seconds)
     """
-    root = _read_prproj_xml(path)
-    parent_map = _build_parent_map(root)
-    timebase = _get_timebase(root)
+    results, _ = extract_text_instances_and_timebase(path)
+
+    if save_txt:
+        with open(save_txt, "w", encoding="utf-8") as f:
+            f.write("")
+            for r in results:
+                f.write(
+                    f"{r['name']}|{r['start_frame']}|{r['end_frame']}|{r['start_seconds']}|{r['end_seconds']}\n"
+                )
+    return results
+
+def extract_text_instances_and_timebase(path: str):
+    """Như extract_text_instances_with_timing (không ghi file), trả thêm timebase: (results, timebase)."""
+    instances, timebase = _iter_text_instances(path)
 
     results = []
-    for comp in root.findall(".//VideoFilterComponent"):
-        inst = comp.find("Component/InstanceName")
-        if inst is None or not inst.text:
-            continue
-        name = inst.text.strip()
-        name = _sanitize_keyword(name)
-        if not name:
-            continue
-        # Lần lên ClipItem gần nhất
-        current = comp
-        clip_item = None
-        while current in parent_map:
-            current = parent_map[current]
-            if current.tag == "ClipItem":
-                clip_item = current
-                break
-        if clip_item is not None:
-            start, end = _extract_start_end(clip_item)
-        else:
-            start = end = None
+    for inst in instances:
+        start, end = inst["start"], inst["end"]
 
         if start is not None and end is not None and end < start:
             # Trường hợp dữ liệu bất thường
@@ -109,21 +170,49 @@ def extract_text_instances_with_timing(path: str, save_txt: str = "list_names.tx
             start_sec = end_sec = None
 
         results.append({
-            "name": name,
+            "name": inst["name"],
             "start_frame": start,
             "end_frame": end,
             "start_seconds": start_sec,
             "end_seconds": end_sec
         })
+    return results, timebase
 
-    if save_txt:
-        with open(save_txt, "w", encoding="utf-8") as f:
-            f.write("")
-            for r in results:
-                f.write(
-                    f"{r['name']}|{r['start_frame']}|{r['end_frame']}|{r['start_seconds']}|{r['end_seconds']}\n"
-                )
-    return results
+def _extract_one(args):
+    path, save_txt = args
+    try:
+        return path, extract_text_instances_with_timing(path, save_txt=save_txt), None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+def extract_many(paths, save_dir=None, max_workers=None):
+    """
+    Trích xuất nhiều project song song bằng process pool (mỗi file 1 tiến trình,
+    parse là CPU-bound nên thread không giúp được vì GIL).
+
+    save_dir: ghi <save_dir>/<tên project>.txt cho từng file (None = không ghi)
+    Trả về {path: {"results": [...]} | {"error": str}}
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    jobs = []
+    for p in paths:
+        save_txt = None
+        if save_dir:
+            os.makedirs(save_dir, exist_ok=True)
+            save_txt = os.path.join(save_dir, os.path.splitext(os.path.basename(p))[0] + ".txt")
+        jobs.append((p, save_txt))
+
+    out = {}
+    if len(jobs) <= 1 or max_workers == 1:
+        done = map(_extract_one, jobs)
+    else:
+        workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            done = list(ex.map(_extract_one, jobs))
+    for path, results, err in done:
+        out[path] = {"error": err} if err else {"results": results}
+    return out
 
 # Giữ hàm cũ (backward compatibility)
 def extract_instance_names(path, save_txt=None, project_name=None):
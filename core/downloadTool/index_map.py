@@ -0,0 +1,136 @@
+"""
+index_map.py
+-----------------------------------
+Đặt tên video theo video id (`<id>.mp4`) thay vì vị trí (`0000.mp4`), và
+index map cho mỗi group (`<group>/_index_map.json`) ghi vị trí hiện tại của
+từng id trong dl_links.txt.
+
+Tạo lại link (đổi thứ tự / thêm / bớt) chỉ ghi lại index map; file đã tải
+giữ nguyên, down_by_yt chỉ tải id mới. Timeline (cột video_id / video_index)
+và cutAndPush.jsx resolve clip qua id hoặc index map.
+
+Format:
+{
+  "version": 1,
+  "group": "Naruto",
+  "items": [
+    {"index": 0, "id": "dQw4w9WgXcQ", "url": "...", "file": "dQw4w9WgXcQ.mp4"}
+  ]
+}
+"""
+
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+try:
+    from .manifest import read_manifest, write_manifest  # type: ignore
+except Exception:
+    import sys
+    _ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    if _ROOT not in sys.path:
+        sys.path.insert(0, _ROOT)
+    from core.downloadTool.manifest import read_manifest, write_manifest  # type: ignore
+
+INDEX_MAP_FILENAME = "_index_map.json"
+INDEX_MAP_VERSION = 1
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".mkv", ".webm", ".avi", ".m4v")
+
+# watch?v=<id>, youtu.be/<id>, /shorts/<id>, /embed/<id>, /live/<id>
+_RE_URL_ID = re.compile(r"(?:[?&]v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])")
+# Tên file kiểu cũ theo vị trí: 0000.mp4
+_RE_LEGACY_NAME = re.compile(r"^\d+$")
+
+
+def video_id_from_url(url: str) -> str:
+    """Video id YouTube trong URL ('' nếu không nhận ra, khi đó cần hỏi yt-dlp)."""
+    m = _RE_URL_ID.search(url or "")
+    return m.group(1) if m else ""
+
+
+def index_map_path(group_dir: str) -> str:
+    return os.path.join(group_dir, INDEX_MAP_FILENAME)
+
+
+def read_index_map(group_dir: str) -> Dict[str, Any]:
+    path = index_map_path(group_dir)
+    empty = {"version": INDEX_MAP_VERSION, "group": os.path.basename(group_dir.rstrip("/\\")), "items": []}
+    if not os.path.isfile(path):
+        return empty
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data.get("items"), list):
+            data["items"] = []
+        return data
+    except Exception as e:
+        print(f"[index_map][WARN] Không đọc được {path}: {e}")
+        return empty
+
+
+def write_index_map(group_dir: str, items: List[Dict[str, Any]]) -> None:
+    data = {
+        "version": INDEX_MAP_VERSION,
+        "group": os.path.basename(group_dir.rstrip("/\\")),
+        "items": items,
+    }
+    path = index_map_path(group_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def media_by_id(group_dir: str) -> Dict[str, str]:
+    """{stem: tên file} cho video trong group (stem = video id với file kiểu mới)."""
+    out: Dict[str, str] = {}
+    try:
+        names = sorted(os.listdir(group_dir))
+    except OSError:
+        return out
+    for name in names:
+        stem, ext = os.path.splitext(name)
+        if ext.lower() in VIDEO_EXTENSIONS and not stem.startswith("temp_") and ".part" not in name:
+            out.setdefault(stem, name)
+    return out
+
+
+def file_for_index(group_dir: str, index: int) -> Optional[str]:
+    """Tên file đang ở vị trí `index` theo index map (None nếu không có)."""
+    files = media_by_id(group_dir)
+    for item in read_index_map(group_dir).get("items") or []:
+        if item.get("index") == index and item.get("id") in files:
+            return files[item["id"]]
+    return None
+
+
+def migrate_legacy_names(group_dir: str) -> int:
+    """
+    Đổi file kiểu cũ (0000.mp4 + sidecar 0000.*) sang <id>.* theo id trong
+    manifest, cập nhật key manifest. Trả về số video đã đổi tên.
+    """
+    data = read_manifest(group_dir)
+    items = data["items"]
+    renamed = 0
+    for name in list(items):
+        stem, ext = os.path.splitext(name)
+        vid = (items[name] or {}).get("id") or ""
+        if not _RE_LEGACY_NAME.match(stem) or not vid or ext.lower() not in VIDEO_EXTENSIONS:
+            continue
+        src = os.path.join(group_dir, name)
+        dst = os.path.join(group_dir, vid + ext)
+        if not os.path.isfile(src) or os.path.exists(dst):
+            continue
+        # Sidecar cùng stem (transcript, phụ đề...)
+        for other in os.listdir(group_dir):
+            if other != name and other.startswith(stem + "."):
+                os.replace(os.path.join(group_dir, other), os.path.join(group_dir, vid + other[len(stem):]))
+        os.replace(src, dst)
+        items[vid + ext] = items.pop(name)
+        renamed += 1
+    if renamed:
+        write_manifest(group_dir, data)
+        print(f"[index_map] {os.path.basename(group_dir)}: đổi tên {renamed} file sang video id")
+    return renamed
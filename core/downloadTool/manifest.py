@@ -0,0 +1,86 @@
+"""
+manifest.py
+-----------------------------------
+Manifest tải xuống cho mỗi group folder (`<group>/_manifest.json`).
+
+down_by_yt ghi lại file nào được tải từ URL nào (video id, title, tags...),
+để các bước sau (media index, scene matcher...) không phải gọi lại yt-dlp
+trên file local chỉ để lấy metadata.
+
+Format:
+{
+  "group": "Naruto",
+  "items": {
+    "0000.mp4": {"id": "...", "url": "...", "title": "...", "tags": [...], "duration": 123.0}
+  }
+}
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional
+
+MANIFEST_FILENAME = "_manifest.json"
+
+# Giữ description ngắn để manifest không phình to
+DESCRIPTION_MAX_CHARS = 1000
+
+
+def manifest_path(group_dir: str) -> str:
+    return os.path.join(group_dir, MANIFEST_FILENAME)
+
+
+def read_manifest(group_dir: str) -> Dict[str, Any]:
+    path = manifest_path(group_dir)
+    if not os.path.isfile(path):
+        return {"group": os.path.basename(group_dir.rstrip("/\\")), "items": {}}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data.get("items"), dict):
+            data["items"] = {}
+        return data
+    except Exception as e:
+        print(f"[manifest][WARN] Không đọc được {path}: {e}")
+        return {"group": os.path.basename(group_dir.rstrip("/\\")), "items": {}}
+
+
+def write_manifest(group_dir: str, data: Dict[str, Any]) -> None:
+    path = manifest_path(group_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def entry_from_info(url: str, info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Rút gọn info dict của yt-dlp thành 1 entry manifest."""
+    info = info or {}
+    return {
+        "id": info.get("id") or "",
+        "url": url,
+        "title": info.get("title") or "",
+        "description": (info.get("description") or "")[:DESCRIPTION_MAX_CHARS],
+        "tags": list(info.get("tags") or []),
+        "duration": float(info.get("duration") or 0),
+        # Format thực tế yt-dlp đã chọn
+        "format_id": info.get("format_id") or "",
+        "width": int(info.get("width") or 0),
+        "height": int(info.get("height") or 0),
+        "fps": float(info.get("fps") or 0),
+    }
+
+
+def record_download(
+    group_dir: str,
+    filename: str,
+    url: str,
+    info: Optional[Dict[str, Any]],
+    extra: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Ghi/ghi đè entry của `filename` trong manifest của group (+ các field trong extra)."""
+    data = read_manifest(group_dir)
+    entry = entry_from_info(url, info)
+    entry.update(extra or {})
+    data["items"][filename] = entry
+    write_manifest(group_dir, data)
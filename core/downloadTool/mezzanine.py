@@ -0,0 +1,288 @@
+"""
+mezzanine.py
+-----------------------------------
+Bước tuỳ chọn sau khi tải: transcode video long-GOP (avc1 MP4 của down_by_yt)
+sang codec intra-frame dễ edit, đúng độ phân giải sequence, để Premiere
+scrub và đặt in/out (cutAndPush.jsx) nhanh hơn.
+
+- Encoder CPU thuần (prores_ks / dnxhd / libx264 intra), không cần GPU
+- Process pool, số tiến trình theo số core; mỗi ffmpeg chia đều số thread
+- Báo tiến độ từng file (print + callback tuỳ chọn)
+- File gốc: "keep" -> chuyển vào <group>/_original/, "delete" -> xoá
+- Manifest của group đổi key sang tên file mới (+ "original", "mezzanine")
+
+Bật cho download_main qua env:
+    MEZZANINE_PRESET=dnxhr_lq    (rỗng/off = tắt)
+    MEZZANINE_SIZE=1920x1080     (chỉ dùng khi download_main không biết sequence đích)
+    MEZZANINE_KEEP_ORIGINAL=1
+    MEZZANINE_WORKERS=0          (0 = tự tính theo core)
+"""
+
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from .catalog import ResourceCatalog  # type: ignore
+    from .manifest import read_manifest, write_manifest  # type: ignore
+except Exception:
+    import sys
+    _ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    if _ROOT not in sys.path:
+        sys.path.insert(0, _ROOT)
+    from core.downloadTool.catalog import ResourceCatalog  # type: ignore
+    from core.downloadTool.manifest import read_manifest, write_manifest  # type: ignore
+
+# ---------------------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------------------
+MEZZANINE_PRESET = (os.environ.get("MEZZANINE_PRESET", "") or "").strip().lower()
+MEZZANINE_SIZE = (os.environ.get("MEZZANINE_SIZE", "1920x1080") or "1920x1080").strip().lower()
+MEZZANINE_KEEP_ORIGINAL = (os.environ.get("MEZZANINE_KEEP_ORIGINAL", "1") or "1").strip().lower() in ("1", "true", "yes", "on")
+MEZZANINE_WORKERS = int(os.environ.get("MEZZANINE_WORKERS", "0"))
+MEZZANINE_TIMEOUT_SEC = int(os.environ.get("MEZZANINE_TIMEOUT_SEC", "7200"))
+
+ORIGINAL_DIRNAME = "_original"
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".mkv", ".webm", ".avi", ".m4v")
+
+FFMPEG_PATH = shutil.which("ffmpeg")
+HAS_FFMPEG = FFMPEG_PATH is not None
+
+# preset -> (đuôi file, tham số video, tham số audio)
+PRESETS: Dict[str, Tuple[str, List[str], List[str]]] = {
+    "prores_proxy": (".mov", ["-c:v", "prores_ks", "-profile:v", "0", "-pix_fmt", "yuv422p10le"], ["-c:a", "pcm_s16le"]),
+    "prores_lt": (".mov", ["-c:v", "prores_ks", "-profile:v", "1", "-pix_fmt", "yuv422p10le"], ["-c:a", "pcm_s16le"]),
+    "dnxhr_lq": (".mov", ["-c:v", "dnxhd", "-profile:v", "dnxhr_lq", "-pix_fmt", "yuv422p"], ["-c:a", "pcm_s16le"]),
+    "dnxhr_sq": (".mov", ["-c:v", "dnxhd", "-profile:v", "dnxhr_sq", "-pix_fmt", "yuv422p"], ["-c:a", "pcm_s16le"]),
+    # H.264 toàn I-frame: file nhỏ hơn ProRes/DNxHR, vẫn decode từng frame độc lập
+    "h264_intra": (".mp4", ["-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-g", "1", "-bf", "0",
+                            "-pix_fmt", "yuv420p"], ["-c:a", "aac", "-b:a", "192k"]),
+}
+
+ProgressCallback = Callable[[int, int, str, bool], None]
+
+
+def parse_size(size: str) -> Tuple[int, int]:
+    """'1920x1080' -> (1920, 1080)"""
+    w, h = size.lower().split("x", 1)
+    return int(w), int(h)
+
+
+def _scale_filter(width: int, height: int) -> str:
+    # Giữ tỉ lệ, thêm viền đen cho đúng khung sequence
+    return (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+    )
+
+
+def _worker_plan(total: int, max_workers: Optional[int]) -> Tuple[int, int]:
+    """(số tiến trình, số thread mỗi ffmpeg) theo số core."""
+    cores = os.cpu_count() or 1
+    workers = max_workers or MEZZANINE_WORKERS or max(1, cores // 2)
+    workers = max(1, min(workers, total, cores))
+    return workers, max(1, cores // workers)
+
+
+def transcode_one(args: Tuple[str, str, str, int, int, int]) -> Tuple[str, Optional[str], str]:
+    """
+    (src, dst, preset, width, height, threads) -> (src, file tạm | None, lỗi).
+    Chạy trong process con; ghi ra <dst>.part.<ext>, tiến trình cha đổi tên
+    sau khi xử lý file gốc (_finalize).
+    """
+    src, dst, preset, width, height, threads = args
+    _, vargs, aargs = PRESETS[preset]
+    root, ext = os.path.splitext(dst)
+    tmp = root + ".part" + ext
+    cmd = [
+        FFMPEG_PATH, "-y", "-v", "error",
+        "-i", src,
+        "-map", "0:v:0", "-map", "0:a?",
+        "-vf", _scale_filter(width, height),
+        *vargs, *aargs,
+        "-threads", str(threads),
+        tmp,
+    ]
+    try:
+        p = subprocess.run(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            text=True, encoding="utf-8", errors="ignore", timeout=MEZZANINE_TIMEOUT_SEC,
+        )
+        if p.returncode != 0:
+            raise RuntimeError((p.stderr or "").strip()[:300] or f"exit {p.returncode}")
+        return src, tmp, ""
+    except Exception as e:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return src, None, f"{type(e).__name__}: {e}"
+
+
+def _finalize(src: str, tmp: str, keep_original: bool) -> str:
+    """Xử lý file gốc theo policy, đổi tên file tạm thành tên cuối. Trả về path mới."""
+    group_dir = os.path.dirname(src)
+    name = os.path.basename(src)
+    if keep_original:
+        orig_dir = os.path.join(group_dir, ORIGINAL_DIRNAME)
+        os.makedirs(orig_dir, exist_ok=True)
+        os.replace(src, os.path.join(orig_dir, name))
+    else:
+        os.remove(src)
+    dst = os.path.join(group_dir, os.path.splitext(name)[0] + os.path.splitext(tmp)[1])
+    os.replace(tmp, dst)
+    return dst
+
+
+def _group_videos(parent_folder: str, catalog: Optional[ResourceCatalog] = None) -> List[str]:
+    """Video nằm ngay trong parent_folder/<group>/, theo catalog (rescan incremental trước)."""
+    cat = catalog or ResourceCatalog(parent_folder)
+    try:
+        cat.rescan()
+        return [r["abs_path"] for r in cat.entries(("video",))
+                if r["path"].count("/") == 1 and r["path"].lower().endswith(VIDEO_EXTENSIONS)]
+    finally:
+        if catalog is None:
+            cat.close()
+
+
+def find_pending(parent_folder: str, preset: str, catalog: Optional[ResourceCatalog] = None) -> List[str]:
+    """Video trong các group folder chưa được transcode bằng preset này."""
+    pending: List[str] = []
+    if not os.path.isdir(parent_folder):
+        return pending
+    try:
+        videos = _group_videos(parent_folder, catalog)
+    except Exception as e:
+        print(f"[mezzanine][WARN] Catalog lỗi ({e}) -> duyệt thư mục")
+    else:
+        manifests: Dict[str, Dict[str, Any]] = {}
+        for path in videos:
+            group_dir, name = os.path.split(path)
+            if name.startswith("temp_"):
+                continue
+            if group_dir not in manifests:
+                manifests[group_dir] = read_manifest(group_dir).get("items") or {}
+            if (manifests[group_dir].get(name) or {}).get("mezzanine") == preset:
+                continue
+            pending.append(path)
+        return pending
+
+    for group in sorted(os.listdir(parent_folder)):
+        group_dir = os.path.join(parent_folder, group)
+        if not os.path.isdir(group_dir) or group.startswith((".", "_")):
+            continue
+        items = read_manifest(group_dir).get("items") or {}
+        for name in sorted(os.listdir(group_dir)):
+            path = os.path.join(group_dir, name)
+            if not os.path.isfile(path) or not name.lower().endswith(VIDEO_EXTENSIONS):
+                continue
+            if name.startswith("temp_") or ".part" in name:
+                continue
+            if (items.get(name) or {}).get("mezzanine") == preset:
+                continue
+            pending.append(path)
+    return pending
+
+
+def _update_manifests(done: List[Tuple[str, str]], preset: str) -> None:
+    """Đổi key manifest sang file mới, 1 lần ghi / group."""
+    by_group: Dict[str, List[Tuple[str, str]]] = {}
+    for src, dst in done:
+        by_group.setdefault(os.path.dirname(src), []).append((src, dst))
+    for group_dir, pairs in by_group.items():
+        data = read_manifest(group_dir)
+        items = data["items"]
+        for src, dst in pairs:
+            old, new = os.path.basename(src), os.path.basename(dst)
+            entry: Dict[str, Any] = items.pop(old, None) or {}
+            entry["original"] = old
+            entry["mezzanine"] = preset
+            items[new] = entry
+        write_manifest(group_dir, data)
+
+
+def transcode_folder(
+    parent_folder: str,
+    preset: str = "",
+    size: str = "",
+    keep_original: Optional[bool] = None,
+    max_workers: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    catalog: Optional[ResourceCatalog] = None,
+) -> Dict[str, Any]:
+    """
+    Transcode mọi video chưa xử lý trong parent_folder/<group>/.
+    progress(done, total, path, ok) gọi sau mỗi file.
+    catalog: catalog đang mở của parent_folder (down_by_yt); None -> tự mở.
+    Trả về {"preset", "total", "ok", "failed": [(path, lỗi)]}.
+    """
+    preset = (preset or MEZZANINE_PRESET or "dnxhr_lq").lower()
+    if preset not in PRESETS:
+        raise ValueError(f"Preset không hợp lệ: {preset} (có: {', '.join(PRESETS)})")
+    width, height = parse_size(size or MEZZANINE_SIZE)
+    if keep_original is None:
+        keep_original = MEZZANINE_KEEP_ORIGINAL
+
+    result: Dict[str, Any] = {"preset": preset, "total": 0, "ok": 0, "failed": []}
+    if not HAS_FFMPEG:
+        print("[mezzanine][WARN] ffmpeg KHÔNG tìm thấy → bỏ qua transcode.")
+        return result
+
+    pending = find_pending(parent_folder, preset, catalog)
+    result["total"] = len(pending)
+    if not pending:
+        return result
+
+    workers, threads = _worker_plan(len(pending), max_workers)
+    print(f"[mezzanine] {len(pending)} file -> {preset} {width}x{height}, "
+          f"{workers} tiến trình x {threads} thread, giữ gốc={keep_original}")
+
+    ext = PRESETS[preset][0]
+    jobs = [(src, os.path.splitext(src)[0] + ext, preset, width, height, threads) for src in pending]
+    done_pairs: List[Tuple[str, str]] = []
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futures = [ex.submit(transcode_one, job) for job in jobs]
+        for done, fut in enumerate(as_completed(futures), start=1):
+            src, tmp, err = fut.result()
+            ok = False
+            if tmp:
+                try:
+                    done_pairs.append((src, _finalize(src, tmp, keep_original)))
+                    ok = True
+                except OSError as e:
+                    err = f"{type(e).__name__}: {e}"
+            if ok:
+                result["ok"] += 1
+                print(f"[mezzanine] ({done}/{len(pending)}) OK {os.path.basename(src)}")
+            else:
+                result["failed"].append((src, err))
+                print(f"[mezzanine][WARN] ({done}/{len(pending)}) {os.path.basename(src)}: {err}")
+            if progress:
+                try:
+                    progress(done, len(pending), src, ok)
+                except Exception:
+                    pass
+
+    if done_pairs:
+        _update_manifests(done_pairs, preset)
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Transcode video đã tải sang codec intra-frame")
+    parser.add_argument("folder", help="Thư mục cha chứa các group folder")
+    parser.add_argument("--preset", default="", choices=[""] + list(PRESETS))
+    parser.add_argument("--size", default="")
+    parser.add_argument("--delete-original", action="store_true")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    res = transcode_folder(args.folder, args.preset, args.size,
+                           keep_original=False if args.delete_original else None,
+                           max_workers=args.workers)
+    print(f"[mezzanine] Xong: {res['ok']}/{res['total']} OK, {len(res['failed'])} lỗi")
@@ -0,0 +1,97 @@
+"""
+skip_list.py
+-----------------------------------
+Danh sách video lỗi vĩnh viễn (private, đã xoá, tài khoản bị khoá, bản quyền)
+dùng chung cho mọi project: `data/_yt_skip_list.json` (env YT_SKIP_LIST).
+
+Lỗi có thể hết (premiere/live chưa bắt đầu, giới hạn tuổi, chặn vùng,
+members-only, format không có) không vào đây. Mục cũ ghi trước khi thu hẹp
+danh sách lỗi bị bỏ qua lúc đọc (kiểm lại "error" bằng is_permanent_error).
+
+- down_by_yt (supervisor.py) ghi vào khi lỗi được phân loại "permanent"
+  và bỏ qua các id này ở lần tải sau
+- get_link bỏ các id này khỏi kết quả search khi tạo dl_links.txt
+
+Format:
+{
+  "version": 1,
+  "items": {"<video id>": {"url": "...", "error": "...", "time": "2026-01-01 12:00:00"}}
+}
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+THIS_DIR = os.path.abspath(os.path.dirname(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(THIS_DIR, "..", ".."))
+
+SKIP_LIST_PATH = os.environ.get("YT_SKIP_LIST", "").strip() or os.path.join(ROOT_DIR, "data", "_yt_skip_list.json")
+SKIP_LIST_VERSION = 1
+# Thông báo lỗi yt-dlp có thể rất dài
+ERROR_MAX_CHARS = 300
+
+# Lỗi có thể hết - xét TRƯỚC: yt-dlp ghép chung "Video unavailable. <lý do>"
+# cho cả chặn vùng / members-only / cần đăng nhập
+_RECOVERABLE_PATTERNS = re.compile(
+    r"in your country|not available in your|geo.?restrict|members.?only|join this channel|"
+    r"premium members|confirm your age|age.?restrict|inappropriate for some users|"
+    r"premieres? in|live event|will begin|requested format|"
+    r"content isn.t available|not available on this app|try again later",
+    re.IGNORECASE,
+)
+# Lỗi yt-dlp không bao giờ hết (lý do cụ thể, không match "video unavailable" chung chung)
+_PERMANENT_PATTERNS = re.compile(
+    r"private video|this video is private|"
+    r"video has been removed|removed by the uploader|has been removed for violating|"
+    r"account associated with this video has been terminated|"
+    r"copyright claim|due to a copyright|"
+    r"unsupported url|is not a valid url|incomplete youtube id",
+    re.IGNORECASE,
+)
+
+_lock = threading.Lock()
+
+
+def is_permanent_error(message: str) -> bool:
+    message = message or ""
+    if _RECOVERABLE_PATTERNS.search(message):
+        return False
+    return bool(_PERMANENT_PATTERNS.search(message))
+
+
+def read_skip_list(path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """{video id: entry} (chỉ mục lỗi vĩnh viễn); file không có/hỏng -> {}."""
+    path = path or SKIP_LIST_PATH
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            items = json.load(f).get("items")
+    except Exception as e:
+        print(f"[skip_list][WARN] Không đọc được {path}: {e}")
+        return {}
+    if not isinstance(items, dict):
+        return {}
+    return {vid: e for vid, e in items.items() if isinstance(e, dict) and is_permanent_error(e.get("error", ""))}
+
+
+def add_to_skip_list(video_id: str, url: str, error: str, path: Optional[str] = None) -> None:
+    if not video_id:
+        return
+    path = path or SKIP_LIST_PATH
+    with _lock:
+        items = read_skip_list(path)
+        items[video_id] = {
+            "url": url,
+            "error": (error or "")[:ERROR_MAX_CHARS],
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": SKIP_LIST_VERSION, "items": items}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
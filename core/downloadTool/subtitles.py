@@ -0,0 +1,162 @@
+"""
+subtitles.py
+-----------------------------------
+Parse phụ đề WebVTT (yt-dlp tải kèm video) thành transcript gọn có mốc thời gian.
+
+Transcript lưu cạnh video: `<stem>.transcript.json`
+{
+  "lang": "en",
+  "cues": [[start_sec, end_sec, "text"], ...]
+}
+
+Auto-captions của YouTube lặp lại dòng (rolling captions) và chèn tag
+`<00:00:01.000><c>...</c>` -> được làm sạch và gộp ở đây.
+"""
+
+import glob
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+TRANSCRIPT_SUFFIX = ".transcript.json"
+
+# Ngôn ngữ phụ đề ưu tiên (theo thứ tự)
+SUB_LANGS = [
+    s.strip()
+    for s in (os.environ.get("YTDLP_SUB_LANGS", "en,vi") or "en,vi").split(",")
+    if s.strip()
+]
+
+_RE_TIMING = re.compile(
+    r"((?:\d+:)?\d{1,2}:\d{2}[\.,]\d{3})\s*-->\s*((?:\d+:)?\d{1,2}:\d{2}[\.,]\d{3})"
+)
+_RE_TAG = re.compile(r"<[^>]+>")
+
+Cue = Tuple[float, float, str]
+
+
+def _ts_to_seconds(ts: str) -> float:
+    ts = ts.replace(",", ".")
+    parts = ts.split(":")
+    sec = float(parts[-1])
+    if len(parts) >= 2:
+        sec += int(parts[-2]) * 60
+    if len(parts) >= 3:
+        sec += int(parts[-3]) * 3600
+    return sec
+
+
+def parse_vtt(text: str) -> List[Cue]:
+    """
+    Parse nội dung WebVTT -> [(start, end, text)].
+    Bỏ tag inline, bỏ dòng lặp lại liên tiếp của auto-captions.
+    """
+    cues: List[Cue] = []
+    last_line = ""
+    block_start = block_end = None
+    block_lines: List[str] = []
+
+    def flush() -> None:
+        nonlocal last_line
+        if block_start is None:
+            return
+        new_lines = []
+        for ln in block_lines:
+            if ln and ln != last_line:
+                new_lines.append(ln)
+                last_line = ln
+        if new_lines:
+            cues.append((round(block_start, 3), round(block_end, 3), " ".join(new_lines)))
+
+    for raw in (text or "").splitlines():
+        line = raw.strip()
+        m = _RE_TIMING.search(line)
+        if m:
+            flush()
+            block_start = _ts_to_seconds(m.group(1))
+            block_end = _ts_to_seconds(m.group(2))
+            block_lines = []
+            continue
+        if not line:
+            flush()
+            block_start = None
+            block_lines = []
+            continue
+        if block_start is None:
+            # header WEBVTT / Kind / Language / NOTE / cue id
+            continue
+        clean = _RE_TAG.sub("", line)
+        clean = re.sub(r"\s+", " ", clean.replace("&nbsp;", " ").replace("&amp;", "&")).strip()
+        block_lines.append(clean)
+    flush()
+
+    # Gộp cue cực ngắn (auto-captions tách 10ms) vào cue trước nếu trùng text
+    merged: List[Cue] = []
+    for st, en, txt in cues:
+        if merged and en - st < 0.05 and txt == merged[-1][2]:
+            merged[-1] = (merged[-1][0], en, txt)
+        else:
+            merged.append((st, en, txt))
+    return merged
+
+
+def transcript_path_for(video_path: str) -> str:
+    return os.path.splitext(video_path)[0] + TRANSCRIPT_SUFFIX
+
+
+def write_transcript(video_path: str, cues: List[Cue], lang: str) -> str:
+    path = transcript_path_for(video_path)
+    data = {"lang": lang, "cues": [[st, en, txt] for st, en, txt in cues]}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    return path
+
+
+def load_transcript(video_path: str) -> Optional[Dict[str, Any]]:
+    path = transcript_path_for(video_path)
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[subtitles][WARN] Không đọc được {path}: {e}")
+        return None
+
+
+def convert_vtt_sidecars(video_path: str, keep_vtt: bool = False) -> Optional[str]:
+    """
+    Tìm các file `<stem>.<lang>.vtt` yt-dlp vừa ghi cạnh video, chọn ngôn ngữ
+    ưu tiên, ghi transcript gọn và (mặc định) xoá file .vtt.
+    Trả về path transcript hoặc None nếu không có phụ đề.
+    """
+    stem = os.path.splitext(video_path)[0]
+    sidecars = glob.glob(glob.escape(stem) + ".*.vtt")
+    if not sidecars:
+        return None
+
+    def lang_of(p: str) -> str:
+        return p[len(stem) + 1:-len(".vtt")]
+
+    def rank(p: str) -> int:
+        lang = lang_of(p).split("-")[0]
+        return SUB_LANGS.index(lang) if lang in SUB_LANGS else len(SUB_LANGS)
+
+    sidecars.sort(key=rank)
+    out = None
+    for p in sidecars:
+        if out is None:
+            try:
+                with open(p, "r", encoding="utf-8", errors="ignore") as f:
+                    cues = parse_vtt(f.read())
+                if cues:
+                    out = write_transcript(video_path, cues, lang_of(p))
+            except Exception as e:
+                print(f"[subtitles][WARN] Lỗi parse {p}: {e}")
+        if not keep_vtt:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+    return out
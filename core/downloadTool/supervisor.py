@@ -0,0 +1,290 @@
+"""
+supervisor.py
+-----------------------------------
+Giám sát từng lượt tải yt-dlp của down_by_yt:
+
+- Mỗi video tải trong 1 process con; process con báo số byte qua progress
+  hook. Không có byte mới sau DOWNLOAD_STALL_TIMEOUT_SEC (lúc merge/convert
+  ffmpeg: DOWNLOAD_POSTPROCESS_TIMEOUT_SEC) -> kill, tính là lỗi transient.
+  (yt-dlp `retries` chỉ retry khi socket báo lỗi, kết nối treo thì đứng
+  cả group.)
+- Lỗi phân loại:
+    permanent - private / đã xoá / tài khoản bị khoá / bản quyền -> không
+                retry, ghi skip list (skip_list.py) cho get_link/down_by_yt
+    throttled - HTTP 429, "not a bot", rate limit
+    transient - còn lại (mạng, 5xx, stall, process chết, premiere chưa
+                bắt đầu, giới hạn tuổi, format không có...)
+- Mỗi loại có backoff riêng (luỹ thừa + jitter) và circuit breaker riêng:
+  N lỗi liên tiếp cùng loại -> mở breaker, mọi lượt tải sau chờ hết
+  cooldown (throttle thì dừng hẳn 1 lúc thay vì bắn tiếp request).
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from .bandwidth import VIDEO, Transfer, get_scheduler  # type: ignore
+    from .index_map import video_id_from_url  # type: ignore
+    from .skip_list import add_to_skip_list, is_permanent_error  # type: ignore
+except Exception:
+    import sys
+    _ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    if _ROOT not in sys.path:
+        sys.path.insert(0, _ROOT)
+    from core.downloadTool.bandwidth import VIDEO, Transfer, get_scheduler  # type: ignore
+    from core.downloadTool.index_map import video_id_from_url  # type: ignore
+    from core.downloadTool.skip_list import add_to_skip_list, is_permanent_error  # type: ignore
+
+# ---------------------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------------------
+DOWNLOAD_STALL_TIMEOUT_SEC = float(os.environ.get("DOWNLOAD_STALL_TIMEOUT_SEC", "60"))
+DOWNLOAD_POSTPROCESS_TIMEOUT_SEC = float(os.environ.get("DOWNLOAD_POSTPROCESS_TIMEOUT_SEC", "1800"))
+RETRY_TRANSIENT_ATTEMPTS = int(os.environ.get("RETRY_TRANSIENT_ATTEMPTS", "4"))
+RETRY_THROTTLED_ATTEMPTS = int(os.environ.get("RETRY_THROTTLED_ATTEMPTS", "6"))
+
+TRANSIENT = "transient"
+THROTTLED = "throttled"
+PERMANENT = "permanent"
+
+_THROTTLED_PATTERNS = re.compile(
+    r"http error 429|too many requests|rate.?limit|not a bot|"
+    r"sign in to confirm you.re not|unusual traffic",
+    re.IGNORECASE,
+)
+
+
+def classify_error(message: str) -> str:
+    """permanent / throttled / transient theo thông báo lỗi yt-dlp."""
+    if _THROTTLED_PATTERNS.search(message or ""):
+        return THROTTLED
+    if is_permanent_error(message):
+        return PERMANENT
+    return TRANSIENT
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int
+    base_delay: float
+    max_delay: float
+
+    def delay(self, attempt: int) -> float:
+        """Thời gian chờ trước lần thử thứ attempt + 1 (luỹ thừa 2, jitter ±25%)."""
+        d = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return d * random.uniform(0.75, 1.25)
+
+
+class CircuitBreaker:
+    """
+    `threshold` lỗi liên tiếp -> mở trong `cooldown` giây. Hết cooldown cho
+    thử 1 lượt (half-open): thành công -> đóng, lỗi tiếp -> mở lại ngay.
+    """
+
+    def __init__(self, name: str, threshold: int, cooldown: float):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.open_until = time.time() + self.cooldown
+            print(f"[supervisor][WARN] Breaker '{self.name}' mở {self.cooldown:.0f}s "
+                  f"({self.failures} lỗi liên tiếp)")
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.open_until = 0.0
+
+    def remaining(self) -> float:
+        return max(0.0, self.open_until - time.time())
+
+
+DEFAULT_POLICIES: Dict[str, RetryPolicy] = {
+    TRANSIENT: RetryPolicy(RETRY_TRANSIENT_ATTEMPTS, base_delay=5, max_delay=120),
+    THROTTLED: RetryPolicy(RETRY_THROTTLED_ATTEMPTS, base_delay=60, max_delay=900),
+    PERMANENT: RetryPolicy(1, base_delay=0, max_delay=0),
+}
+# loại -> (số lỗi liên tiếp để mở, cooldown giây)
+DEFAULT_BREAKERS: Dict[str, Tuple[int, float]] = {
+    TRANSIENT: (5, 120),
+    THROTTLED: (2, 600),
+    # Nhiều lỗi "vĩnh viễn" liền nhau thường là cookie/format hỏng chứ không phải video
+    PERMANENT: (10, 300),
+}
+
+
+def _download_worker(url: str, ydl_opts: Dict[str, Any], q: Any) -> None:
+    """Chạy trong process con: tải 1 URL, gửi (loại, dữ liệu) về q."""
+    from yt_dlp import YoutubeDL
+
+    def progress_hook(d: Dict[str, Any]) -> None:
+        q.put(("progress", (d.get("status"), d.get("downloaded_bytes") or 0)))
+
+    def postprocessor_hook(d: Dict[str, Any]) -> None:
+        q.put(("postprocess", (d.get("status"), d.get("postprocessor"))))
+
+    opts = dict(ydl_opts)
+    opts["ignoreerrors"] = False    # cần exception để phân loại lỗi
+    opts["progress_hooks"] = [progress_hook]
+    opts["postprocessor_hooks"] = [postprocessor_hook]
+    try:
+        with YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(url, download=True)
+            q.put(("done", ydl.sanitize_info(info) if info else None))
+    except BaseException as e:
+        q.put(("error", f"{type(e).__name__}: {e}"))
+
+
+class DownloadSupervisor:
+    """
+    Dùng chung cho cả lượt download_main để breaker thấy lỗi của mọi group:
+
+        sup = DownloadSupervisor()
+        info, err_class, err = sup.download(url, ydl_opts)
+    """
+
+    def __init__(
+        self,
+        stall_timeout: float = DOWNLOAD_STALL_TIMEOUT_SEC,
+        postprocess_timeout: float = DOWNLOAD_POSTPROCESS_TIMEOUT_SEC,
+        policies: Optional[Dict[str, RetryPolicy]] = None,
+        breakers: Optional[Dict[str, Tuple[int, float]]] = None,
+        skip_list_path: Optional[str] = None,
+    ):
+        self.stall_timeout = stall_timeout
+        self.postprocess_timeout = postprocess_timeout
+        self.policies = policies or DEFAULT_POLICIES
+        self.breakers = {
+            name: CircuitBreaker(name, threshold, cooldown)
+            for name, (threshold, cooldown) in (breakers or DEFAULT_BREAKERS).items()
+        }
+        self.skip_list_path = skip_list_path
+        self.stats: Dict[str, int] = {"ok": 0, "stalled": 0, TRANSIENT: 0, THROTTLED: 0, PERMANENT: 0}
+
+    def _wait_breakers(self) -> None:
+        wait = max(b.remaining() for b in self.breakers.values())
+        if wait > 0:
+            print(f"[supervisor] Breaker đang mở → chờ {wait:.0f}s")
+            time.sleep(wait)
+
+    def _attempt(self, url: str, ydl_opts: Dict[str, Any], transfer: Transfer) -> Tuple[Optional[Dict[str, Any]], str]:
+        """1 lượt tải trong process con. (info, '') hoặc (None, lỗi)."""
+        rate = transfer.rate_limit
+        if rate:
+            ydl_opts = dict(ydl_opts, ratelimit=rate)
+        q = mp.Queue()
+        proc = mp.Process(target=_download_worker, args=(url, ydl_opts, q), daemon=True)
+        proc.start()
+        last_bytes = -1
+        last_change = time.time()
+        phase = "download"
+        try:
+            while True:
+                try:
+                    kind, data = q.get(timeout=1.0)
+                except queue.Empty:
+                    if not proc.is_alive():
+                        return None, f"Process tải thoát bất thường (exit {proc.exitcode})"
+                    limit = self.stall_timeout if phase == "download" else self.postprocess_timeout
+                    if time.time() - last_change > limit:
+                        self.stats["stalled"] += 1
+                        return None, f"Stalled: không có tiến độ trong {limit:.0f}s ({phase})"
+                    continue
+
+                if kind == "done":
+                    return data, ""
+                if kind == "error":
+                    return None, data
+                if kind == "progress":
+                    status, nbytes = data
+                    phase = "download"
+                    if nbytes != last_bytes or status != "downloading":
+                        # downloaded_bytes về 0 khi sang stream khác (video -> audio)
+                        transfer.add(nbytes - last_bytes if nbytes >= last_bytes >= 0 else nbytes)
+                        last_bytes = nbytes
+                        last_change = time.time()
+                elif kind == "postprocess":
+                    phase = "postprocess" if data[0] == "started" else "download"
+                    last_change = time.time()
+        finally:
+            if proc.is_alive():
+                proc.terminate()
+            proc.join(timeout=10)
+
+    def download(self, url: str, ydl_opts: Dict[str, Any],
+                 bw_class: str = VIDEO) -> Tuple[Optional[Dict[str, Any]], str, str]:
+        """
+        Tải 1 URL theo retry policy, băng thông theo class bw_class của
+        bandwidth.py. Trả về (info, loại lỗi, lỗi); thành công -> (info, '', '').
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self._wait_breakers()
+            with get_scheduler().transfer(bw_class, url) as transfer:
+                info, err = self._attempt(url, ydl_opts, transfer)
+            if not err:
+                for b in self.breakers.values():
+                    b.record_success()
+                self.stats["ok"] += 1
+                return info, "", ""
+
+            cls = classify_error(err)
+            self.stats[cls] += 1
+            self.breakers[cls].record_failure()
+            policy = self.policies[cls]
+            print(f"[supervisor][WARN] ({cls}, lần {attempt}/{policy.max_attempts}) {url}: {err[:300]}")
+
+            if cls == PERMANENT:
+                try:
+                    add_to_skip_list(video_id_from_url(url), url, err, self.skip_list_path)
+                except OSError as e:
+                    print(f"[supervisor][WARN] Không ghi được skip list: {e}")
+                return None, cls, err
+            if attempt >= policy.max_attempts:
+                return None, cls, err
+
+            delay = policy.delay(attempt)
+            print(f"[supervisor] Thử lại sau {delay:.0f}s")
+            time.sleep(delay)
+
+
+# Test function
+if __name__ == "__main__":
+    # Thông báo lỗi yt-dlp thật -> loại mong đợi
+    cases = [
+        ("ERROR: [youtube] abc: Private video. Sign in if you've been granted access to this video", PERMANENT),
+        ("ERROR: [youtube] abc: Video unavailable. This video is private", PERMANENT),
+        ("ERROR: [youtube] abc: Video unavailable. This video has been removed by the uploader", PERMANENT),
+        ("ERROR: [youtube] abc: Video unavailable. This video is no longer available because the YouTube "
+         "account associated with this video has been terminated.", PERMANENT),
+        ("ERROR: [youtube] abc: Video unavailable. This video contains content from X, who has blocked it "
+         "on copyright grounds. due to a copyright claim", PERMANENT),
+        ("ERROR: [youtube] abc: Video unavailable. The uploader has not made this video available in your country",
+         TRANSIENT),
+        ("ERROR: [youtube] abc: Video unavailable. This video is not available", TRANSIENT),
+        ("ERROR: [youtube] abc: Join this channel to get access to members-only content like this video", TRANSIENT),
+        ("ERROR: [youtube] abc: This video is available to this channel's members on level: X", TRANSIENT),
+        ("ERROR: [youtube] abc: Sign in to confirm your age. This video may be inappropriate for some users.",
+         TRANSIENT),
+        ("ERROR: [youtube] abc: Premieres in 2 hours", TRANSIENT),
+        ("ERROR: [youtube] abc: This live event will begin in 3 days.", TRANSIENT),
+        ("ERROR: [youtube] abc: Requested format is not available. Use --list-formats", TRANSIENT),
+        ("ERROR: [youtube] abc: Sign in to confirm you're not a bot", THROTTLED),
+        ("ERROR: unable to download video data: HTTP Error 429: Too Many Requests", THROTTLED),
+        ("ERROR: Unsupported URL: https://example.com/x", PERMANENT),
+    ]
+    bad = [(msg, want, classify_error(msg)) for msg, want in cases if classify_error(msg) != want]
+    for msg, want, got in bad:
+        print(f"FAIL {got} != {want}: {msg}")
+    print(f"classify_error: {len(cases) - len(bad)}/{len(cases)} OK")
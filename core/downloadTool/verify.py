@@ -0,0 +1,285 @@
+"""
+verify.py
+-----------------------------------
+Kiểm tra file vừa tải trước khi import vào Premiere (yt-dlp chạy với
+ignoreerrors=True nên file tải dở/hỏng chỉ lộ ra khi Premiere treo lúc
+import hoặc cutAndPush.jsx không đặt được in/out).
+
+Mỗi file (ffprobe/ffmpeg chạy song song, thread pool):
+    - container đọc được (ffprobe)
+    - có stream video
+    - duration hợp lý: >= VERIFY_MIN_DURATION và không ngắn hơn duration
+      trong manifest quá VERIFY_DURATION_TOLERANCE (file bị cụt)
+    - seek + decode được 1 frame tại các offset: offset timeline (nếu có),
+      giữa file và gần cuối file
+
+File lỗi chuyển vào <group>/_quarantine/ (bỏ khỏi manifest), rồi tải lại
+theo index map (requeue), kiểm tra lại tối đa VERIFY_REQUEUE_ROUNDS vòng.
+Báo cáo ghi ra _verify_report.json.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    from .index_map import media_by_id  # type: ignore
+    from .manifest import read_manifest, write_manifest  # type: ignore
+except Exception:
+    import sys
+    _ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    if _ROOT not in sys.path:
+        sys.path.insert(0, _ROOT)
+    from core.downloadTool.index_map import media_by_id  # type: ignore
+    from core.downloadTool.manifest import read_manifest, write_manifest  # type: ignore
+
+# ---------------------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------------------
+VERIFY_DOWNLOADS = (os.environ.get("VERIFY_DOWNLOADS", "1") or "1").strip().lower() in ("1", "true", "yes", "on")
+# 0 = 2 x số core (ffprobe/ffmpeg chủ yếu chờ IO)
+VERIFY_WORKERS = int(os.environ.get("VERIFY_WORKERS", "0"))
+VERIFY_TIMEOUT_SEC = int(os.environ.get("VERIFY_TIMEOUT_SEC", "120"))
+VERIFY_MIN_DURATION = float(os.environ.get("VERIFY_MIN_DURATION", "1"))
+# duration thực / duration manifest tối thiểu
+VERIFY_DURATION_TOLERANCE = float(os.environ.get("VERIFY_DURATION_TOLERANCE", "0.9"))
+VERIFY_REQUEUE_ROUNDS = int(os.environ.get("VERIFY_REQUEUE_ROUNDS", "1"))
+
+QUARANTINE_DIRNAME = "_quarantine"
+REPORT_FILENAME = "_verify_report.json"
+# Offset decode gần cuối file (giây trước khi hết)
+TAIL_OFFSET_SEC = 2.0
+
+FFMPEG_PATH = shutil.which("ffmpeg")
+FFPROBE_PATH = shutil.which("ffprobe")
+HAS_FFMPEG = FFMPEG_PATH is not None and FFPROBE_PATH is not None
+
+# requeue(group_dirs): tải lại các file còn thiếu của các group này
+RequeueCallback = Callable[[List[str]], None]
+
+
+def _run(cmd: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        text=True, encoding="utf-8", errors="ignore", timeout=VERIFY_TIMEOUT_SEC,
+    )
+
+
+def _expected_duration(path: str) -> float:
+    entry = (read_manifest(os.path.dirname(path)).get("items") or {}).get(os.path.basename(path)) or {}
+    try:
+        return float(entry.get("duration") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def decode_at(path: str, t: float) -> str:
+    """Seek tới t rồi decode 1 frame video. '' nếu OK, ngược lại mô tả lỗi."""
+    p = _run([
+        FFMPEG_PATH, "-v", "error", "-xerror",
+        "-ss", f"{max(0.0, t):.3f}", "-i", path,
+        "-map", "0:v:0", "-frames:v", "1", "-f", "null", "-",
+    ])
+    if p.returncode != 0:
+        return (p.stderr or "").strip()[:200] or f"exit {p.returncode}"
+    return ""
+
+
+def check_file(path: str, offsets: Iterable[float] = (), expected_duration: float = 0.0) -> Dict[str, Any]:
+    """
+    Kiểm tra 1 file. Trả về {"path", "ok", "duration", "errors": [...]}.
+    Không bao giờ raise (lỗi ffprobe/timeout cũng thành errors).
+    """
+    res: Dict[str, Any] = {"path": path, "ok": False, "duration": 0.0, "errors": []}
+    errors: List[str] = res["errors"]
+    try:
+        if not os.path.isfile(path) or os.path.getsize(path) == 0:
+            errors.append("missing: file không tồn tại hoặc rỗng")
+            return res
+
+        p = _run([FFPROBE_PATH, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path])
+        if p.returncode != 0:
+            errors.append("container: " + ((p.stderr or "").strip()[:200] or f"exit {p.returncode}"))
+            return res
+        data = json.loads(p.stdout or "{}")
+        streams = data.get("streams") or []
+        if not any(s.get("codec_type") == "video" for s in streams):
+            errors.append("no_video: không có stream video")
+            return res
+
+        try:
+            duration = float((data.get("format") or {}).get("duration") or 0)
+        except (TypeError, ValueError):
+            duration = 0.0
+        res["duration"] = round(duration, 3)
+        if duration < VERIFY_MIN_DURATION:
+            errors.append(f"duration: {duration:.2f}s < {VERIFY_MIN_DURATION:.2f}s")
+            return res
+        if expected_duration and duration < expected_duration * VERIFY_DURATION_TOLERANCE:
+            errors.append(f"duration: {duration:.2f}s, manifest {expected_duration:.2f}s (file bị cụt?)")
+            return res
+
+        points = sorted({round(t, 3) for t in offsets if 0 <= t < duration}
+                        | {round(duration / 2, 3), round(max(0.0, duration - TAIL_OFFSET_SEC), 3)})
+        for t in points:
+            err = decode_at(path, t)
+            if err:
+                errors.append(f"decode@{t:.3f}: {err}")
+                break
+    except Exception as e:
+        errors.append(f"{type(e).__name__}: {e}")
+    res["ok"] = not errors
+    return res
+
+
+def verify_files(
+    files: Iterable[str],
+    offsets: Optional[Dict[str, List[float]]] = None,
+    max_workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Kiểm tra song song, kết quả cùng thứ tự files."""
+    files = list(dict.fromkeys(files))
+    if not files:
+        return []
+    offsets = offsets or {}
+    workers = max_workers or VERIFY_WORKERS or 2 * (os.cpu_count() or 1)
+    workers = max(1, min(workers, len(files)))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futures = [
+            ex.submit(check_file, f, offsets.get(f, ()), _expected_duration(f))
+            for f in files
+        ]
+        return [fut.result() for fut in futures]
+
+
+def quarantine(path: str) -> Optional[str]:
+    """Chuyển file vào <group>/_quarantine/ (ghi đè bản cũ), bỏ entry manifest."""
+    group_dir = os.path.dirname(path)
+    name = os.path.basename(path)
+    qdir = os.path.join(group_dir, QUARANTINE_DIRNAME)
+    try:
+        os.makedirs(qdir, exist_ok=True)
+        dst = os.path.join(qdir, name)
+        os.replace(path, dst)
+    except OSError as e:
+        print(f"[verify][WARN] Không chuyển được {name} vào quarantine: {e}")
+        return None
+    data = read_manifest(group_dir)
+    if data["items"].pop(name, None) is not None:
+        write_manifest(group_dir, data)
+    return dst
+
+
+def write_report(path: str, report: Dict[str, Any]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def verify_and_requeue(
+    files: Iterable[str],
+    offsets: Optional[Dict[str, List[float]]] = None,
+    requeue: Optional[RequeueCallback] = None,
+    rounds: Optional[int] = None,
+    report_path: Optional[str] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Kiểm tra -> quarantine file lỗi -> requeue(group dirs) -> kiểm tra bản
+    tải lại, tối đa `rounds` vòng. Trả về (và ghi report_path nếu có):
+    {"checked", "ok", "bad": [{"path", "errors", "quarantined", "round"}],
+     "still_bad": [path], "rounds"}
+    """
+    rounds = VERIFY_REQUEUE_ROUNDS if rounds is None else rounds
+    offsets = dict(offsets or {})
+    report: Dict[str, Any] = {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "checked": 0, "ok": 0, "bad": [], "still_bad": [], "rounds": 0,
+    }
+    if not HAS_FFMPEG:
+        print("[verify][WARN] Không có ffmpeg/ffprobe → bỏ qua kiểm tra.")
+        return report
+
+    pending = list(files)
+    for rnd in range(rounds + 1):
+        if not pending:
+            break
+        report["rounds"] = rnd
+        results = verify_files(pending, offsets, max_workers)
+        report["checked"] += len(results)
+        bad = [r for r in results if not r["ok"]]
+        report["ok"] += len(results) - len(bad)
+        print(f"[verify] Vòng {rnd}: {len(results) - len(bad)}/{len(results)} OK")
+        if not bad:
+            break
+
+        # stem cũ (= video id với file kiểu mới) để tìm lại bản tải lại
+        redo: Dict[str, List[str]] = {}
+        for r in bad:
+            print(f"[verify][WARN] {os.path.basename(r['path'])}: {'; '.join(r['errors'])}")
+            dst = quarantine(r["path"]) if os.path.isfile(r["path"]) else None
+            report["bad"].append({"path": r["path"], "errors": r["errors"], "quarantined": dst or "", "round": rnd})
+            redo.setdefault(os.path.dirname(r["path"]), []).append(r["path"])
+
+        if rnd == rounds or requeue is None:
+            report["still_bad"] = [p for paths in redo.values() for p in paths]
+            break
+        try:
+            requeue(sorted(redo))
+        except Exception as e:
+            print(f"[verify][ERROR] Requeue lỗi: {e}")
+            report["still_bad"] = [p for paths in redo.values() for p in paths]
+            break
+
+        pending = []
+        for group_dir, paths in redo.items():
+            files_now = media_by_id(group_dir)
+            for old in paths:
+                name = files_now.get(os.path.splitext(os.path.basename(old))[0])
+                if name:
+                    new = os.path.join(group_dir, name)
+                    if old in offsets:
+                        offsets[new] = offsets[old]
+                    pending.append(new)
+                else:
+                    report["still_bad"].append(old)
+
+    if report_path:
+        try:
+            write_report(report_path, report)
+        except OSError as e:
+            print(f"[verify][WARN] Không ghi được báo cáo {report_path}: {e}")
+    return report
+
+
+def offsets_from_timeline(csv_path: str, resource_dir: str) -> Dict[str, List[float]]:
+    """{file nguồn: [src_start, ...]} theo timeline CSV (cùng cách resolve với cutAndPush.jsx)."""
+    from core.premierCore.fcp_xml import ClipResolver, read_timeline_csv, timeline_row_range
+
+    resolver = ClipResolver(resource_dir)
+    out: Dict[str, List[float]] = {}
+    for row in read_timeline_csv(csv_path):
+        src = resolver.resolve(row["bin_name"], row["video_index"], row["character"], row["video_id"])
+        if src is None:
+            continue
+        start, _ = timeline_row_range(row)
+        out.setdefault(str(src), []).append(start)
+    return out
+
+
+# Test function
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Kiểm tra video đã tải bằng ffprobe/ffmpeg")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--report")
+    args = parser.parse_args()
+
+    res = verify_and_requeue(args.files, rounds=0, report_path=args.report)
+    print(f"[verify] {res['ok']}/{res['checked']} OK, lỗi: {len(res['bad'])}")
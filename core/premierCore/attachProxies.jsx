@@ -0,0 +1,221 @@
+/**
+ * attachProxies.jsx
+ *
+ * Gắn proxy low-res (core/premierCore/proxies.py -> proxy_map.json) cho các
+ * clip full-res đã import, để scrub/playback timeline mượt ngay từ đầu.
+ *
+ * Config:
+ *   RUNALL_PROXY_MAP (runAll.jsx, theo job) hoặc proxy_map trong path.txt /
+ *   JOB_PARAMS; mặc định <data_folder>/proxy_map.json
+ *
+ * Toàn bộ code nằm trong 1 closure: runAll.jsx gọi qua $.evalFile nên không
+ * được ghi đè log / writeStatus... global của nó.
+ */
+(function () {
+
+    function log(msg) {
+        try { $.writeln('[attachProxies] ' + msg); } catch (e) {}
+    }
+
+    function normalizePath(p) {
+        if (!p) return '';
+        return p.replace(/\\/g, '/').replace(/\/+/g, '/');
+    }
+
+    function joinPath(a, b) {
+        if (!a) return b || '';
+        if (!b) return a || '';
+        var s = a.charAt(a.length - 1);
+        return (s === '/' || s === '\\') ? (a + b) : (a + '/' + b);
+    }
+
+    function fileExists(p) {
+        try { return (new File(p)).exists; } catch (e) { return false; }
+    }
+
+    function readLines(p) {
+        var f = new File(p);
+        if (!f.exists || !f.open('r')) return [];
+        var arr = [];
+        while (!f.eof) arr.push(f.readln());
+        f.close();
+        return arr;
+    }
+
+    function readJSONFile(p) {
+        var f = new File(p);
+        f.encoding = 'UTF-8';
+        if (!f.exists || !f.open('r')) return null;
+        var content = f.read();
+        f.close();
+        try {
+            return eval('(' + content + ')');
+        } catch (e) {
+            log('ERROR parsing JSON ' + p + ': ' + e);
+            return null;
+        }
+    }
+
+    var ROOT_DIR = (function () {
+        try {
+            return new File($.fileName).parent.parent.parent.fsName.replace(/\\/g, '/');
+        } catch (e) { return ''; }
+    })();
+
+    var DATA_DIR = joinPath(ROOT_DIR, 'data');
+
+    /**
+     * Status/heartbeat cho Python (core/premierCore/jsx_status.py):
+     * data/_status_<script>.json với state running | done | error
+     */
+    var STATUS_SCRIPT = 'attachProxies';
+    var STATUS_PATH = joinPath(DATA_DIR, '_status_' + STATUS_SCRIPT + '.json');
+
+    function jsonQuote(s) {
+        return '"' + String(s)
+            .replace(/\\/g, '\\\\')
+            .replace(/"/g, '\\"')
+            .replace(/\r/g, '\\r')
+            .replace(/\n/g, '\\n')
+            .replace(/\t/g, '\\t') + '"';
+    }
+
+    function jsonValue(v) {
+        if (v === null || v === undefined) return 'null';
+        if (typeof v === 'number') return isFinite(v) ? String(v) : 'null';
+        if (typeof v === 'boolean') return v ? 'true' : 'false';
+        return jsonQuote(v);
+    }
+
+    function writeStatus(state, progress, message, result) {
+        var parts = [];
+        if (result) {
+            for (var k in result) {
+                if (result.hasOwnProperty(k)) parts.push(jsonQuote(k) + ': ' + jsonValue(result[k]));
+            }
+        }
+        var json = '{"script": ' + jsonQuote(STATUS_SCRIPT) +
+            ', "state": ' + jsonQuote(state) +
+            ', "progress": ' + jsonValue(Math.round((progress || 0) * 1000) / 1000) +
+            ', "message": ' + jsonQuote(message || '') +
+            ', "result": {' + parts.join(', ') + '}' +
+            ', "updated": ' + (new Date()).getTime() + '}';
+        try {
+            var f = new File(STATUS_PATH);
+            f.encoding = 'UTF-8';
+            if (f.open('w')) {
+                f.write(json);
+                f.close();
+            }
+        } catch (e) {
+            log('WARN: Cannot write status: ' + e);
+        }
+    }
+
+    /**
+     * Job từ jsxListener.jsx: JOB_PARAMS ghi đè giá trị trong path.txt
+     */
+    function applyJobParams(cfg) {
+        if (typeof JOB_PARAMS === 'undefined' || !JOB_PARAMS) return cfg;
+        if (!cfg) cfg = {};
+        for (var k in JOB_PARAMS) {
+            if (JOB_PARAMS.hasOwnProperty(k)) cfg[k] = String(JOB_PARAMS[k]);
+        }
+        return cfg;
+    }
+
+    function readPathConfig() {
+        var pathTxt = joinPath(DATA_DIR, 'path.txt');
+        if (!fileExists(pathTxt)) return applyJobParams(null);
+
+        var lines = readLines(pathTxt);
+        var cfg = {};
+        for (var i = 0; i < lines.length; i++) {
+            var line = lines[i];
+            if (!line) continue;
+            var parts = line.split('=');
+            if (parts.length >= 2) {
+                var key = parts[0].replace(/^\s+|\s+$/g, '');
+                var val = parts.slice(1).join('=').replace(/^\s+|\s+$/g, '');
+                cfg[key] = val;
+            }
+        }
+        return applyJobParams(cfg);
+    }
+
+    function getProxyMapPath() {
+        if (typeof RUNALL_PROXY_MAP !== 'undefined' && RUNALL_PROXY_MAP) return RUNALL_PROXY_MAP;
+        var cfg = readPathConfig() || {};
+        if (cfg.proxy_map) return normalizePath(cfg.proxy_map);
+        if (cfg.data_folder) return joinPath(normalizePath(cfg.data_folder), 'proxy_map.json');
+        return '';
+    }
+
+    /** Duyệt project 1 lần: media path (chuẩn hoá, lower) -> projectItem */
+    function indexClipsByMediaPath(folder, out) {
+        var children = folder.children;
+        var n = children ? children.numItems : 0;
+        for (var i = 0; i < n; i++) {
+            var it = children[i];
+            if (!it) continue;
+            if (it.type === 2) {
+                indexClipsByMediaPath(it, out);
+            } else if (it.type === 1) {
+                var mp = '';
+                try { mp = it.getMediaPath(); } catch (e) {}
+                if (mp) out[normalizePath(mp).toLowerCase()] = it;
+            }
+        }
+        return out;
+    }
+
+    function main() {
+        writeStatus('running', 0, 'Start');
+
+        var mapPath = getProxyMapPath();
+        if (!mapPath || !fileExists(mapPath)) {
+            log('No proxy map: ' + mapPath);
+            writeStatus('done', 1, 'No proxy map', { attached: 0 });
+            return;
+        }
+        var data = readJSONFile(mapPath);
+        if (!data || !data.items) {
+            writeStatus('error', 1, 'Invalid proxy map: ' + mapPath);
+            return;
+        }
+
+        var clips = indexClipsByMediaPath(app.project.rootItem, {});
+        var attached = 0, skipped = 0, failed = 0;
+        var items = data.items;
+
+        for (var i = 0; i < items.length; i++) {
+            var entry = items[i];
+            var clip = clips[normalizePath(entry.media).toLowerCase()];
+            if (!clip || !fileExists(entry.proxy)) { skipped++; continue; }
+            try {
+                if (!clip.canProxy() || clip.hasProxy()) { skipped++; continue; }
+                // 0 = proxy (1 = hi-res). attachProxy trả 0 khi thành công -> kiểm tra hasProxy()
+                clip.attachProxy(entry.proxy, 0);
+                if (clip.hasProxy()) attached++; else failed++;
+            } catch (e) {
+                failed++;
+                log('WARN: ' + entry.media + ' -> ' + e);
+            }
+            if (i % 20 === 0) writeStatus('running', i / items.length, 'Attaching proxies');
+        }
+
+        log('Attached ' + attached + ', skipped ' + skipped + ', failed ' + failed);
+        writeStatus('done', 1, 'Attached ' + attached + ' proxies', {
+            attached: attached,
+            skipped: skipped,
+            failed: failed
+        });
+    }
+
+    try {
+        main();
+    } catch (e) {
+        writeStatus('error', 1, 'Exception: ' + e);
+        log('ERROR: ' + e);
+    }
+})();
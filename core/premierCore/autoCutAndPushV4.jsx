@@ -50,10 +50,70 @@ var ROOT_DIR = (function () {
 
 var DATA_DIR = joinPath(ROOT_DIR, 'data');
 
+/**
+ * Status/heartbeat cho Python (core/premierCore/jsx_status.py):
+ * data/_status_<script>.json với state running | done | error
+ */
+var STATUS_SCRIPT = 'autoCutAndPushV4';
+var STATUS_PATH = joinPath(DATA_DIR, '_status_' + STATUS_SCRIPT + '.json');
+
+function jsonQuote(s) {
+    return '"' + String(s)
+        .replace(/\\/g, '\\\\')
+        .replace(/"/g, '\\"')
+        .replace(/\r/g, '\\r')
+        .replace(/\n/g, '\\n')
+        .replace(/\t/g, '\\t') + '"';
+}
+
+function jsonValue(v) {
+    if (v === null || v === undefined) return 'null';
+    if (typeof v === 'number') return isFinite(v) ? String(v) : 'null';
+    if (typeof v === 'boolean') return v ? 'true' : 'false';
+    return jsonQuote(v);
+}
+
+function writeStatus(state, progress, message, result) {
+    var parts = [];
+    if (result) {
+        for (var k in result) {
+            if (result.hasOwnProperty(k)) parts.push(jsonQuote(k) + ': ' + jsonValue(result[k]));
+        }
+    }
+    var json = '{"script": ' + jsonQuote(STATUS_SCRIPT) +
+        ', "state": ' + jsonQuote(state) +
+        ', "progress": ' + jsonValue(Math.round((progress || 0) * 1000) / 1000) +
+        ', "message": ' + jsonQuote(message || '') +
+        ', "result": {' + parts.join(', ') + '}' +
+        ', "updated": ' + (new Date()).getTime() + '}';
+    try {
+        var f = new File(STATUS_PATH);
+        f.encoding = 'UTF-8';
+        if (f.open('w')) {
+            f.write(json);
+            f.close();
+        }
+    } catch (e) {
+        log('WARN: Cannot write status: ' + e);
+    }
+}
+
+/**
+ * Job từ jsxListener.jsx: JOB_PARAMS ghi đè giá trị trong path.txt
+ */
+function applyJobParams(cfg) {
+    if (typeof JOB_PARAMS === 'undefined' || !JOB_PARAMS) return cfg;
+    if (!cfg) cfg = {};
+    for (var k in JOB_PARAMS) {
+        if (JOB_PARAMS.hasOwnProperty(k)) cfg[k] = String(JOB_PARAMS[k]);
+    }
+    return cfg;
+}
+
 function readPathConfig() {
     var pathTxt = joinPath(DATA_DIR, 'path.txt');
     log('Reading config: ' + pathTxt);
-    if (!fileExists(pathTxt)) return null;
+    if (!fileExists(pathTxt)) return applyJobParams(null);
 
     var lines = readLines(pathTxt);
     var cfg = {};
@@ -67,7 +127,7 @@ function readPathConfig() {
             cfg[key] = val;
         }
     }
-    return cfg;
+    return applyJobParams(cfg);
 }
 
 /**
@@ -91,23 +151,110 @@ function secondsToTicks(seconds) {
     return Math.floor(seconds * TICKS_PER_SECOND);
 }
 
+/**
+ * Index project 1 lần cho cả lượt chạy:
+ *   byPath: media path (chuẩn hoá, lowercase) -> ProjectItem (mọi bin, đệ quy)
+ *   bins:   tên bin -> bin
+ * Sau khi import chỉ quét phần mới của bin đích thay vì cả project.
+ */
+var PROJECT_INDEX = null;
+
+function mediaKey(p) {
+    return normalizePath(p).toLowerCase();
+}
+
+function indexProjectItem(item, index) {
+    if (item.type === ProjectItemType.BIN) {
+        if (!index.bins[item.name]) index.bins[item.name] = item;
+        indexBinRecursive(item, index);
+        return;
+    }
+    if (item.type === ProjectItemType.CLIP || item.type === ProjectItemType.FILE) {
+        var mp = '';
+        try { mp = item.getMediaPath(); } catch (e) {}
+        if (mp) {
+            var key = mediaKey(mp);
+            if (!index.byPath[key]) index.byPath[key] = item;
+        }
+    }
+}
+
+function indexBinRecursive(bin, index) {
+    var children = bin.children;
+    var n = children.numItems;
+    for (var i = 0; i < n; i++) {
+        indexProjectItem(children[i], index);
+    }
+    index.binCounts[bin.nodeId] = n;
+}
+
+function getProjectIndex() {
+    if (!PROJECT_INDEX) {
+        PROJECT_INDEX = { byPath: {}, bins: {}, binCounts: {} };
+        indexBinRecursive(app.project.rootItem, PROJECT_INDEX);
+        var count = 0;
+        for (var k in PROJECT_INDEX.byPath) count++;
+        log('Project index: ' + count + ' media items');
+    }
+    return PROJECT_INDEX;
+}
+
+/**
+ * Cập nhật index sau khi import vào bin: chỉ quét các con mới
+ * (từ số lượng đã biết), quét lại cả bin nếu số lượng giảm.
+ */
+function refreshBinIndex(bin) {
+    var index = getProjectIndex();
+    var children = bin.children;
+    var n = children.numItems;
+    var start = index.binCounts[bin.nodeId] || 0;
+    if (start > n) start = 0;
+    for (var i = start; i < n; i++) {
+        indexProjectItem(children[i], index);
+    }
+    index.binCounts[bin.nodeId] = n;
+}
+
+/**
+ * Import 1 lần mọi video chưa có trong project vào resourceBin
+ */
+function importMissingVideos(videoPaths, resourceBin) {
+    var index = getProjectIndex();
+    var missing = [];
+    var seen = {};
+    for (var i = 0; i < videoPaths.length; i++) {
+        var p = normalizePath(videoPaths[i]);
+        var key = mediaKey(p);
+        if (!p || seen[key] || index.byPath[key]) continue;
+        seen[key] = true;
+        if (!fileExists(p)) {
+            log('ERROR: Video file not found: ' + p);
+            continue;
+        }
+        missing.push(p);
+    }
+    if (missing.length === 0) return 0;
+
+    log('Importing ' + missing.length + ' videos');
+    try {
+        app.project.importFiles(missing, true, resourceBin, false);
+    } catch (e) {
+        log('ERROR importing: ' + e);
+    }
+    refreshBinIndex(resourceBin);
+    return missing.length;
+}
+
 /**
  * Tìm hoặc import video vào project
  */
 function findOrImportVideo(videoPath, resourceBin) {
     videoPath = normalizePath(videoPath);
+    var index = getProjectIndex();
+    var key = mediaKey(videoPath);
 
-    // Tìm trong project items
-    var rootItem = app.project.rootItem;
-    for (var i = 0; i < rootItem.children.numItems; i++) {
-        var item = rootItem.children[i];
-        if (item.type === ProjectItemType.CLIP || item.type === ProjectItemType.FILE) {
-            var itemPath = normalizePath(item.getMediaPath());
-            if (itemPath === videoPath) {
-                log('Video already in project: ' + videoPath);
-                return item;
-            }
-        }
+    if (index.byPath[key]) {
+        return index.byPath[key];
     }
 
     // Nếu chưa có, import
@@ -118,15 +265,17 @@ function findOrImportVideo(videoPath, resourceBin) {
     }
 
     try {
-        var imported = app.project.importFiles([videoPath], true, resourceBin, false);
-        if (imported && imported.length > 0) {
-            log('Imported successfully');
-            return app.project.rootItem.children[app.project.rootItem.children.numItems - 1];
-        }
+        app.project.importFiles([videoPath], true, resourceBin, false);
     } catch (e) {
         log('ERROR importing: ' + e);
+        return null;
     }
 
+    refreshBinIndex(resourceBin);
+    if (index.byPath[key]) {
+        log('Imported successfully');
+        return index.byPath[key];
+    }
     return null;
 }
 
@@ -135,18 +284,19 @@ function findOrImportVideo(videoPath, resourceBin) {
  */
 function findOrCreateBin(binName, parentBin) {
     if (!parentBin) parentBin = app.project.rootItem;
+    var index = getProjectIndex();
 
-    // Tìm bin
-    for (var i = 0; i < parentBin.children.numItems; i++) {
-        var item = parentBin.children[i];
-        if (item.type === ProjectItemType.BIN && item.name === binName) {
-            return item;
-        }
-    }
+    var bin = index.bins[binName];
+    if (bin) return bin;
 
     // Tạo mới
     log('Creating bin: ' + binName);
-    return parentBin.createBin(binName);
+    bin = parentBin.createBin(binName);
+    if (bin) {
+        index.bins[binName] = bin;
+        index.binCounts[bin.nodeId] = 0;
+    }
+    return bin;
 }
 
 /**
@@ -246,6 +396,41 @@ function cutAndPushToV4(
     }
 }
 
+/**
+ * Danh sách scene cần đẩy cho 1 keyword: [{videoPath, start, end}]
+ * Ưu tiên assignment (không trùng scene, phủ đủ thời lượng); nếu không có
+ * thì lấy scene đầu tiên của best match như trước.
+ */
+function segmentsForKeyword(assignment, keywordMatches) {
+    var out = [];
+    if (assignment && assignment.segments && assignment.segments.length) {
+        for (var i = 0; i < assignment.segments.length; i++) {
+            var seg = assignment.segments[i];
+            out.push({
+                videoPath: seg.video_path,
+                start: parseFloat(seg.start_time) || 0,
+                end: parseFloat(seg.end_time) || 0
+            });
+        }
+        return out;
+    }
+
+    if (!keywordMatches || keywordMatches.length === 0) return out;
+
+    // Lấy best match (đầu tiên, đã sort by confidence), scene đầu tiên
+    var bestMatch = keywordMatches[0];
+    var suggestedScenes = bestMatch.suggested_scenes || [];
+    if (suggestedScenes.length === 0) return out;
+
+    var scene = suggestedScenes[0];
+    out.push({
+        videoPath: bestMatch.video_path,
+        start: parseFloat(scene.start_time) || 0,
+        end: parseFloat(scene.end_time) || 0
+    });
+    return out;
+}
+
 /**
  * Main processing
  */
@@ -267,12 +452,25 @@ function processSceneMatches(sceneMatchesPath, sequence) {
 
     var keywords = data.keywords || [];
     var matches = data.matches || {};
+    // Gán scene toàn cục từ Python (scene_assignment.py), cùng thứ tự keywords
+    var assignments = data.assignments || [];
+    if (assignments.length) log('Using global scene assignments');
 
     log('Processing ' + keywords.length + ' keywords');
 
     var resourceBin = findOrCreateBin('AI_Matched_Scenes', app.project.rootItem);
     var successCount = 0;
 
+    // Gom scene của mọi keyword trước, import video thiếu trong 1 lần gọi
+    var segmentsByKeyword = [];
+    var allPaths = [];
+    for (var k = 0; k < keywords.length; k++) {
+        var segs = segmentsForKeyword(assignments[k], matches[keywords[k].keyword]);
+        segmentsByKeyword.push(segs);
+        for (var m = 0; m < segs.length; m++) allPaths.push(segs[m].videoPath);
+    }
+    importMissingVideos(allPaths, resourceBin);
+
     for (var i = 0; i < keywords.length; i++) {
         var kwItem = keywords[i];
         var keyword = kwItem.keyword;
@@ -280,50 +478,48 @@ function processSceneMatches(sceneMatchesPath, sequence) {
         var endSec = kwItem.end_seconds;
         var durationSec = kwItem.duration_seconds;
 
+        writeStatus('running', (i + 0.5) / keywords.length, 'Keyword ' + (i + 1) + '/' + keywords.length + ': ' + keyword, {
+            success: successCount
+        });
         log('\n--- Keyword ' + (i + 1) + '/' + keywords.length + ': "' + keyword + '" ---');
         log('Timeline position: ' + startSec + 's - ' + endSec + 's');
 
-        var keywordMatches = matches[keyword];
-        if (!keywordMatches || keywordMatches.length === 0) {
-            log('WARN: No matches found for keyword "' + keyword + '"');
+        var segments = segmentsByKeyword[i];
+        if (segments.length === 0) {
+            log('WARN: No scenes for keyword "' + keyword + '"');
             continue;
         }
 
-        // Lấy best match (đầu tiên, đã sort by confidence)
-        var bestMatch = keywordMatches[0];
-        var videoPath = bestMatch.video_path;
-        var suggestedScenes = bestMatch.suggested_scenes || [];
-
-        if (suggestedScenes.length === 0) {
-            log('WARN: No suggested scenes for "' + keyword + '"');
-            continue;
-        }
+        // Đẩy lần lượt các scene được gán, nối tiếp nhau trong khoảng của keyword
+        var success = false;
+        var offset = 0;
+        for (var s = 0; s < segments.length; s++) {
+            var seg = segments[s];
+            var segDuration = segments.length > 1 ? (seg.end - seg.start) : durationSec;
 
-        // Lấy scene đầu tiên
-        var scene = suggestedScenes[0];
-        var sceneStart = parseFloat(scene.start_time) || 0;
-        var sceneEnd = parseFloat(scene.end_time) || 0;
+            log('Scene: ' + seg.videoPath + ' [' + seg.start + 's - ' + seg.end + 's]');
 
-        log('Best match: ' + videoPath);
-        log('Scene: ' + sceneStart + 's - ' + sceneEnd + 's');
+            // Import video
+            var projectItem = findOrImportVideo(seg.videoPath, resourceBin);
+            if (!projectItem) {
+                log('ERROR: Cannot import video');
+                continue;
+            }
 
-        // Import video
-        var projectItem = findOrImportVideo(videoPath, resourceBin);
-        if (!projectItem) {
-            log('ERROR: Cannot import video');
-            continue;
+            // Cut and push to V4
+            if (cutAndPushToV4(
+                sequence,
+                projectItem,
+                seg.start,
+                seg.end,
+                startSec + offset,
+                segDuration
+            )) {
+                success = true;
+            }
+            offset += seg.end - seg.start;
         }
 
-        // Cut and push to V4
-        var success = cutAndPushToV4(
-            sequence,
-            projectItem,
-            sceneStart,
-            sceneEnd,
-            startSec,
-            durationSec
-        );
-
         if (success) {
             successCount++;
         }
@@ -342,15 +538,18 @@ function processSceneMatches(sceneMatchesPath, sequence) {
  */
 function main() {
     log('=== AUTO CUT AND PUSH TO V4 ===');
+    writeStatus('running', 0, 'Start');
 
     var cfg = readPathConfig();
     if (!cfg) {
+        writeStatus('error', 1, 'data/path.txt not found');
         alert('ERROR: Không tìm thấy data/path.txt');
         return;
     }
 
     var dataFolder = normalizePath(cfg.data_folder || '');
     if (!dataFolder) {
+        writeStatus('error', 1, 'data_folder not defined');
         alert('ERROR: data_folder not defined');
         return;
     }
@@ -360,6 +559,7 @@ function main() {
     // Get active sequence
     var seq = app.project.activeSequence;
     if (!seq) {
+        writeStatus('error', 1, 'No active sequence');
         alert('ERROR: Không có sequence nào được mở.\nHãy mở sequence trước.');
         return;
     }
@@ -368,6 +568,7 @@ function main() {
 
     // Check if V4 exists
     if (seq.videoTracks.numTracks < 4) {
+        writeStatus('error', 1, 'Sequence needs at least 4 video tracks');
         alert('ERROR: Sequence cần có ít nhất 4 video tracks.\nHiện tại chỉ có ' + seq.videoTracks.numTracks + ' tracks.');
         return;
     }
@@ -380,8 +581,10 @@ function main() {
     if (count > 0) {
         app.project.save();
         log('Project saved');
+        writeStatus('done', 1, 'Pushed ' + count + ' keywords to V4', { success: count });
         alert('Đã xử lý thành công ' + count + ' keywords và đẩy vào V4!');
     } else {
+        writeStatus('error', 1, 'No keyword processed', { success: 0 });
         alert('Không có keyword nào được xử lý. Xem log để biết chi tiết.');
     }
 
@@ -389,4 +592,9 @@ function main() {
 }
 
 // Run
-main();
+try {
+    main();
+} catch (e) {
+    writeStatus('error', 1, 'Exception: ' + e);
+    log('ERROR: ' + e);
+}
@@ -0,0 +1,189 @@
+"""
+batch_job.py
+
+File job batch cho runAll.jsx: 1 JSON liệt kê mọi project cần xử lý, để
+Premiere chỉ khởi động 1 lần/batch và không phải ghi đè `data/path.txt`
+cho từng project.
+
+    data/_batch/batch_<timestamp>.json
+    {
+      "version": 1,
+      "close_projects": true,
+      "jobs": [
+        {"project_slug", "project_path", "data_folder", "resource_dir",
+         "csv_path", "sequence_name", "import_list", "proxy_map"},
+        ...
+      ]
+    }
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    from .import_list import write_import_list
+    from .jsx_status import DATA_DIR
+    from .proxies import prepare_proxies
+    from .subclips import extract_subclips
+except ImportError:
+    from import_list import write_import_list
+    from jsx_status import DATA_DIR
+    from proxies import prepare_proxies
+    from subclips import extract_subclips
+
+try:
+    from ..downloadTool.verify import REPORT_FILENAME, offsets_from_timeline, verify_and_requeue
+except (ImportError, ValueError):
+    import sys
+    _ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    if _ROOT not in sys.path:
+        sys.path.insert(0, _ROOT)
+    from core.downloadTool.verify import REPORT_FILENAME, offsets_from_timeline, verify_and_requeue
+
+BATCH_DIRNAME = "_batch"
+BATCH_VERSION = 1
+
+# Mặc định có gắn proxy low-res sau import hay không (make_job(attach_proxies=...))
+AUTO_PROXY = (os.environ.get("AUTO_PROXY", "0") or "0").strip().lower() in ("1", "true", "yes", "on")
+# Mặc định có cắt sẵn subclip theo CSV trước khi import hay không (make_job(subclips=...))
+AUTO_SUBCLIPS = (os.environ.get("AUTO_SUBCLIPS", "0") or "0").strip().lower() in ("1", "true", "yes", "on")
+# Mặc định có kiểm tra (ffprobe + decode tại offset timeline) media CSV dùng hay không (make_job(verify=...))
+AUTO_VERIFY = (os.environ.get("AUTO_VERIFY", "0") or "0").strip().lower() in ("1", "true", "yes", "on")
+
+PathLike = Union[str, Path]
+
+
+def _posix(p: Optional[PathLike]) -> str:
+    return str(p).replace("\\", "/") if p else ""
+
+
+def find_timeline_csv(data_folder: PathLike) -> str:
+    """timeline_export_merged.csv nếu có, ngược lại timeline_export.csv ('' nếu chưa có)."""
+    for name in ("timeline_export_merged.csv", "timeline_export.csv"):
+        p = os.path.join(str(data_folder), name)
+        if os.path.isfile(p):
+            return _posix(p)
+    return ""
+
+
+def _verify_sources(csv: str, resource_dir: str, data_folder: str,
+                    project_path: str = "", sequence_name: str = "") -> None:
+    def requeue(group_dirs: List[str]) -> None:
+        # Import muộn: down_by_yt cần yt-dlp
+        from core.downloadTool.down_by_yt import redownload_groups
+        from core.downloadTool.format_policy import build_policy, resolve_target
+        policy = build_policy("", resolve_target(project_path, sequence_name))
+        redownload_groups(resource_dir, group_dirs, policy=policy)
+
+    offsets = offsets_from_timeline(csv, resource_dir)
+    res = verify_and_requeue(
+        list(offsets), offsets=offsets, requeue=requeue,
+        report_path=os.path.join(data_folder, REPORT_FILENAME),
+    )
+    if res["still_bad"]:
+        print(f"[batch_job][WARN] {len(res['still_bad'])} file vẫn lỗi, xem {REPORT_FILENAME}")
+
+
+def make_job(
+    project_path: PathLike,
+    data_folder: PathLike,
+    resource_dir: Optional[PathLike] = None,
+    csv_path: Optional[PathLike] = None,
+    sequence_name: str = "Main",
+    project_slug: str = "",
+    selective_import: bool = True,
+    attach_proxies: Optional[bool] = None,
+    subclips: Optional[bool] = None,
+    verify: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """
+    1 entry job. resource_dir mặc định <thư mục project>/resource như importResource.jsx.
+    selective_import: ghi import_list.json (chỉ media CSV tham chiếu) để
+    importResource.jsx không import cả thư mục resource, và cột media_path
+    vào CSV để cutAndPush.jsx lấy đúng file đã chọn cho từng dòng.
+    attach_proxies: ghi proxy_map.json (proxies.py, transcode proxy còn thiếu)
+    để runAll.jsx gắn proxy sau import; None -> theo env AUTO_PROXY.
+    subclips: cắt sẵn từng đoạn CSV (subclips.py) và ghi clip_path vào CSV
+    trước khi tạo import_list; None -> theo env AUTO_SUBCLIPS.
+    verify: kiểm tra file nguồn CSV dùng (decode tại src_start), file lỗi
+    quarantine + tải lại theo index map, báo cáo ở data_folder/_verify_report.json;
+    None -> theo env AUTO_VERIFY.
+    """
+    project_path = _posix(project_path)
+    if not resource_dir:
+        resource_dir = os.path.join(os.path.dirname(project_path), "resource")
+    # Để trống -> runAll.jsx tự tìm CSV trong data_folder lúc chạy
+    csv = _posix(csv_path) if csv_path else find_timeline_csv(data_folder)
+
+    if verify is None:
+        verify = AUTO_VERIFY
+    if verify and csv and os.path.isdir(str(resource_dir)):
+        try:
+            _verify_sources(csv, str(resource_dir), str(data_folder), project_path, sequence_name)
+        except Exception as e:
+            print(f"[batch_job][WARN] Không kiểm tra được media: {e}")
+
+    if subclips is None:
+        subclips = AUTO_SUBCLIPS
+    if subclips and csv and os.path.isdir(str(resource_dir)):
+        try:
+            extract_subclips(csv, resource_dir)
+        except Exception as e:
+            print(f"[batch_job][WARN] Không cắt được subclip: {e}")
+
+    import_list = ""
+    if selective_import and csv and os.path.isdir(str(resource_dir)):
+        try:
+            out = write_import_list(data_folder, csv_path=csv, resource_dir=resource_dir)
+            import_list = _posix(out) if out else ""
+        except Exception as e:
+            print(f"[batch_job][WARN] Không tạo được import_list: {e}")
+
+    if attach_proxies is None:
+        attach_proxies = AUTO_PROXY
+    proxy_map = ""
+    if attach_proxies and os.path.isdir(str(resource_dir)):
+        try:
+            out = prepare_proxies(data_folder, resource_dir=resource_dir, import_list=import_list or None)
+            proxy_map = _posix(out) if out else ""
+        except Exception as e:
+            print(f"[batch_job][WARN] Không tạo được proxy_map: {e}")
+
+    return {
+        "project_slug": project_slug or Path(project_path).stem,
+        "project_path": project_path,
+        "data_folder": _posix(data_folder),
+        "resource_dir": _posix(resource_dir),
+        "csv_path": csv,
+        "sequence_name": sequence_name,
+        # Rỗng -> importResource.jsx import toàn bộ như cũ
+        "import_list": import_list,
+        # Rỗng -> không gắn proxy
+        "proxy_map": proxy_map,
+    }
+
+
+def write_batch_job(
+    jobs: List[Dict[str, Any]],
+    path: Optional[PathLike] = None,
+    close_projects: bool = True,
+) -> Path:
+    """Ghi file batch (atomic), trả về path."""
+    if path is None:
+        path = DATA_DIR / BATCH_DIRNAME / f"batch_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.json"
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {"version": BATCH_VERSION, "close_projects": close_projects, "jobs": list(jobs)}
+    tmp = str(path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def read_batch_job(path: PathLike) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
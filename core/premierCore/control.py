@@ -4,6 +4,22 @@ from time import sleep
 import pyperclip
 import os
 
+try:
+    from .batch_job import write_batch_job
+    from .control_jsx import wait_for_window
+    from .jsx_channel import JsxChannel
+    from .jsx_status import DATA_DIR, clear_status, format_status, status_path_for, wait_for_status
+except ImportError:
+    from batch_job import write_batch_job
+    from control_jsx import wait_for_window
+    from jsx_channel import JsxChannel
+    from jsx_status import DATA_DIR, clear_status, format_status, status_path_for, wait_for_status
+
+# Thời gian chờ tối đa runAll.jsx (giây); script báo xong sớm thì đi tiếp ngay
+RUNALL_TIMEOUT_SEC = float(os.getenv("RUNALL_TIMEOUT_SEC", "3600"))
+# Chu kỳ bấm ENTER đóng popup (alert) trong lúc chờ script
+POPUP_DISMISS_SEC = 5
+
 
 def copy_paste(path):
     '''function that change the download path of YT Downloader'''
@@ -14,6 +30,19 @@ def copy_paste(path):
 
 #hàm này thực hiện mở vscode và chạy file runAll.jsx tự động
 def run_premier_script(premier_path, project_path, idx):
+    # jsxListener.jsx đang chạy -> gửi thẳng runAll.jsx (tự mở project theo path.txt)
+    channel = JsxChannel()
+    if channel.listener_alive():
+        status_file = status_path_for("runAll.jsx")
+        res = channel.run(
+            "runAll",
+            timeout=RUNALL_TIMEOUT_SEC,
+            status_file=status_file,
+            on_progress=lambda st: print(f"[runAll] {format_status(st)}"),
+        )
+        print(f"Script execution completed via listener: [{res.get('state')}] {res.get('message', '')}")
+        return res.get("state") == "done"
+
     os.system('taskkill /IM "Adobe Premiere Pro.exe" /F')
     app = None
     for w in Desktop(backend="uia").windows():
@@ -27,23 +56,49 @@ def run_premier_script(premier_path, project_path, idx):
         app = Application(backend="uia").start(
             r'"C:\Program Files\Adobe\Adobe Premiere Pro 2022\Adobe Premiere Pro.exe"',
         )
-    sleep(10)  # Chờ một chút để Premiere Pro khởi động hoàn toàn
+    # Chờ tới khi cửa sổ Premiere xuất hiện
+    if not wait_for_window("Adobe Premiere Pro", timeout=180):
+        print("Premiere Pro did not start in time.")
+        return False
+    sleep(2)  # Chờ một chút để Premiere nhận phím
     send_keys('^o')
     sleep(2)  # Chờ một chút để cửa sổ mở project xuất hiện
     #gõ đường dẫn project
     copy_paste(project_path)
     send_keys('{ENTER}')
-    sleep(5)  # Chờ một chút để project được mởpremierepro
-    send_keys('{ESC}{ESC}{ESC}{ESC}{ESC}{ESC}{ESC}{ESC}{ESC}')
-    sleep(5)
+    # Chờ tới khi title Premiere có tên project (project đã mở)
+    project_name = os.path.splitext(os.path.basename(project_path))[0]
+    if not wait_for_window(project_name, timeout=120):
+        print(f"WARN: Project window not detected: {project_name}")
     send_keys('{ESC}{ESC}{ESC}{ESC}{ESC}{ESC}{ESC}{ESC}{ESC}')
-    sleep(2)
+    sleep(1)
+    status = _run_runall_via_vscode(app)
+
+    #dọn dẹp tài nguyên
+    for w in Desktop(backend="uia").windows():
+        if "Visual Studio Code" in w.window_text():
+            w.set_focus()
+            break
+
+    #đóng session premier
+    if app:
+        app.close()
+        print("Premiere Pro session closed.")
+
+    return status.get("state") == "done"
+
+
+def _run_runall_via_vscode(app, timeout=RUNALL_TIMEOUT_SEC):
+    """Chạy runAll.jsx qua VS Code ExtendScript và chờ status của nó."""
     #tab sang cửa sổ vscode, tab cho đến khi thấy cửa sổ vscode hiện lên
     for w in Desktop(backend="uia").windows():
         if "Visual Studio Code" in w.window_text():
             w.set_focus()
             break
 
+    # Xoá status cũ trước khi chạy runAll.jsx
+    status_file = status_path_for("runAll.jsx")
+    clear_status(status_file)
 
     #bấm ctrl+e mở go to file
     send_keys('^e')
@@ -66,33 +121,84 @@ def run_premier_script(premier_path, project_path, idx):
             w.set_focus()
             break
 
-    #liên tục spam nút esc để tắt hết các popup
-    while True:
-        #nếu premier đã bị tắt thì thoát khỏi vòng lặp
-        if not app.is_process_running():
-            print("Premiere Pro has been closed.")
-            break
-        try:
-            send_keys('{ENTER}')
-            sleep(5)
-        except Exception as e:
-            print("No more popups to close.")
-            break
-    print("Script execution completed.")
+    #chờ runAll.jsx báo done/error, định kỳ bấm ENTER để tắt popup
+    last_dismiss = [0.0]
 
-    #dọn dẹp tài nguyên
+    def dismiss_popups(elapsed):
+        if elapsed - last_dismiss[0] >= POPUP_DISMISS_SEC:
+            last_dismiss[0] = elapsed
+            if app.is_process_running():
+                send_keys('{ENTER}')
+
+    status = wait_for_status(
+        status_file,
+        timeout=timeout,
+        on_progress=lambda st: print(f"[runAll] {format_status(st)}"),
+        on_tick=dismiss_popups,
+    )
+    print(f"Script execution completed: {format_status(status)} ({status.get('elapsed', 0)}s)")
+
+    #đóng popup cuối (alert sau khi script xong)
+    send_keys('{ESC}{ESC}{ESC}')
+    return status
+
+
+def run_premier_batch(jobs, close_premiere=False):
+    """
+    Chạy runAll.jsx cho nhiều project trong 1 phiên Premiere.
+
+    Args:
+        jobs: list entry từ batch_job.make_job()
+        close_premiere: đóng Premiere sau batch (mặc định giữ lại cho batch sau)
+
+    Returns:
+        dict status cuối của runAll ({state, message, result: {projects, ok, failed, errors}})
+    """
+    batch_path = write_batch_job(jobs)
+    batch_posix = str(batch_path).replace('\\', '/')
+    print(f"Batch job: {batch_posix} ({len(jobs)} project)")
+
+    # jsxListener.jsx đang chạy -> truyền batch qua params, không đụng path.txt
+    channel = JsxChannel()
+    if channel.listener_alive():
+        res = channel.run(
+            "runAll",
+            {"batch_job": batch_posix},
+            timeout=RUNALL_TIMEOUT_SEC * max(1, len(jobs)),
+            status_file=status_path_for("runAll.jsx"),
+            on_progress=lambda st: print(f"[runAll] {format_status(st)}"),
+        )
+        print(f"Batch completed via listener: [{res.get('state')}] {res.get('message', '')}")
+        return res
+
+    # Fallback phím: path.txt chỉ ghi 1 lần/batch, trỏ tới file batch
+    with open(os.path.join(DATA_DIR, 'path.txt'), 'w', encoding='utf-8') as f:
+        f.write(f"batch_job={batch_posix}\n")
+
+    app = None
     for w in Desktop(backend="uia").windows():
-        if "Visual Studio Code" in w.window_text():
-            w.set_focus()
+        if "Adobe Premiere Pro" in w.window_text():
+            app = Application(backend="uia").connect(title_re=".*Adobe Premiere Pro.*")
             break
+    if not app:
+        app = Application(backend="uia").start(
+            r'"C:\Program Files\Adobe\Adobe Premiere Pro 2022\Adobe Premiere Pro.exe"',
+        )
+    if not wait_for_window("Adobe Premiere Pro", timeout=180):
+        print("Premiere Pro did not start in time.")
+        return {"state": "error", "message": "Premiere Pro did not start", "result": {}}
+    sleep(2)  # Chờ một chút để Premiere nhận phím
 
-    #đóng session premier
-    if app:
+    status = _run_runall_via_vscode(app, timeout=RUNALL_TIMEOUT_SEC * max(1, len(jobs)))
+    print(f"Batch completed: {format_status(status)}")
+
+    if close_premiere and app:
         app.close()
         print("Premiere Pro session closed.")
+    return status
 
 #test
 if __name__ == "__main__":
     premier_path = r"C:\Program Files\Adobe\Adobe Premiere Pro 2022\Adobe Premiere Pro.exe"
     project_path = r"C:\Users\phamp\Downloads\Copied_3638\Copied_3638\3638.prproj"
-    run_premier_script(premier_path, project_path, 1)
\ No newline at end of file
+    run_premier_script(premier_path, project_path, 1)
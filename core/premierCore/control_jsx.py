@@ -11,6 +11,16 @@ from time import sleep
 import pyperclip
 import os
 import subprocess
+import time
+
+try:
+    from .jsx_channel import JsxChannel
+    from .jsx_status import clear_status, format_status, status_file_for_script, wait_for_status
+except ImportError:
+    from jsx_channel import JsxChannel
+    from jsx_status import clear_status, format_status, status_file_for_script, wait_for_status
+
+LISTENER_JSX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jsxListener.jsx")
 
 
 def copy_paste(text):
@@ -21,6 +31,19 @@ def copy_paste(text):
     sleep(0.3)
 
 
+def wait_for_window(window_title_pattern, timeout=120, poll=0.5):
+    """Chờ tới khi có window chứa pattern (thay cho sleep cố định khi khởi động app)"""
+    deadline = time.monotonic() + timeout
+    pattern = window_title_pattern.lower()
+    while True:
+        for w in Desktop(backend="uia").windows():
+            if pattern in w.window_text().lower():
+                return True
+        if time.monotonic() >= deadline:
+            return False
+        sleep(poll)
+
+
 def ensure_premiere_running():
     """Đảm bảo Premiere Pro đang chạy"""
     for w in Desktop(backend="uia").windows():
@@ -33,7 +56,10 @@ def ensure_premiere_running():
         subprocess.Popen([
             r"C:\Program Files\Adobe\Adobe Premiere Pro 2022\Adobe Premiere Pro.exe"
         ])
-        sleep(15)  # Đợi Premiere khởi động
+        # Đợi tới khi cửa sổ Premiere xuất hiện
+        if not wait_for_window("Adobe Premiere Pro", timeout=180):
+            print("[control_jsx] ERROR: Premiere không khởi động kịp")
+            return False
         return True
     except Exception as e:
         print(f"[control_jsx] ERROR: Không khởi động được Premiere: {e}")
@@ -61,13 +87,11 @@ def ensure_vscode_running():
         for path in vscode_paths:
             if os.path.exists(path):
                 subprocess.Popen([path])
-                sleep(5)
-                return True
+                return wait_for_window("Visual Studio Code", timeout=60)
 
         # Fallback: thử chạy bằng command
         subprocess.Popen(["code"])
-        sleep(5)
-        return True
+        return wait_for_window("Visual Studio Code", timeout=60)
     except Exception as e:
         print(f"[control_jsx] ERROR: Không khởi động được VS Code: {e}")
         return False
@@ -86,14 +110,33 @@ def focus_window(window_title_pattern):
     return False
 
 
-def run_jsx_in_premiere(jsx_path, premiere_version="2022", wait_seconds=10):
+def run_jsx_in_premiere(
+    jsx_path,
+    premiere_version="2022",
+    wait_seconds=10,
+    status_file=None,
+    timeout=1800,
+    on_progress=None,
+    params=None,
+    use_channel=True,
+):
     """
-    Tự động chạy JSX script trong Premiere Pro thông qua VS Code ExtendScript
+    Tự động chạy JSX script trong Premiere Pro.
+
+    Nếu jsxListener.jsx đang chạy trong Premiere thì gửi job qua hàng đợi
+    (jsx_channel.py, không cần phím/VS Code); ngược lại giả lập phím qua
+    VS Code ExtendScript như cũ.
 
     Args:
         jsx_path: Đường dẫn tuyệt đối đến file .jsx
         premiere_version: Phiên bản Premiere Pro (2022, 2023, 2024, 2025)
-        wait_seconds: Thời gian chờ script chạy xong
+        wait_seconds: Thời gian chờ cố định (chỉ dùng khi không có status_file)
+        status_file: File status JSX ghi (xem jsx_status.py). Có thì chờ tới
+            khi script báo done/error thay vì sleep cố định.
+        timeout: Thời gian chờ tối đa theo status_file (giây)
+        on_progress: callback(status) mỗi khi JSX ghi heartbeat
+        params: dict JOB_PARAMS gửi kèm job (ghi đè path.txt), chỉ dùng với listener
+        use_channel: False để luôn dùng giả lập phím
 
     Returns:
         bool: True nếu thành công
@@ -101,6 +144,21 @@ def run_jsx_in_premiere(jsx_path, premiere_version="2022", wait_seconds=10):
 
     print(f"\n[control_jsx] === Chạy JSX: {os.path.basename(jsx_path)} ===")
 
+    progress_cb = on_progress or (lambda st: print(f"[control_jsx] {format_status(st)}"))
+
+    channel = JsxChannel()
+    if use_channel and channel.listener_alive():
+        print("[control_jsx] Gửi job qua jsxListener...")
+        res = channel.run(
+            jsx_path,
+            params,
+            timeout=timeout,
+            status_file=status_file,
+            on_progress=progress_cb,
+        )
+        print(f"[control_jsx] Kết thúc ({res.get('elapsed_ms', 0)}ms): [{res.get('state')}] {res.get('message', '')}")
+        return res.get("state") == "done"
+
     # 1. Đảm bảo Premiere đang chạy
     if not ensure_premiere_running():
         return False
@@ -109,6 +167,10 @@ def run_jsx_in_premiere(jsx_path, premiere_version="2022", wait_seconds=10):
     if not ensure_vscode_running():
         return False
 
+    # Xoá status cũ để không đọc nhầm kết quả lần chạy trước
+    if status_file:
+        clear_status(status_file)
+
     # 3. Focus VS Code
     print("[control_jsx] Focus VS Code...")
     if not focus_window("Visual Studio Code"):
@@ -146,8 +208,19 @@ def run_jsx_in_premiere(jsx_path, premiere_version="2022", wait_seconds=10):
     send_keys('{ENTER}')
     sleep(1)
 
-    print(f"[control_jsx] Script đang chạy... (chờ {wait_seconds}s)")
-    sleep(wait_seconds)
+    success = True
+    if status_file:
+        print(f"[control_jsx] Script đang chạy... (chờ status: {status_file})")
+        status = wait_for_status(
+            status_file,
+            timeout=timeout,
+            on_progress=progress_cb,
+        )
+        success = status.get("state") == "done"
+        print(f"[control_jsx] Kết thúc sau {status.get('elapsed', 0)}s: {format_status(status)}")
+    else:
+        print(f"[control_jsx] Script đang chạy... (chờ {wait_seconds}s)")
+        sleep(wait_seconds)
 
     # 6. Focus lại Premiere để xem kết quả
     print("[control_jsx] Focus Premiere Pro...")
@@ -159,8 +232,36 @@ def run_jsx_in_premiere(jsx_path, premiere_version="2022", wait_seconds=10):
         send_keys('{ESC}')
         sleep(0.2)
 
-    print("[control_jsx] ✓ Hoàn thành!")
-    return True
+    if success:
+        print("[control_jsx] ✓ Hoàn thành!")
+    return success
+
+
+def start_listener(premiere_version="2022", timeout=30):
+    """
+    Khởi động jsxListener.jsx (1 lần qua VS Code) nếu chưa chạy,
+    chờ heartbeat đầu tiên. Các lần chạy JSX sau đi qua hàng đợi.
+    """
+    channel = JsxChannel()
+    if channel.listener_alive():
+        return True
+
+    channel.ensure_dirs()
+    run_jsx_in_premiere(LISTENER_JSX, premiere_version, wait_seconds=0, use_channel=False)
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if channel.listener_alive():
+            print("[control_jsx] ✓ jsxListener đang chạy")
+            return True
+        sleep(0.2)
+    print("[control_jsx] ERROR: jsxListener không phản hồi")
+    return False
+
+
+def stop_listener():
+    """Dừng jsxListener (trả engine ExtendScript cho VS Code/người dùng)"""
+    return JsxChannel().stop_listener()
 
 
 def run_jsx_batch(jsx_files, premiere_version="2022", wait_per_script=10):
@@ -170,7 +271,7 @@ def run_jsx_batch(jsx_files, premiere_version="2022", wait_per_script=10):
     Args:
         jsx_files: List các đường dẫn JSX
         premiere_version: Phiên bản Premiere
-        wait_per_script: Thời gian chờ mỗi script
+        wait_per_script: Thời gian chờ mỗi script (script không ghi status)
 
     Returns:
         int: Số scripts chạy thành công
@@ -178,7 +279,12 @@ def run_jsx_batch(jsx_files, premiere_version="2022", wait_per_script=10):
     success_count = 0
 
     for jsx_path in jsx_files:
-        if run_jsx_in_premiere(jsx_path, premiere_version, wait_per_script):
+        if run_jsx_in_premiere(
+            jsx_path,
+            premiere_version,
+            wait_per_script,
+            status_file=status_file_for_script(jsx_path),
+        ):
             success_count += 1
         else:
             print(f"[control_jsx] FAILED: {jsx_path}")
@@ -198,5 +304,5 @@ if __name__ == "__main__":
     jsx_path = sys.argv[1]
     version = sys.argv[2] if len(sys.argv) > 2 else "2022"
 
-    success = run_jsx_in_premiere(jsx_path, version)
+    success = run_jsx_in_premiere(jsx_path, version, status_file=status_file_for_script(jsx_path))
     sys.exit(0 if success else 1)
@@ -1,8 +1,10 @@
 // =============================================================
-// SCRIPT: MAGNETIC CUT + FORCE DELETE ALL AUDIO
+// SCRIPT: MAGNETIC CUT (VIDEO-ONLY)
 // =============================================================
 
 var ENABLE_ALERTS = true; 
+// Batch từ runAll.jsx: không popup giữa các project
+if (typeof RUNALL_BATCH_MODE !== 'undefined' && RUNALL_BATCH_MODE) ENABLE_ALERTS = false;
 
 function notify(msg) {
     $.writeln('[Script] ' + msg);
@@ -13,6 +15,10 @@ function notify(msg) {
 // 1. CONFIG & HELPERS
 // =============================================================
 var INDEX_PAD = 4; 
+// Subclip chỉ-video (takeAudio = 0) gom vào bin này, dùng lại giữa các lần chạy
+var VIDEO_ONLY_BIN = '_VideoOnly';
+// Subclip cắt sẵn (core/premierCore/subclips.py, cột clip_path) import vào bin này
+var SUBCLIP_BIN = '_subclips';
 
 function _joinPath(a, b) {
     if (!a) return b || '';
@@ -122,6 +128,10 @@ function readTimelineCSVFile(filePath) {
         var idxVidIx = getCol(['video_index', 'videoidx']);
         var idxBin = getCol(['bin_name', 'keyword', 'name']);
         var idxChar = getCol(['character', 'char']);
+        var idxVideoId = getCol(['video_id']);
+        var idxClipPath = getCol(['clip_path']);
+        var idxClipIn = getCol(['clip_in']);
+        var idxMediaPath = getCol(['media_path']);
 
         var out = [];
         for (var r = 1; r < lines.length; r++) {
@@ -138,6 +148,11 @@ function readTimelineCSVFile(filePath) {
 
             var bName = (idxBin >= 0) ? cols[idxBin] : '';
             var cName = (idxChar >= 0) ? cols[idxChar] : '';
+            var videoId = (idxVideoId >= 0 && cols[idxVideoId]) ? cols[idxVideoId].replace(/^\s+|\s+$/g, '') : '';
+            var clipPath = (idxClipPath >= 0 && cols[idxClipPath]) ? cols[idxClipPath] : '';
+            var mediaPath = (idxMediaPath >= 0 && cols[idxMediaPath]) ? cols[idxMediaPath] : '';
+            var clipIn = (idxClipIn >= 0) ? parseFloat(cols[idxClipIn]) : 0;
+            if (isNaN(clipIn)) clipIn = 0;
             var vIdx = (idxVidIx >= 0) ? parseInt(cols[idxVidIx], 10) : 0;
             if (isNaN(vIdx)) vIdx = 0;
 
@@ -147,7 +162,11 @@ function readTimelineCSVFile(filePath) {
                 srcStart: srcS,
                 srcEnd: srcE,
                 duration: duration,
-                videoIndex: vIdx
+                videoIndex: vIdx,
+                videoId: videoId,
+                clipPath: clipPath,
+                clipIn: clipIn,
+                mediaPath: mediaPath
             });
         }
         return out;
@@ -165,45 +184,110 @@ function isVideoFile(item) {
     return true;
 }
 
-function binHasVideo(binItem) {
-    if (!binItem || !binItem.children) return false;
-    for (var i = 0; i < binItem.children.numItems; i++) {
-        var it = binItem.children[i];
-        if (it.type === 1 && isVideoFile(it)) return true;
-    }
-    return false;
-}
-
 function normalizeName(name) {
     if (!name) return "";
     return String(name).toLowerCase().replace(/^\d+[_\-\.]/, '').replace(/[_\-\.]/g, ' ').replace(/^\s+|\s+$/g, '');
 }
 
-function _findBinByNameOrAlias(binName) {
-    if (!app.project || !app.project.rootItem) return null;
+/**
+ * Cache bin/clip cho 1 lần processTimeline: duyệt project 1 lần, sau đó
+ * tra bin theo tên chuẩn hoá (normalizeName, có alias dạng chứa nhau) và
+ * clip theo index đã pad, không đọc lại DOM Premiere cho mỗi dòng CSV.
+ */
+function buildLookupCache() {
+    var cache = { bins: [], byNorm: {}, resolved: {}, clipMaps: {} };
+    if (app.project && app.project.rootItem) collectBins(app.project.rootItem, cache);
+    $.writeln('[CACHE] ' + cache.bins.length + ' bins');
+    return cache;
+}
+
+function collectBins(folder, cache) {
+    if (!folder.children) return;
+    var children = folder.children;
+    var n = children.numItems;
+    for (var i = 0; i < n; i++) {
+        var it = children[i];
+        if (it.type === 2) {
+            if (String(it.name) === VIDEO_ONLY_BIN || String(it.name) === SUBCLIP_BIN) continue;
+            var entry = { bin: it, name: String(it.name), norm: normalizeName(it.name), clipMap: null };
+            cache.bins.push(entry);
+            if (!cache.byNorm[entry.norm]) cache.byNorm[entry.norm] = [];
+            cache.byNorm[entry.norm].push(entry);
+            collectBins(it, cache);
+        }
+    }
+}
+
+/** items của _index_map.json (core/downloadTool/index_map.py) trong thư mục chứa clip */
+function readIndexMapItems(clip) {
+    try {
+        var dir = new File(clip.getMediaPath()).parent;
+        var raw = _readTextFile(_joinPath(dir.fsName, '_index_map.json'));
+        if (!raw) return [];
+        var data = eval('(' + raw + ')');
+        return (data && data.items) ? data.items : [];
+    } catch (e) { return []; }
+}
+
+/**
+ * Clip video của bin, tạo 1 lần/bin:
+ *  - byId:  '<video id>' -> clip (file <id>.mp4 do down_by_yt đặt tên)
+ *  - byKey: '<index pad>' -> clip, theo _index_map.json của thư mục nguồn,
+ *           file kiểu cũ (tên bắt đầu bằng index) nếu không có map
+ */
+function getClipMap(entry) {
+    if (entry.clipMap) return entry.clipMap;
+    var map = { clips: [], byKey: {}, byId: {} };
+    var children = entry.bin.children;
+    var n = children ? children.numItems : 0;
+    for (var i = 0; i < n; i++) {
+        var it = children[i];
+        if (it && it.type === 1 && isVideoFile(it)) {
+            map.clips.push(it);
+            var name = String(it.name);
+            var stem = name.replace(/\.[^\.]+$/, '');
+            if (!map.byId.hasOwnProperty(stem)) map.byId[stem] = it;
+            var key = name.substring(0, INDEX_PAD);
+            if (!map.byKey.hasOwnProperty(key)) map.byKey[key] = it;
+        }
+    }
+    if (map.clips.length) {
+        var items = readIndexMapItems(map.clips[0]);
+        for (var j = 0; j < items.length; j++) {
+            var id = String(items[j].id || '');
+            if (id && map.byId.hasOwnProperty(id)) map.byKey[padNumber(items[j].index, INDEX_PAD)] = map.byId[id];
+        }
+    }
+    entry.clipMap = map;
+    return map;
+}
+
+function _findBinByNameOrAlias(binName, cache) {
     if (!binName) return null;
+    if (!cache) cache = buildLookupCache();
     var reqNorm = normalizeName(binName);
-    var candidates = [];
-    findBinsRecursive(app.project.rootItem, reqNorm, candidates);
-    if (candidates.length === 0) return null;
-    
-    for (var i = 0; i < candidates.length; i++) {
-        if (candidates[i].name.toLowerCase().indexOf("img_") === -1 && binHasVideo(candidates[i])) return candidates[i];
+    if (cache.resolved.hasOwnProperty(reqNorm)) return cache.resolved[reqNorm];
+
+    // Khớp đúng tên chuẩn hoá trước, sau đó mới tới alias (tên chứa nhau)
+    var candidates = cache.byNorm[reqNorm] ? cache.byNorm[reqNorm].slice(0) : [];
+    for (var i = 0; i < cache.bins.length; i++) {
+        var e = cache.bins[i];
+        if (e.norm === reqNorm) continue;
+        if (e.norm.indexOf(reqNorm) >= 0 || reqNorm.indexOf(e.norm) >= 0) candidates.push(e);
     }
-    for (var j = 0; j < candidates.length; j++) if (binHasVideo(candidates[j])) return candidates[j];
-    return candidates[0];
-}
 
-function findBinsRecursive(folder, reqNorm, results) {
-    if (!folder.children) return;
-    for (var i = 0; i < folder.children.numItems; i++) {
-        var it = folder.children[i];
-        if (it.type === 2) { 
-            var itNorm = normalizeName(it.name);
-            if (itNorm.indexOf(reqNorm) >= 0 || reqNorm.indexOf(itNorm) >= 0) results.push(it);
-            findBinsRecursive(it, reqNorm, results);
+    var found = null;
+    if (candidates.length > 0) {
+        for (var a = 0; a < candidates.length && !found; a++) {
+            if (candidates[a].name.toLowerCase().indexOf("img_") === -1 && getClipMap(candidates[a]).clips.length > 0) found = candidates[a];
+        }
+        for (var b = 0; b < candidates.length && !found; b++) {
+            if (getClipMap(candidates[b]).clips.length > 0) found = candidates[b];
         }
+        if (!found) found = candidates[0];
     }
+    cache.resolved[reqNorm] = found;
+    return found;
 }
 
 function padNumber(num, size) {
@@ -212,23 +296,150 @@ function padNumber(num, size) {
     return s;
 }
 
-function resolveClipFromBin(binItem, idx) {
-    if (!binItem || idx < 0) return null;
-    var clips = [];
-    for (var i = 0; i < binItem.children.numItems; i++) {
-        var it = binItem.children[i];
-        if (it && it.type === 1 && isVideoFile(it)) clips.push(it);
+function resolveClipFromBin(binEntry, idx, videoId) {
+    if (!binEntry) return null;
+    var map = getClipMap(binEntry);
+    if (map.clips.length === 0) return null;
+    if (videoId && map.byId.hasOwnProperty(videoId)) return map.byId[videoId];
+    if (idx < 0) return null;
+    var searchKey = padNumber(idx, INDEX_PAD);
+    if (searchKey.length === INDEX_PAD) {
+        if (map.byKey.hasOwnProperty(searchKey)) return map.byKey[searchKey];
+    } else {
+        for (var j = 0; j < map.clips.length; j++) if (map.clips[j].name.indexOf(searchKey) === 0) return map.clips[j];
+    }
+    return map.clips[idx % map.clips.length];
+}
+
+function _mediaKey(p) {
+    return String(p || '').replace(/\\/g, '/').toLowerCase();
+}
+
+function _indexMediaPaths(folder, map) {
+    var children = folder.children;
+    var n = children ? children.numItems : 0;
+    for (var i = 0; i < n; i++) {
+        var it = children[i];
+        if (!it) continue;
+        if (it.type === 2) {
+            // Subclip _VideoOnly có cùng media path với clip gốc
+            if (String(it.name) !== VIDEO_ONLY_BIN) _indexMediaPaths(it, map);
+            continue;
+        }
+        var mp = '';
+        try { mp = it.getMediaPath(); } catch (e) {}
+        if (mp && !map.hasOwnProperty(_mediaKey(mp))) map[_mediaKey(mp)] = it;
+    }
+    return map;
+}
+
+/**
+ * Map media path -> item project, duyệt project 1 lần, cho cột clip_path
+ * (subclip cắt sẵn) và media_path (file import_list.py đã chọn cho dòng).
+ * Subclip chưa có trong project import chung 1 lệnh importFiles vào SUBCLIP_BIN.
+ */
+function resolveMediaItems(entries) {
+    var wanted = [];
+    var byMediaPath = false;
+    for (var i = 0; i < entries.length; i++) {
+        if (entries[i].clipPath && _fileExists(entries[i].clipPath)) wanted.push(entries[i].clipPath);
+        if (entries[i].mediaPath) byMediaPath = true;
+    }
+    if (!wanted.length && !byMediaPath) return {};
+
+    var map = _indexMediaPaths(app.project.rootItem, {});
+    var missing = [];
+    var seen = {};
+    for (var j = 0; j < wanted.length; j++) {
+        var key = _mediaKey(wanted[j]);
+        if (!map.hasOwnProperty(key) && !seen[key]) { seen[key] = true; missing.push(new File(wanted[j]).fsName); }
     }
-    if (clips.length === 0) return null;
-    var searchKey = padNumber(idx, INDEX_PAD); 
-    for (var j = 0; j < clips.length; j++) if (clips[j].name.indexOf(searchKey) === 0) return clips[j];
-    return clips[idx % clips.length];
+    if (missing.length) {
+        var root = app.project.rootItem;
+        var bin = null;
+        for (var b = 0; b < root.children.numItems; b++) {
+            var c = root.children[b];
+            if (c && c.type === 2 && c.name === SUBCLIP_BIN) { bin = c; break; }
+        }
+        if (!bin) bin = root.createBin(SUBCLIP_BIN);
+        try { app.project.importFiles(missing, true, bin, false); } catch (e) { $.writeln('[WARN] Import subclips: ' + e); }
+        _indexMediaPaths(bin, map);
+        $.writeln('[SUBCLIP] Imported ' + missing.length + ' subclip(s)');
+    }
+    return map;
+}
+
+/**
+ * Clip trên track chứa thời điểm t. Chèn kiểu magnetic nên clip mới
+ * thường là clip cuối -> thử trước, còn lại tìm nhị phân theo start.
+ */
+function findTrackClipAt(track, t) {
+    var clips = track.clips;
+    var n = clips.numItems;
+    if (n === 0) return null;
+    var last = clips[n - 1];
+    if (last.start.seconds <= t && last.end.seconds > t) return last;
+
+    var lo = 0, hi = n - 2;
+    while (lo <= hi) {
+        var mid = (lo + hi) >> 1;
+        var c = clips[mid];
+        if (c.end.seconds <= t) lo = mid + 1;
+        else if (c.start.seconds > t) hi = mid - 1;
+        else return c;
+    }
+    return null;
 }
 
 // =============================================================
-// 4. CLEANUP (DELETE ALL AUDIO & CLOSE GAPS)
+// 4. VIDEO-ONLY SOURCE + CLEANUP
 // =============================================================
 
+/**
+ * Subclip chỉ-video phủ toàn bộ clip nguồn, 1 subclip / clip nguồn:
+ * chèn subclip thì audio không bao giờ vào sequence, khỏi xoá về sau.
+ * Không có hard boundary nên vẫn đặt In/Out từng dòng CSV như clip gốc.
+ * Trả về null nếu không tạo được (phiên bản Premiere không hỗ trợ...).
+ */
+function getVideoOnlySource(clipItem, binEntry, cache) {
+    if (!cache.videoOnly) {
+        var state = { bin: null, byName: {}, failed: false };
+        var root = app.project.rootItem;
+        for (var i = 0; i < root.children.numItems; i++) {
+            var c = root.children[i];
+            if (c && c.type === 2 && c.name === VIDEO_ONLY_BIN) { state.bin = c; break; }
+        }
+        if (state.bin) {
+            for (var j = 0; j < state.bin.children.numItems; j++) {
+                var existing = state.bin.children[j];
+                if (existing) state.byName[existing.name] = existing;
+            }
+        }
+        cache.videoOnly = state;
+    }
+    var vo = cache.videoOnly;
+    if (vo.failed) return null;
+
+    // Tên clip có thể trùng giữa các bin -> kèm tên bin
+    var subName = binEntry.name + '__' + clipItem.name;
+    if (vo.byName.hasOwnProperty(subName)) return vo.byName[subName];
+
+    try {
+        try { clipItem.clearInPoint(4); clipItem.clearOutPoint(4); } catch(e){}
+        var endTicks = clipItem.getOutPoint().ticks;
+        var sub = clipItem.createSubClip(subName, '0', endTicks, 0, 1, 0); // hardBoundaries, takeVideo, takeAudio
+        if (!sub) throw new Error('createSubClip returned null');
+        if (!vo.bin) vo.bin = app.project.rootItem.createBin(VIDEO_ONLY_BIN);
+        try { sub.moveBin(vo.bin); } catch(e){}
+        vo.byName[subName] = sub;
+        return sub;
+    } catch (e) {
+        $.writeln('[WARN] Khong tao duoc subclip video-only, dung clip goc + xoa audio: ' + e);
+        vo.failed = true;
+        return null;
+    }
+}
+
 function deleteAllAudioTracks(seq) {
     if (!seq) return;
     // Duyet qua tat ca Audio Tracks
@@ -285,17 +496,14 @@ function processTimeline(csvPath) {
     $.writeln('=== BAT DAU CAT (MAGNETIC MODE) ===');
     var successCount = 0;
     var cursorTime = 0;
+    var cache = buildLookupCache();
+    var mediaMap = resolveMediaItems(entries);
+    var audioInserted = false; // co dong nao phai chen clip goc (kem audio)
+    var gapsPossible = false;  // co dong nao khong doc duoc diem cuoi thuc te
 
     for (var i = 0; i < entries.length; i++) {
         var item = entries[i];
         
-        var binItem = _findBinByNameOrAlias(item.binName);
-        if (!binItem && item.character) binItem = _findBinByNameOrAlias(item.character);
-        if (!binItem) { $.writeln('[SKIP] Line '+(i+1)+': Bin not found'); continue; }
-        
-        var clipItem = resolveClipFromBin(binItem, item.videoIndex);
-        if (!clipItem) { $.writeln('[SKIP] Line '+(i+1)+': Clip not found'); continue; }
-
         var inPoint = item.srcStart;
         var outPoint = item.srcEnd;
         var duration = outPoint - inPoint;
@@ -306,6 +514,31 @@ function processTimeline(csvPath) {
              outPoint = duration;
         }
 
+        // Subclip cắt sẵn: chỉ có video, In tính trong file subclip
+        var clipItem = item.clipPath ? mediaMap[_mediaKey(item.clipPath)] : null;
+        if (clipItem) {
+            inPoint = item.clipIn;
+            outPoint = inPoint + duration;
+        } else {
+            // File import_list.py đã chọn (cột media_path): không chọn lại theo
+            // index trong bin, bin import chọn lọc chỉ có tập con file
+            var binItem = null;
+            clipItem = item.mediaPath ? (mediaMap[_mediaKey(item.mediaPath)] || null) : null;
+            if (clipItem) {
+                binItem = { name: decodeURI(new File(item.mediaPath).parent.name) };
+            } else {
+                binItem = _findBinByNameOrAlias(item.binName, cache);
+                if (!binItem && item.character) binItem = _findBinByNameOrAlias(item.character, cache);
+                if (!binItem) { $.writeln('[SKIP] Line '+(i+1)+': Bin not found'); continue; }
+
+                clipItem = resolveClipFromBin(binItem, item.videoIndex, item.videoId);
+                if (!clipItem) { $.writeln('[SKIP] Line '+(i+1)+': Clip not found'); continue; }
+            }
+
+            var source = getVideoOnlySource(clipItem, binItem, cache);
+            if (source) clipItem = source; else audioInserted = true;
+        }
+
         try {
             // Set In/Out
             try { clipItem.clearInPoint(4); clipItem.clearOutPoint(4); } catch(e){}
@@ -320,21 +553,24 @@ function processTimeline(csvPath) {
                 trackV2.overwriteClip(clipItem, cursorTime);
                 
                 // Tim clip vua chen de chinh sua
-                var checkT = cursorTime + 0.01;
-                for (var k=0; k<trackV2.clips.numItems; k++){
-                    var c = trackV2.clips[k];
-                    if (c.start.seconds <= checkT && c.end.seconds > checkT) {
-                        c.name = item.binName; // Doi ten
-                        c.disabled = true;     // Tat mat
-                        break;
-                    }
+                var c = findTrackClipAt(trackV2, cursorTime + 0.01);
+                if (c) {
+                    c.name = item.binName; // Doi ten
+                    c.disabled = true;     // Tat mat
                 }
             }
 
             $.writeln('[OK] ' + item.binName + ' inserted at ' + cursorTime.toFixed(2) + 's');
             
-            // CAP NHAT CON TRO: Nhay den cuoi clip vua chen
-            cursorTime += duration; 
+            // CAP NHAT CON TRO: Nhay den cuoi thuc te cua clip vua chen
+            // (nguon ngan hon Out thi clip ngan lai, chen tiep sat vao -> khong ho)
+            var placed = findTrackClipAt(trackV1, cursorTime + 0.01);
+            if (placed) {
+                cursorTime = placed.end.seconds;
+            } else {
+                cursorTime += duration;
+                gapsPossible = true;
+            }
             successCount++;
 
         } catch (e) {
@@ -342,15 +578,18 @@ function processTimeline(csvPath) {
         }
     }
     
-    // === FINAL CLEANUP: DELETE ALL AUDIO & CLOSE GAPS ===
-    $.writeln('[INFO] Deleting ALL Audio Tracks...');
-    deleteAllAudioTracks(seq);
-    
-    $.writeln('[INFO] Cleaning up visual gaps...');
-    closeGaps(trackV1);
-    if (trackV2) closeGaps(trackV2);
+    // === FINAL CLEANUP: chi khi duong fallback de lai audio / khoang den ===
+    if (audioInserted) {
+        $.writeln('[INFO] Fallback path inserted audio -> deleting audio tracks...');
+        deleteAllAudioTracks(seq);
+    }
+    if (gapsPossible) {
+        $.writeln('[INFO] Cleaning up visual gaps...');
+        closeGaps(trackV1);
+        if (trackV2) closeGaps(trackV2);
+    }
 
-    notify("Hoan tat: " + successCount + " clips. Audio da xoa sach se.");
+    notify("Hoan tat: " + successCount + " clips (video-only" + (audioInserted ? ", audio fallback da xoa" : "") + ").");
 }
 
 // =============================================================
@@ -54,10 +54,70 @@ var ROOT_DIR = (function () {
 
 var DATA_DIR = joinPath(ROOT_DIR, 'data');
 
+/**
+ * Status/heartbeat cho Python (core/premierCore/jsx_status.py):
+ * data/_status_<script>.json với state running | done | error
+ */
+var STATUS_SCRIPT = 'extractTrack3Keywords';
+var STATUS_PATH = joinPath(DATA_DIR, '_status_' + STATUS_SCRIPT + '.json');
+
+function jsonQuote(s) {
+    return '"' + String(s)
+        .replace(/\\/g, '\\\\')
+        .replace(/"/g, '\\"')
+        .replace(/\r/g, '\\r')
+        .replace(/\n/g, '\\n')
+        .replace(/\t/g, '\\t') + '"';
+}
+
+function jsonValue(v) {
+    if (v === null || v === undefined) return 'null';
+    if (typeof v === 'number') return isFinite(v) ? String(v) : 'null';
+    if (typeof v === 'boolean') return v ? 'true' : 'false';
+    return jsonQuote(v);
+}
+
+function writeStatus(state, progress, message, result) {
+    var parts = [];
+    if (result) {
+        for (var k in result) {
+            if (result.hasOwnProperty(k)) parts.push(jsonQuote(k) + ': ' + jsonValue(result[k]));
+        }
+    }
+    var json = '{"script": ' + jsonQuote(STATUS_SCRIPT) +
+        ', "state": ' + jsonQuote(state) +
+        ', "progress": ' + jsonValue(Math.round((progress || 0) * 1000) / 1000) +
+        ', "message": ' + jsonQuote(message || '') +
+        ', "result": {' + parts.join(', ') + '}' +
+        ', "updated": ' + (new Date()).getTime() + '}';
+    try {
+        var f = new File(STATUS_PATH);
+        f.encoding = 'UTF-8';
+        if (f.open('w')) {
+            f.write(json);
+            f.close();
+        }
+    } catch (e) {
+        log('WARN: Cannot write status: ' + e);
+    }
+}
+
+/**
+ * Job từ jsxListener.jsx: JOB_PARAMS ghi đè giá trị trong path.txt
+ */
+function applyJobParams(cfg) {
+    if (typeof JOB_PARAMS === 'undefined' || !JOB_PARAMS) return cfg;
+    if (!cfg) cfg = {};
+    for (var k in JOB_PARAMS) {
+        if (JOB_PARAMS.hasOwnProperty(k)) cfg[k] = String(JOB_PARAMS[k]);
+    }
+    return cfg;
+}
+
 function readPathConfig() {
     var pathTxt = joinPath(DATA_DIR, 'path.txt');
     log('Reading config: ' + pathTxt);
-    if (!fileExists(pathTxt)) return null;
+    if (!fileExists(pathTxt)) return applyJobParams(null);
 
     var lines = readLines(pathTxt);
     var cfg = {};
@@ -71,7 +131,7 @@ function readPathConfig() {
             cfg[key] = val;
         }
     }
-    return cfg;
+    return applyJobParams(cfg);
 }
 
 /**
@@ -147,9 +207,14 @@ function extractTrack3Keywords(sequence) {
 
     var keywords = [];
 
-    for (var i = 0; i < track3.clips.numItems; i++) {
+    var numClips = track3.clips.numItems;
+    for (var i = 0; i < numClips; i++) {
         var clip = track3.clips[i];
 
+        if (i % 20 === 0) {
+            writeStatus('running', 0.1 + 0.7 * i / numClips, 'Reading clip ' + (i + 1) + '/' + numClips);
+        }
+
         // Lấy timecode
         var startTicks = clip.start.ticks;
         var endTicks = clip.end.ticks;
@@ -250,10 +315,12 @@ function exportKeywordsToCSV(keywords, outputPath) {
  */
 function main() {
     log('=== START EXTRACT TRACK 3 KEYWORDS ===');
+    writeStatus('running', 0, 'Start');
 
     // Đọc config
     var cfg = readPathConfig();
     if (!cfg) {
+        writeStatus('error', 1, 'data/path.txt not found');
         alert('ERROR: Không tìm thấy data/path.txt');
         return;
     }
@@ -262,6 +329,7 @@ function main() {
     var seqName = cfg.sequence_name || 'Main';
 
     if (!dataFolder) {
+        writeStatus('error', 1, 'data_folder not defined');
         alert('ERROR: data_folder không được định nghĩa trong path.txt');
         return;
     }
@@ -272,6 +340,7 @@ function main() {
     // Lấy active sequence
     var seq = app.project.activeSequence;
     if (!seq) {
+        writeStatus('error', 1, 'No active sequence');
         alert('ERROR: Không có sequence nào được mở.\nHãy mở sequence trước khi chạy script.');
         return;
     }
@@ -282,6 +351,7 @@ function main() {
     var keywords = extractTrack3Keywords(seq);
 
     if (keywords.length === 0) {
+        writeStatus('error', 1, 'No keywords in Track 3');
         alert('WARNING: Không tìm thấy keywords nào trong Track 3');
         return;
     }
@@ -290,7 +360,8 @@ function main() {
 
     // Export ra JSON
     var jsonPath = joinPath(dataFolder, 'track3_keywords.json');
-    if (exportKeywordsToJSON(keywords, jsonPath)) {
+    var jsonOk = exportKeywordsToJSON(keywords, jsonPath);
+    if (jsonOk) {
         log('Exported JSON: ' + jsonPath);
     } else {
         log('ERROR: Failed to export JSON');
@@ -305,8 +376,23 @@ function main() {
     }
 
     log('=== DONE ===');
+    // Ghi status trước alert: alert chặn engine tới khi được đóng
+    if (jsonOk) {
+        writeStatus('done', 1, 'Exported ' + keywords.length + ' keywords', {
+            count: keywords.length,
+            json_path: jsonPath,
+            csv_path: csvPath
+        });
+    } else {
+        writeStatus('error', 1, 'Failed to export JSON: ' + jsonPath);
+    }
     alert('Đã export ' + keywords.length + ' keywords từ Track 3\n\nJSON: ' + jsonPath + '\nCSV: ' + csvPath);
 }
 
 // Run
-main();
+try {
+    main();
+} catch (e) {
+    writeStatus('error', 1, 'Exception: ' + e);
+    log('ERROR: ' + e);
+}
@@ -0,0 +1,576 @@
+"""
+fcp_xml.py
+
+Sinh cả timeline thành 1 file Final Cut Pro 7 XML (xmeml v4) để Premiere
+import trong 1 lần (importInterchange.jsx), thay cho việc cutAndPush.jsx /
+autoCutAndPushV4.jsx chèn từng clip qua ExtendScript.
+
+Nguồn dữ liệu:
+    - timeline_export_merged.csv + thư mục resource (mỗi thư mục con = 1 bin,
+      giống importResource.jsx): chọn bin/clip như cutAndPush.jsx, nối liền
+      nhau trên V1 (+ clip nhãn tắt trên V2), không có audio.
+    - scene_matches.json: assignments (hoặc best match) đặt đúng vị trí
+      keyword trên V4 như autoCutAndPushV4.jsx.
+
+Thuần Python (chỉ stdlib), chạy offline:
+    python core/premierCore/fcp_xml.py --csv data/<slug>/timeline_export_merged.csv \
+        --resource <project>/resource --out data/<slug>/timeline.xml
+    python core/premierCore/fcp_xml.py --scene-matches data/<slug>/scene_matches.json \
+        --out data/<slug>/timeline_v4.xml
+
+OpenTimelineIO không dùng: Premiere import FCP7 XML trực tiếp, không cần
+thêm dependency.
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import quote, unquote
+
+try:
+    from ..downloadTool.catalog import ResourceCatalog
+except (ImportError, ValueError):
+    _ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    if _ROOT not in sys.path:
+        sys.path.insert(0, _ROOT)
+    from core.downloadTool.catalog import ResourceCatalog
+
+INDEX_PAD = 4  # giống cutAndPush.jsx
+MIN_DURATION_SEC = 0.1
+DEFAULT_FPS = 30.0
+DEFAULT_WIDTH = 1920
+DEFAULT_HEIGHT = 1080
+V4_TRACK_INDEX = 3
+INDEX_MAP_FILENAME = "_index_map.json"  # giống core/downloadTool/index_map.py
+
+VIDEO_EXTS = {".mp4", ".mov", ".mxf", ".mkv", ".avi", ".m4v", ".webm", ".wmv", ".mts"}
+
+PathLike = Union[str, Path]
+
+
+# =============================
+# Clip resolver (bin thư mục + index)
+# =============================
+
+def normalize_name(name: str) -> str:
+    """Giống normalizeName() trong cutAndPush.jsx."""
+    s = str(name or "").lower()
+    s = re.sub(r"^\d+[_\-.]", "", s)
+    s = re.sub(r"[_\-.]", " ", s)
+    return s.strip()
+
+
+def _read_index_map_items(folder: Path) -> List[Dict[str, Any]]:
+    """items của <folder>/_index_map.json (core/downloadTool/index_map.py), [] nếu không có."""
+    path = folder / INDEX_MAP_FILENAME
+    if not path.is_file():
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return list(json.load(f).get("items") or [])
+    except (OSError, ValueError, AttributeError):
+        return []
+
+
+class ClipResolver:
+    """
+    Chọn file video theo (bin_name, video_index) như cutAndPush.jsx, nhưng
+    trên thư mục resource thay vì project Premiere (danh sách thư mục/file
+    lấy từ catalog SQLite của resource, core/downloadTool/catalog.py; không
+    mở được catalog thì duyệt thư mục):
+      - bin: thư mục con (đệ quy), khớp tên chuẩn hoá trước rồi tới alias
+        (tên chứa nhau); ưu tiên bin không phải img_ có video
+      - clip: theo video_id (file <id>.*), rồi theo index trong
+        `_index_map.json` của thư mục (down_by_yt), rồi file có tên bắt đầu
+        bằng index pad INDEX_PAD (kiểu cũ), không có thì
+        clips[index % len(clips)] (thứ tự tên file)
+    """
+
+    def __init__(self, resource_dir: PathLike, index_pad: int = INDEX_PAD,
+                 catalog: Optional[ResourceCatalog] = None):
+        """catalog: catalog đang mở (đã rescan) của resource_dir; None -> tự mở + rescan."""
+        self.resource_dir = Path(resource_dir)
+        self.index_pad = index_pad
+        self.bins: List[Dict[str, Any]] = []
+        self._resolved: Dict[str, Optional[Dict[str, Any]]] = {}
+        if not self.resource_dir.is_dir():
+            return
+        try:
+            self._collect_catalog(catalog)
+        except Exception as e:
+            print(f"[fcp_xml][WARN] Catalog lỗi ({e}) -> duyệt thư mục")
+            self.bins = []
+            self._collect(self.resource_dir)
+
+    def _collect_catalog(self, catalog: Optional[ResourceCatalog]) -> None:
+        cat = catalog or ResourceCatalog(str(self.resource_dir))
+        try:
+            if catalog is None:
+                cat.rescan()
+            by_dir: Dict[str, List[Path]] = {}
+            for row in cat.entries(("video",)):
+                rel_dir = row["path"].rsplit("/", 1)[0] if "/" in row["path"] else ""
+                by_dir.setdefault(rel_dir, []).append(Path(row["abs_path"]))
+            # Thứ tự duyệt cây theo tên như _collect
+            rel_dirs = cat.dirs()
+        finally:
+            if catalog is None:
+                cat.close()
+        for rel_dir in rel_dirs:
+            clips = [p for p in by_dir.get(rel_dir, []) if p.suffix.lower() in VIDEO_EXTS]
+            self._add_bin(self.resource_dir.joinpath(*rel_dir.split("/")), clips)
+
+    def _collect(self, folder: Path) -> None:
+        # Bỏ thư mục phụ (_proxy, _original, _subclips...) như catalog
+        for sub in sorted(p for p in folder.iterdir() if p.is_dir() and not p.name.startswith((".", "_"))):
+            self._add_bin(sub, [p for p in sub.iterdir() if p.is_file() and p.suffix.lower() in VIDEO_EXTS])
+            self._collect(sub)
+
+    def _add_bin(self, sub: Path, clips: List[Path]) -> None:
+        clips = sorted(clips, key=lambda p: p.name.lower())
+        by_id: Dict[str, Path] = {}
+        by_key: Dict[str, Path] = {}
+        for p in clips:
+            by_id.setdefault(p.stem, p)
+            by_key.setdefault(p.name[: self.index_pad], p)
+        # Index map (down_by_yt đặt tên theo id) ưu tiên hơn tiền tố tên file
+        for item in _read_index_map_items(sub):
+            p = by_id.get(str(item.get("id") or ""))
+            if p is not None and isinstance(item.get("index"), int):
+                by_key[str(item["index"]).zfill(self.index_pad)] = p
+        self.bins.append({"name": sub.name, "norm": normalize_name(sub.name), "clips": clips,
+                          "by_id": by_id, "by_key": by_key})
+
+    def find_bin(self, bin_name: str) -> Optional[Dict[str, Any]]:
+        if not bin_name:
+            return None
+        req = normalize_name(bin_name)
+        if req in self._resolved:
+            return self._resolved[req]
+
+        exact = [b for b in self.bins if b["norm"] == req]
+        alias = [b for b in self.bins if b["norm"] != req and (req in b["norm"] or b["norm"] in req)]
+        candidates = exact + alias
+
+        found = next((b for b in candidates if "img_" not in b["name"].lower() and b["clips"]), None)
+        if found is None:
+            found = next((b for b in candidates if b["clips"]), None)
+        if found is None and candidates:
+            found = candidates[0]
+        self._resolved[req] = found
+        return found
+
+    def resolve(self, bin_name: str, video_index: int = 0, character: str = "", video_id: str = "") -> Optional[Path]:
+        b = self.find_bin(bin_name)
+        if b is None and character:
+            b = self.find_bin(character)
+        if b is None or not b["clips"]:
+            return None
+        if video_id and video_id in b["by_id"]:
+            return b["by_id"][video_id]
+        if video_index < 0:
+            return None
+        key = str(video_index).zfill(self.index_pad)
+        if len(key) == self.index_pad and key in b["by_key"]:
+            return b["by_key"][key]
+        for p in b["clips"]:
+            if p.name.startswith(key):
+                return p
+        return b["clips"][video_index % len(b["clips"])]
+
+
+# =============================
+# Nguồn clip
+# =============================
+
+def _to_float(v: Any, default: float = 0.0) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return default
+
+
+def read_timeline_csv(csv_path: PathLike) -> List[Dict[str, Any]]:
+    """
+    Đọc CSV với cùng bảng tên cột như readTimelineCSVFile() của cutAndPush.jsx.
+    "row": số thứ tự dòng dữ liệu (1 = dòng ngay sau header).
+    """
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        rows = [r for r in reader if r]
+    if len(rows) < 2:
+        return []
+
+    header = {h.strip().lower(): i for i, h in enumerate(rows[0])}
+
+    def col(names: List[str]) -> int:
+        return next((header[n] for n in names if n in header), -1)
+
+    i_s = col(["src_start", "source_start", "start_sec"])
+    i_e = col(["src_end", "source_end", "end_sec"])
+    i_d = col(["duration", "duration_sec"])
+    i_v = col(["video_index", "videoidx"])
+    i_b = col(["bin_name", "keyword", "name"])
+    i_c = col(["character", "char"])
+    i_id = col(["video_id"])
+    # Subclip cắt sẵn (core/premierCore/subclips.py): file + điểm In trong file
+    i_p = col(["clip_path"])
+    i_ci = col(["clip_in"])
+
+    def get(cols: List[str], i: int) -> str:
+        return cols[i] if 0 <= i < len(cols) else ""
+
+    out = []
+    for row_no, cols in enumerate(rows[1:], start=1):
+        if len(cols) < 2:
+            continue
+        src_s = _to_float(get(cols, i_s))
+        src_e = _to_float(get(cols, i_e))
+        duration = src_e - src_s if src_e > src_s else _to_float(get(cols, i_d))
+        if duration <= MIN_DURATION_SEC:
+            continue
+        try:
+            v_idx = int(get(cols, i_v))
+        except ValueError:
+            v_idx = 0
+        out.append({
+            "bin_name": get(cols, i_b),
+            "character": get(cols, i_c),
+            "src_start": src_s,
+            "src_end": src_e,
+            "duration": duration,
+            "video_index": v_idx,
+            "video_id": get(cols, i_id).strip(),
+            "clip_path": get(cols, i_p).strip(),
+            "clip_in": _to_float(get(cols, i_ci)),
+            "row": row_no,
+        })
+    return out
+
+
+def timeline_row_range(row: Dict[str, Any]) -> Tuple[float, float]:
+    """(In trong file nguồn, thời lượng) của 1 dòng CSV, như processTimeline()."""
+    duration = row["src_end"] - row["src_start"]
+    if duration <= MIN_DURATION_SEC:
+        return 0.0, row["duration"]
+    return row["src_start"], duration
+
+
+def clips_from_timeline_csv(
+    csv_path: PathLike,
+    resolver: ClipResolver,
+    label_track: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Clip nối liền nhau từ 0s trên V1 (magnetic như cutAndPush.jsx);
+    label_track thêm bản sao tắt, đặt tên theo bin trên V2.
+    """
+    clips: List[Dict[str, Any]] = []
+    cursor = 0.0
+    for n, row in enumerate(read_timeline_csv(csv_path), start=1):
+        src_in, duration = timeline_row_range(row)
+        if row["clip_path"] and os.path.isfile(row["clip_path"]):
+            path = Path(row["clip_path"])
+            src_in = row["clip_in"]
+        else:
+            path = resolver.resolve(row["bin_name"], row["video_index"], row["character"], row["video_id"])
+        if path is None:
+            print(f"[fcp_xml][SKIP] Line {n}: clip not found ({row['bin_name']})")
+            continue
+
+        clip = {
+            "path": str(path),
+            "name": path.name,
+            "track": 0,
+            "start": cursor,
+            "end": cursor + duration,
+            "in": src_in,
+            "out": src_in + duration,
+            "enabled": True,
+        }
+        clips.append(clip)
+        if label_track:
+            clips.append(dict(clip, track=1, name=row["bin_name"] or path.name, enabled=False))
+        cursor += duration
+    return clips
+
+
+def clips_from_scene_matches(
+    scene_matches_path: PathLike,
+    track: int = V4_TRACK_INDEX,
+) -> List[Dict[str, Any]]:
+    """
+    Clip theo vị trí keyword (start_seconds) trên track V4, giống
+    segmentsForKeyword() + processSceneMatches() của autoCutAndPushV4.jsx.
+    """
+    with open(scene_matches_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    keywords = data.get("keywords") or []
+    matches = data.get("matches") or {}
+    assignments = data.get("assignments") or []
+
+    # Thời lượng file từ metadata của matches (cho <file><duration>)
+    media_durations: Dict[str, float] = {}
+    for kw_matches in matches.values():
+        for m in kw_matches or []:
+            if m.get("video_path") and m.get("duration"):
+                media_durations[m["video_path"]] = _to_float(m["duration"])
+
+    clips: List[Dict[str, Any]] = []
+    for i, kw in enumerate(keywords):
+        segments = []
+        asg = assignments[i] if i < len(assignments) else None
+        if asg and asg.get("segments"):
+            segments = [(s["video_path"], _to_float(s.get("start_time")), _to_float(s.get("end_time")))
+                        for s in asg["segments"]]
+        else:
+            best = (matches.get(kw.get("keyword")) or [None])[0]
+            scenes = (best or {}).get("suggested_scenes") or []
+            if scenes:
+                segments = [(best["video_path"], _to_float(scenes[0].get("start_time")),
+                             _to_float(scenes[0].get("end_time")))]
+
+        start = _to_float(kw.get("start_seconds"))
+        offset = 0.0
+        for path, seg_s, seg_e in segments:
+            duration = (seg_e - seg_s) if len(segments) > 1 else _to_float(kw.get("duration_seconds"), seg_e - seg_s)
+            if duration <= 0:
+                continue
+            clips.append({
+                "path": path,
+                "name": os.path.basename(path),
+                "track": track,
+                "start": start + offset,
+                "end": start + offset + duration,
+                "in": seg_s,
+                "out": seg_s + duration,
+                "enabled": True,
+                "media_duration": media_durations.get(path, 0.0),
+            })
+            offset += seg_e - seg_s
+    return clips
+
+
+# =============================
+# FCP7 XML
+# =============================
+
+def _rate_params(fps: float) -> Dict[str, Any]:
+    """timebase nguyên + cờ NTSC (29.97 -> 30 NTSC, 23.976 -> 24 NTSC)."""
+    timebase = int(round(fps))
+    ntsc = abs(fps - timebase) > 1e-3
+    return {"timebase": timebase, "ntsc": ntsc, "fps": timebase * 1000 / 1001 if ntsc else float(timebase)}
+
+
+def _frames(seconds: float, rate: Dict[str, Any]) -> int:
+    return int(round(seconds * rate["fps"]))
+
+
+def path_to_url(path: str) -> str:
+    """C:/a b/x.mp4 -> file://localhost/C%3a/a%20b/x.mp4 (dạng Premiere ghi)."""
+    p = str(path).replace("\\", "/")
+    if re.match(r"^[A-Za-z]:", p):
+        p = p[0] + "%3a" + quote(p[2:], safe="/")
+    else:
+        p = quote(p.lstrip("/"), safe="/")
+    return "file://localhost/" + p
+
+
+def url_to_path(url: str) -> str:
+    p = unquote(re.sub(r"^file://(localhost)?/", "", url))
+    return p if re.match(r"^[A-Za-z]:", p) else "/" + p
+
+
+def _sub(parent: ET.Element, tag: str, text: Any = None) -> ET.Element:
+    el = ET.SubElement(parent, tag)
+    if text is not None:
+        el.text = str(text)
+    return el
+
+
+def _rate_el(parent: ET.Element, rate: Dict[str, Any]) -> None:
+    r = _sub(parent, "rate")
+    _sub(r, "timebase", rate["timebase"])
+    _sub(r, "ntsc", "TRUE" if rate["ntsc"] else "FALSE")
+
+
+def build_fcp_xml(
+    clips: List[Dict[str, Any]],
+    sequence_name: str = "Main",
+    fps: float = DEFAULT_FPS,
+    width: int = DEFAULT_WIDTH,
+    height: int = DEFAULT_HEIGHT,
+    min_tracks: int = 1,
+) -> ET.ElementTree:
+    """
+    clips: [{path, name, track, start, end, in, out, enabled, media_duration?}]
+    (giây). Biên clip làm tròn theo frame từ mốc tuyệt đối nên clip liền
+    nhau không bị hở/chồng frame (không cần closeGaps).
+    """
+    rate = _rate_params(fps)
+    n_tracks = max([min_tracks] + [c["track"] + 1 for c in clips])
+
+    # Thời lượng file: metadata nếu có, không thì điểm out xa nhất được dùng
+    file_frames: Dict[str, int] = {}
+    for c in clips:
+        need = max(_frames(c["out"], rate), _frames(c.get("media_duration") or 0, rate))
+        file_frames[c["path"]] = max(file_frames.get(c["path"], 0), need)
+    file_ids = {p: f"file-{i}" for i, p in enumerate(file_frames, start=1)}
+    file_written = set()
+
+    seq_end = max([_frames(c["end"], rate) for c in clips] or [0])
+
+    root = ET.Element("xmeml", version="4")
+    seq = _sub(root, "sequence")
+    seq.set("id", "sequence-1")
+    _sub(seq, "name", sequence_name)
+    _sub(seq, "duration", seq_end)
+    _rate_el(seq, rate)
+    media = _sub(seq, "media")
+    video = _sub(media, "video")
+    fmt = _sub(_sub(video, "format"), "samplecharacteristics")
+    _rate_el(fmt, rate)
+    _sub(fmt, "width", width)
+    _sub(fmt, "height", height)
+    _sub(fmt, "pixelaspectratio", "square")
+
+    tracks = [_sub(video, "track") for _ in range(n_tracks)]
+    clip_no = 0
+    for c in sorted(clips, key=lambda c: (c["track"], c["start"])):
+        start_f, end_f = _frames(c["start"], rate), _frames(c["end"], rate)
+        if end_f <= start_f:
+            continue
+        clip_no += 1
+        in_f = _frames(c["in"], rate)
+        item = _sub(tracks[c["track"]], "clipitem")
+        item.set("id", f"clipitem-{clip_no}")
+        _sub(item, "name", c.get("name") or os.path.basename(c["path"]))
+        _sub(item, "enabled", "TRUE" if c.get("enabled", True) else "FALSE")
+        _sub(item, "duration", file_frames[c["path"]])
+        _rate_el(item, rate)
+        _sub(item, "start", start_f)
+        _sub(item, "end", end_f)
+        _sub(item, "in", in_f)
+        _sub(item, "out", in_f + (end_f - start_f))
+
+        # <file> đầy đủ lần đầu, các lần sau chỉ tham chiếu id
+        fid = file_ids[c["path"]]
+        f_el = _sub(item, "file")
+        f_el.set("id", fid)
+        if fid not in file_written:
+            file_written.add(fid)
+            _sub(f_el, "name", os.path.basename(c["path"]))
+            _sub(f_el, "pathurl", path_to_url(c["path"]))
+            _rate_el(f_el, rate)
+            _sub(f_el, "duration", file_frames[c["path"]])
+            sc = _sub(_sub(_sub(f_el, "media"), "video"), "samplecharacteristics")
+            _sub(sc, "width", width)
+            _sub(sc, "height", height)
+
+    if hasattr(ET, "indent"):  # Python 3.9+
+        ET.indent(root)
+    return ET.ElementTree(root)
+
+
+def write_fcp_xml(tree: ET.ElementTree, out_path: PathLike) -> Path:
+    """Ghi XML (atomic) kèm DOCTYPE xmeml."""
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    body = ET.tostring(tree.getroot(), encoding="unicode")
+    tmp = str(out_path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE xmeml>\n')
+        f.write(body)
+        f.write("\n")
+    os.replace(tmp, out_path)
+    return out_path
+
+
+def read_fcp_xml(xml_path: PathLike) -> List[Dict[str, Any]]:
+    """Đọc ngược clipitem (frame) để kiểm tra offline file đã sinh."""
+    root = ET.parse(xml_path).getroot()
+    urls = {f.get("id"): f.findtext("pathurl") for f in root.iter("file") if f.findtext("pathurl")}
+    out = []
+    for t_idx, track in enumerate(root.iter("track")):
+        for item in track.findall("clipitem"):
+            fid = item.find("file").get("id")
+            out.append({
+                "track": t_idx,
+                "name": item.findtext("name"),
+                "enabled": item.findtext("enabled") == "TRUE",
+                "start": int(item.findtext("start")),
+                "end": int(item.findtext("end")),
+                "in": int(item.findtext("in")),
+                "out": int(item.findtext("out")),
+                "path": url_to_path(urls.get(fid, "")),
+            })
+    return out
+
+
+def generate(
+    out_path: PathLike,
+    csv_path: Optional[PathLike] = None,
+    resource_dir: Optional[PathLike] = None,
+    scene_matches_path: Optional[PathLike] = None,
+    sequence_name: str = "Main",
+    fps: float = DEFAULT_FPS,
+    width: int = DEFAULT_WIDTH,
+    height: int = DEFAULT_HEIGHT,
+    label_track: bool = True,
+    log: Callable[[str], None] = print,
+) -> Dict[str, Any]:
+    """CSV + resource hoặc scene_matches.json -> file XML. Trả về thống kê."""
+    if scene_matches_path:
+        clips = clips_from_scene_matches(scene_matches_path)
+        min_tracks = V4_TRACK_INDEX + 1
+    elif csv_path and resource_dir:
+        clips = clips_from_timeline_csv(csv_path, ClipResolver(resource_dir), label_track=label_track)
+        min_tracks = 2 if label_track else 1
+    else:
+        raise ValueError("Cần csv_path + resource_dir hoặc scene_matches_path")
+
+    tree = build_fcp_xml(clips, sequence_name, fps, width, height, min_tracks=min_tracks)
+    out = write_fcp_xml(tree, out_path)
+    stats = {
+        "xml_path": str(out).replace("\\", "/"),
+        "sequence_name": sequence_name,
+        "clips": len(clips),
+        "files": len({c["path"] for c in clips}),
+        "duration_sec": round(max([c["end"] for c in clips] or [0]), 3),
+    }
+    log(f"[fcp_xml] {stats['clips']} clips / {stats['files']} files -> {stats['xml_path']}")
+    return stats
+
+
+# Test function
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sinh FCP7 XML cho Premiere từ timeline CSV hoặc scene_matches.json")
+    parser.add_argument("--csv", help="timeline_export_merged.csv")
+    parser.add_argument("--resource", help="Thư mục resource (mỗi thư mục con = 1 bin)")
+    parser.add_argument("--scene-matches", help="scene_matches.json (đặt clip trên V4)")
+    parser.add_argument("--out", required=True, help="File .xml output")
+    parser.add_argument("--sequence-name", default="Main")
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS)
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH)
+    parser.add_argument("--height", type=int, default=DEFAULT_HEIGHT)
+    parser.add_argument("--no-label-track", action="store_true", help="Không tạo clip nhãn trên V2")
+    args = parser.parse_args()
+
+    generate(
+        args.out,
+        csv_path=args.csv,
+        resource_dir=args.resource,
+        scene_matches_path=args.scene_matches,
+        sequence_name=args.sequence_name,
+        fps=args.fps,
+        width=args.width,
+        height=args.height,
+        label_track=not args.no_label_track,
+    )
@@ -0,0 +1,184 @@
+/**
+ * importInterchange.jsx
+ *
+ * Import file FCP7 XML do core/premierCore/fcp_xml.py sinh ra: cả timeline
+ * (sequence + clip + bin media) vào project trong 1 lần importFiles, thay
+ * cho việc chèn từng clip của cutAndPush.jsx / autoCutAndPushV4.jsx.
+ *
+ * Config (path.txt hoặc JOB_PARAMS):
+ *   interchange_xml  - file .xml (mặc định <data_folder>/timeline.xml)
+ *   sequence_name    - tên sequence trong XML để mở sau khi import (mặc định Main)
+ */
+
+function log(msg) {
+    try { $.writeln('[importInterchange] ' + msg); } catch (e) {}
+}
+
+function normalizePath(p) {
+    if (!p) return '';
+    return p.replace(/\\/g, '/').replace(/\/+/g, '/');
+}
+
+function joinPath(a, b) {
+    if (!a) return b || '';
+    if (!b) return a || '';
+    var s = a.charAt(a.length - 1);
+    return (s === '/' || s === '\\') ? (a + b) : (a + '/' + b);
+}
+
+function fileExists(p) {
+    try { return (new File(p)).exists; } catch (e) { return false; }
+}
+
+function readLines(p) {
+    var f = new File(p);
+    if (!f.exists || !f.open('r')) return [];
+    var arr = [];
+    while (!f.eof) arr.push(f.readln());
+    f.close();
+    return arr;
+}
+
+var ROOT_DIR = (function () {
+    try {
+        return new File($.fileName).parent.parent.parent.fsName.replace(/\\/g, '/');
+    } catch (e) { return ''; }
+})();
+
+var DATA_DIR = joinPath(ROOT_DIR, 'data');
+
+/**
+ * Status/heartbeat cho Python (core/premierCore/jsx_status.py):
+ * data/_status_<script>.json với state running | done | error
+ */
+var STATUS_SCRIPT = 'importInterchange';
+var STATUS_PATH = joinPath(DATA_DIR, '_status_' + STATUS_SCRIPT + '.json');
+
+function jsonQuote(s) {
+    return '"' + String(s)
+        .replace(/\\/g, '\\\\')
+        .replace(/"/g, '\\"')
+        .replace(/\r/g, '\\r')
+        .replace(/\n/g, '\\n')
+        .replace(/\t/g, '\\t') + '"';
+}
+
+function jsonValue(v) {
+    if (v === null || v === undefined) return 'null';
+    if (typeof v === 'number') return isFinite(v) ? String(v) : 'null';
+    if (typeof v === 'boolean') return v ? 'true' : 'false';
+    return jsonQuote(v);
+}
+
+function writeStatus(state, progress, message, result) {
+    var parts = [];
+    if (result) {
+        for (var k in result) {
+            if (result.hasOwnProperty(k)) parts.push(jsonQuote(k) + ': ' + jsonValue(result[k]));
+        }
+    }
+    var json = '{"script": ' + jsonQuote(STATUS_SCRIPT) +
+        ', "state": ' + jsonQuote(state) +
+        ', "progress": ' + jsonValue(Math.round((progress || 0) * 1000) / 1000) +
+        ', "message": ' + jsonQuote(message || '') +
+        ', "result": {' + parts.join(', ') + '}' +
+        ', "updated": ' + (new Date()).getTime() + '}';
+    try {
+        var f = new File(STATUS_PATH);
+        f.encoding = 'UTF-8';
+        if (f.open('w')) {
+            f.write(json);
+            f.close();
+        }
+    } catch (e) {
+        log('WARN: Cannot write status: ' + e);
+    }
+}
+
+/**
+ * Job từ jsxListener.jsx: JOB_PARAMS ghi đè giá trị trong path.txt
+ */
+function applyJobParams(cfg) {
+    if (typeof JOB_PARAMS === 'undefined' || !JOB_PARAMS) return cfg;
+    if (!cfg) cfg = {};
+    for (var k in JOB_PARAMS) {
+        if (JOB_PARAMS.hasOwnProperty(k)) cfg[k] = String(JOB_PARAMS[k]);
+    }
+    return cfg;
+}
+
+function readPathConfig() {
+    var pathTxt = joinPath(DATA_DIR, 'path.txt');
+    if (!fileExists(pathTxt)) return applyJobParams(null);
+
+    var lines = readLines(pathTxt);
+    var cfg = {};
+    for (var i = 0; i < lines.length; i++) {
+        var line = lines[i];
+        if (!line) continue;
+        var parts = line.split('=');
+        if (parts.length >= 2) {
+            var key = parts[0].replace(/^\s+|\s+$/g, '');
+            var val = parts.slice(1).join('=').replace(/^\s+|\s+$/g, '');
+            cfg[key] = val;
+        }
+    }
+    return applyJobParams(cfg);
+}
+
+/**
+ * Sequence mới nhất có tên bắt đầu bằng sequenceName (Premiere có thể
+ * thêm hậu tố khi trùng tên), chỉ xét các sequence sinh ra sau import.
+ */
+function findImportedSequence(sequenceName, countBefore) {
+    var seqs = app.project.sequences;
+    for (var i = seqs.numSequences - 1; i >= countBefore; i--) {
+        if (String(seqs[i].name).indexOf(sequenceName) === 0) return seqs[i];
+    }
+    return seqs.numSequences > countBefore ? seqs[seqs.numSequences - 1] : null;
+}
+
+function main() {
+    log('=== IMPORT INTERCHANGE XML ===');
+    writeStatus('running', 0, 'Start');
+
+    var cfg = readPathConfig() || {};
+    var xmlPath = normalizePath(cfg.interchange_xml || '');
+    if (!xmlPath && cfg.data_folder) xmlPath = joinPath(normalizePath(cfg.data_folder), 'timeline.xml');
+    var sequenceName = cfg.sequence_name || 'Main';
+
+    if (!xmlPath || !fileExists(xmlPath)) {
+        writeStatus('error', 1, 'Interchange XML not found: ' + xmlPath);
+        alert('ERROR: Không tìm thấy file XML: ' + xmlPath);
+        return;
+    }
+
+    log('Importing: ' + xmlPath);
+    var countBefore = app.project.sequences.numSequences;
+    var t0 = (new Date()).getTime();
+    app.project.importFiles([xmlPath], true, app.project.rootItem, false);
+
+    var seq = findImportedSequence(sequenceName, countBefore);
+    if (!seq) {
+        writeStatus('error', 1, 'No sequence imported from ' + xmlPath);
+        alert('ERROR: Import XML không tạo sequence nào.');
+        return;
+    }
+    app.project.openSequence(seq.sequenceID);
+    app.project.save();
+
+    var elapsedMs = (new Date()).getTime() - t0;
+    log('Imported sequence "' + seq.name + '" in ' + elapsedMs + 'ms');
+    writeStatus('done', 1, 'Imported sequence ' + seq.name, {
+        sequence: seq.name,
+        elapsed_ms: elapsedMs
+    });
+}
+
+// Run
+try {
+    main();
+} catch (e) {
+    writeStatus('error', 1, 'Exception: ' + e);
+    log('ERROR: ' + e);
+}
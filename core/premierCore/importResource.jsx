@@ -82,7 +82,41 @@ function qeImportFallback(paths) {
 	}
 }
 
-function importFolderToBin(folderPath) {
+// ================== BIN / NAME LOOKUP (build 1 lần) ==================
+
+/** Map tên -> bin con trực tiếp của parentItem */
+function buildChildBinMap(parentItem) {
+	var map = {};
+	var children = parentItem.children;
+	var n = children.numItems;
+	for (var i = 0; i < n; i++) {
+		var child = children[i];
+		if (child && child.type === 2 && !map.hasOwnProperty(child.name)) map[child.name] = child; // 2 = Bin
+	}
+	return map;
+}
+
+/** Tập tên item trong bin (thay cho quét tuyến tính mỗi file) */
+function buildNameSet(binItem) {
+	var set = {};
+	var children = binItem.children;
+	var n = children.numItems;
+	for (var i = 0; i < n; i++) {
+		var child = children[i];
+		if (child) set[child.name] = true;
+	}
+	return set;
+}
+
+function findOrCreateRootBin(name, rootBinMap) {
+	if (!rootBinMap) rootBinMap = buildChildBinMap(app.project.rootItem);
+	if (rootBinMap.hasOwnProperty(name)) return rootBinMap[name];
+	var bin = app.project.rootItem.createBin(name);
+	rootBinMap[name] = bin;
+	return bin;
+}
+
+function importFolderToBin(folderPath, rootBinMap) {
 	if (typeof app === 'undefined' || !app.project) {
 		notify('Script phải chạy bên trong Adobe Premiere Pro.');
 		return -1;
@@ -101,28 +135,9 @@ function importFolderToBin(folderPath) {
 	var project = app.project;
 	var rootItem = project.rootItem;
 
-	function findOrCreateBin(parentItem, name) {
-		for (var i = 0; i < parentItem.children.numItems; i++) {
-			var child = parentItem.children[i];
-			if (child && child.type === 2 && child.name === name) { // 2 = Bin
-				return child;
-			}
-		}
-		return parentItem.createBin(name);
-	}
-
-	function itemNameExists(binItem, name) {
-		for (var i = 0; i < binItem.children.numItems; i++) {
-			var child = binItem.children[i];
-			if (child && child.name === name) {
-				return true;
-			}
-		}
-		return false;
-	}
-
 	var binName = f.name; // tên bin bằng tên thư mục
-	var targetBin = findOrCreateBin(rootItem, binName);
+	var targetBin = findOrCreateRootBin(binName, rootBinMap);
+	var existingNames = buildNameSet(targetBin);
 
 	var fileEntries = f.getFiles();
 	var pathsToImport = [];
@@ -132,7 +147,7 @@ function importFolderToBin(folderPath) {
 			// Bỏ qua file ẩn / rỗng
 			if (!entry.exists) continue;
 			// Nếu đã có item cùng tên trong bin thì bỏ qua
-			if (itemNameExists(targetBin, entry.name)) {
+			if (existingNames.hasOwnProperty(entry.name)) {
 				$.writeln('[importFolderToBin] Skip trùng: ' + entry.name);
 				continue;
 			}
@@ -182,6 +197,7 @@ function importMultipleFolders(parentFolderPath) {
 	}
 
 	var entries = parent.getFiles(); // lấy tất cả file + folder bên trong
+	var rootBinMap = buildChildBinMap(app.project.rootItem);
 	var totalImported = 0;
 	var subfolderCount = 0;
 	for (var i = 0; i < entries.length; i++) {
@@ -189,7 +205,7 @@ function importMultipleFolders(parentFolderPath) {
 		if (entry instanceof Folder) {
 			subfolderCount++;
 			$.writeln('[importMultipleFolders] Xử lý thư mục con: ' + entry.fsName);
-			var count = importFolderToBin(entry.fsName);
+			var count = importFolderToBin(entry.fsName, rootBinMap);
 			if (count > 0) {
 				totalImported += count;
 			}
@@ -202,6 +218,55 @@ function importMultipleFolders(parentFolderPath) {
 	return totalImported;
 }
 
+/**
+ * importReferencedFiles(listPath)
+ *  - Chế độ chọn lọc: chỉ import file mà timeline dùng, theo import_list.json
+ *    do core/premierCore/import_list.py sinh ra:
+ *      {"bins": [{"name": "<bin>", "files": ["<abs path>", ...]}, ...]}
+ *  - Mỗi bin: tập tên có sẵn dựng 1 lần, các file mới import bằng 1 lệnh
+ *    importFiles (importFiles chỉ nhận 1 bin đích mỗi lần gọi).
+ *  - Trả về số file mới được import, -1 nếu không đọc được danh sách.
+ */
+function importReferencedFiles(listPath) {
+	var raw = _readTextFile(listPath);
+	var data = null;
+	try { data = eval('(' + raw + ')'); } catch (e) {}
+	if (!data || !data.bins) {
+		notify('import_list không hợp lệ: ' + listPath);
+		return -1;
+	}
+
+	var rootBinMap = buildChildBinMap(app.project.rootItem);
+	var totalImported = 0;
+	var totalReferenced = 0;
+	for (var b = 0; b < data.bins.length; b++) {
+		var entry = data.bins[b];
+		var files = entry.files || [];
+		totalReferenced += files.length;
+		var targetBin = findOrCreateRootBin(entry.name, rootBinMap);
+		var existingNames = buildNameSet(targetBin);
+
+		var paths = [];
+		for (var i = 0; i < files.length; i++) {
+			var file = new File(files[i]);
+			if (!file.exists) {
+				notify('Thiếu file: ' + files[i]);
+				continue;
+			}
+			if (existingNames.hasOwnProperty(file.name)) continue;
+			existingNames[file.name] = true;
+			if (hasAllowedExtension(file.fsName)) paths.push(file.fsName);
+		}
+		if (!paths.length) continue;
+
+		var count = safeBatchImport(paths, targetBin);
+		if (count === 0) count = qeImportFallback(paths);
+		totalImported += count;
+	}
+	$.writeln('[importReferencedFiles] ' + totalImported + ' file mới / ' + totalReferenced + ' file được tham chiếu');
+	return totalImported;
+}
+
 // ===== Helper: Đọc path.txt để lấy data_folder =====
 function _readTextFile(p) {
 	try {
@@ -259,10 +324,21 @@ function getResourceFolderFromConfig() {
 	return '';
 }
 
+function getImportListFromConfig() {
+	// runAll.jsx truyền import_list của job (core/premierCore/batch_job.py)
+	if (typeof RUNALL_IMPORT_LIST !== 'undefined' && RUNALL_IMPORT_LIST) {
+		return RUNALL_IMPORT_LIST;
+	}
+	return '';
+}
+
 // Example usage (bỏ comment để test):
+var importList = getImportListFromConfig();
 var resourceFolder = getResourceFolderFromConfig();
-if (resourceFolder) {
+if (importList && new File(importList).exists) {
+	IMPORTED_FILE_COUNT = importReferencedFiles(importList);
+} else if (resourceFolder) {
 	IMPORTED_FILE_COUNT = importMultipleFolders(resourceFolder);
 } else {
 	notify('Không xác định được resource folder từ path.txt');
-}
\ No newline at end of file
+}
@@ -0,0 +1,174 @@
+"""
+import_list.py
+
+Danh sách media mà timeline thực sự dùng, để importResource.jsx chỉ import
+đúng các file đó (thay vì mọi file trong mọi thư mục resource):
+
+    data/<slug>/import_list.json
+    {
+      "version": 1,
+      "source": "<csv hoặc scene_matches.json>",
+      "bins": [{"name": "<tên thư mục = tên bin>", "files": ["<abs path>", ...]}, ...]
+    }
+
+Bin/clip chọn giống cutAndPush.jsx (fcp_xml.ClipResolver): tên bin chuẩn
+hoá + alias, clip theo index pad; dòng có clip_path (subclips.py) dùng
+subclip, vào bin _subclips. Với scene_matches.json mọi video vào bin
+AI_Matched_Scenes như autoCutAndPushV4.jsx.
+
+File đã chọn cho từng dòng được ghi lại vào cột media_path của CSV;
+cutAndPush.jsx tra clip theo media path đó. Bin import chọn lọc chỉ có
+tập con file nên chọn lại theo video_index % số clip trong bin sẽ lệch
+với ClipResolver (chia theo mọi file trong thư mục).
+"""
+
+import csv
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    from .fcp_xml import ClipResolver, clips_from_scene_matches, read_timeline_csv
+except ImportError:
+    from fcp_xml import ClipResolver, clips_from_scene_matches, read_timeline_csv
+
+IMPORT_LIST_FILENAME = "import_list.json"
+IMPORT_LIST_VERSION = 1
+MEDIA_PATH_COLUMN = "media_path"
+BACKUP_SUFFIX = ".orig.csv"  # như subclips.py
+SCENE_MATCH_BIN = "AI_Matched_Scenes"
+
+PathLike = Union[str, Path]
+
+
+def _posix(p: PathLike) -> str:
+    return str(p).replace("\\", "/")
+
+
+def _collect(
+    csv_path: Optional[PathLike],
+    resource_dir: Optional[PathLike],
+    scene_matches_path: Optional[PathLike],
+) -> Tuple[Dict[str, List[str]], Dict[int, str]]:
+    """({tên bin: [file, ...]}, {số dòng CSV: file đã chọn})."""
+    bins: Dict[str, List[str]] = {}
+    rows: Dict[int, str] = {}
+    seen = set()
+
+    def add(bin_name: str, path: str) -> None:
+        key = os.path.normcase(os.path.abspath(path))
+        if key in seen:
+            return
+        seen.add(key)
+        bins.setdefault(bin_name, []).append(_posix(path))
+
+    if scene_matches_path:
+        for clip in clips_from_scene_matches(scene_matches_path):
+            add(SCENE_MATCH_BIN, clip["path"])
+    if csv_path and resource_dir:
+        resolver = ClipResolver(resource_dir)
+        for row in read_timeline_csv(csv_path):
+            if row["clip_path"] and os.path.isfile(row["clip_path"]):
+                # Subclip cắt sẵn (subclips.py) thay cho cả file nguồn
+                path = Path(row["clip_path"])
+            else:
+                path = resolver.resolve(row["bin_name"], row["video_index"], row["character"], row["video_id"])
+            if path is not None:
+                # importFolderToBin đặt tên bin = tên thư mục chứa file
+                add(path.parent.name, str(path))
+                rows[row["row"]] = _posix(path)
+    return bins, rows
+
+
+def referenced_media(
+    csv_path: Optional[PathLike] = None,
+    resource_dir: Optional[PathLike] = None,
+    scene_matches_path: Optional[PathLike] = None,
+) -> Dict[str, List[str]]:
+    """{tên bin: [file, ...]} theo thứ tự xuất hiện, không trùng."""
+    return _collect(csv_path, resource_dir, scene_matches_path)[0]
+
+
+def write_media_paths(csv_path: PathLike, media: Dict[int, str]) -> bool:
+    """
+    Ghi cột media_path (file đã chọn cho từng dòng, rỗng nếu không resolve
+    được) vào CSV, atomic, bản gốc giữ ở *.orig.csv. Không đổi gì -> False.
+    """
+    csv_path = Path(csv_path)
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = [r for r in csv.reader(f) if r]
+    if len(rows) < 2:
+        return False
+    header = rows[0]
+    lower = [h.strip().lower() for h in header]
+    if MEDIA_PATH_COLUMN not in lower:
+        header.append(MEDIA_PATH_COLUMN)
+        lower.append(MEDIA_PATH_COLUMN)
+    i_media = lower.index(MEDIA_PATH_COLUMN)
+
+    changed = False
+    for row_no in range(1, len(rows)):
+        cols = rows[row_no]
+        value = media.get(row_no, "")
+        if (cols[i_media] if i_media < len(cols) else "") == value and len(cols) >= len(header):
+            continue
+        cols.extend([""] * (len(header) - len(cols)))
+        cols[i_media] = value
+        changed = True
+    if not changed:
+        return False
+
+    backup = csv_path.with_name(csv_path.stem + BACKUP_SUFFIX)
+    if not backup.exists():
+        shutil.copy2(csv_path, backup)
+    tmp = str(csv_path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8-sig", newline="") as f:
+        csv.writer(f).writerows(rows)
+    os.replace(tmp, csv_path)
+    return True
+
+
+def write_import_list(
+    data_folder: PathLike,
+    csv_path: Optional[PathLike] = None,
+    resource_dir: Optional[PathLike] = None,
+    scene_matches_path: Optional[PathLike] = None,
+) -> Optional[Path]:
+    """
+    Ghi data_folder/import_list.json (atomic) và cột media_path của CSV.
+    Không có file nào được dùng -> None.
+    """
+    bins, rows = _collect(csv_path, resource_dir, scene_matches_path)
+    if not bins:
+        return None
+    if csv_path and resource_dir:
+        write_media_paths(csv_path, rows)
+    out = Path(data_folder) / IMPORT_LIST_FILENAME
+    out.parent.mkdir(parents=True, exist_ok=True)
+    data: Dict[str, Any] = {
+        "version": IMPORT_LIST_VERSION,
+        "source": _posix(scene_matches_path or csv_path or ""),
+        "bins": [{"name": name, "files": files} for name, files in bins.items()],
+    }
+    tmp = str(out) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, out)
+    return out
+
+
+# Test function
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sinh import_list.json cho importResource.jsx")
+    parser.add_argument("--data-folder", required=True)
+    parser.add_argument("--csv")
+    parser.add_argument("--resource")
+    parser.add_argument("--scene-matches")
+    args = parser.parse_args()
+
+    path = write_import_list(args.data_folder, args.csv, args.resource, args.scene_matches)
+    print(path or "Không có media nào được tham chiếu")
@@ -0,0 +1,225 @@
+/**
+ * jsxListener.jsx
+ *
+ * Listener thường trú trong Premiere: poll hàng đợi job dạng file
+ * (data/_jsx_queue, xem core/premierCore/jsx_channel.py), chạy script được
+ * yêu cầu với params JSON và ghi kết quả trả về. Chỉ cần chạy 1 lần qua
+ * VS Code; sau đó Python gửi job không cần giả lập phím.
+ *
+ *   jobs/<id>.json     {"id", "script", "params": {...}}
+ *   results/<id>.json  {"id", "state": "done"|"error", "message", "result", "elapsed_ms"}
+ *   listener.json      heartbeat {"state", "job", "updated"}
+ *
+ * Script chạy bằng $.evalFile trong global scope với:
+ *   JOB_PARAMS  - params của job (readPathConfig() ghi đè path.txt)
+ * Kết quả lấy từ data/_status_<script>.json nếu script có ghi status.
+ *
+ * LƯU Ý: vòng lặp $.sleep giữ engine ExtendScript; gửi job "__stop__"
+ * (JsxChannel.stop_listener) hoặc để listener tự thoát sau JL_IDLE_EXIT_MS.
+ * Mọi tên ở đây có tiền tố jl/JL_ để không bị script được eval ghi đè.
+ */
+
+var JL_POLL_MS = 20;
+var JL_HEARTBEAT_MS = 1000;
+var JL_IDLE_EXIT_MS = 4 * 60 * 60 * 1000;
+
+var JL_ROOT_DIR = (function () {
+    try {
+        return new File($.fileName).parent.parent.parent.fsName.replace(/\\/g, '/');
+    } catch (e) { return ''; }
+})();
+
+var JL_DATA_DIR = JL_ROOT_DIR + '/data';
+var JL_QUEUE_DIR = JL_DATA_DIR + '/_jsx_queue';
+var JL_JOBS_DIR = JL_QUEUE_DIR + '/jobs';
+var JL_RESULTS_DIR = JL_QUEUE_DIR + '/results';
+var JL_HEARTBEAT_PATH = JL_QUEUE_DIR + '/listener.json';
+
+var JOB_PARAMS = null;
+
+function jlLog(msg) {
+    try { $.writeln('[jsxListener] ' + msg); } catch (e) {}
+}
+
+function jlNow() {
+    return (new Date()).getTime();
+}
+
+function jlQuote(s) {
+    return '"' + String(s)
+        .replace(/\\/g, '\\\\')
+        .replace(/"/g, '\\"')
+        .replace(/\r/g, '\\r')
+        .replace(/\n/g, '\\n')
+        .replace(/\t/g, '\\t') + '"';
+}
+
+function jlStringify(v) {
+    if (v === null || v === undefined) return 'null';
+    if (typeof v === 'number') return isFinite(v) ? String(v) : 'null';
+    if (typeof v === 'boolean') return v ? 'true' : 'false';
+    if (typeof v === 'string') return jlQuote(v);
+    if (v instanceof Array) {
+        var items = [];
+        for (var i = 0; i < v.length; i++) items.push(jlStringify(v[i]));
+        return '[' + items.join(', ') + ']';
+    }
+    var parts = [];
+    for (var k in v) {
+        if (v.hasOwnProperty(k)) parts.push(jlQuote(k) + ': ' + jlStringify(v[k]));
+    }
+    return '{' + parts.join(', ') + '}';
+}
+
+function jlReadFile(p) {
+    var f = new File(p);
+    f.encoding = 'UTF-8';
+    if (!f.exists || !f.open('r')) return '';
+    var content = f.read();
+    f.close();
+    return content;
+}
+
+/** Ghi file qua <path>.tmp rồi rename để Python không đọc file dở */
+function jlWriteAtomic(p, content) {
+    var tmp = new File(p + '.tmp');
+    tmp.encoding = 'UTF-8';
+    if (!tmp.open('w')) return false;
+    tmp.write(content);
+    tmp.close();
+    var target = new File(p);
+    if (target.exists) target.remove();
+    return tmp.rename(target.name);
+}
+
+function jlEnsureFolder(p) {
+    var f = new Folder(p);
+    if (!f.exists) f.create();
+}
+
+function jlHeartbeat(state, jobId) {
+    jlWriteAtomic(JL_HEARTBEAT_PATH, jlStringify({
+        state: state,
+        job: jobId || '',
+        updated: jlNow()
+    }));
+}
+
+function jlResolveScript(script) {
+    var s = String(script || '').replace(/\\/g, '/');
+    if (!s) return null;
+    var f = new File(s);
+    if (f.exists) return f;
+    // Tên ngắn: core/premierCore/<script>(.jsx)
+    if (!/\.jsx$/i.test(s)) s += '.jsx';
+    f = new File(JL_ROOT_DIR + '/core/premierCore/' + s);
+    return f.exists ? f : null;
+}
+
+function jlRunJob(job) {
+    var t0 = jlNow();
+    var out = { id: job.id, state: 'done', message: '', result: {} };
+
+    var scriptFile = jlResolveScript(job.script);
+    if (!scriptFile) {
+        out.state = 'error';
+        out.message = 'Script not found: ' + job.script;
+        return out;
+    }
+
+    var stem = scriptFile.name.replace(/\.jsx$/i, '');
+    var statusFile = new File(JL_DATA_DIR + '/_status_' + stem + '.json');
+    if (statusFile.exists) statusFile.remove();
+
+    // Không để alert() chặn listener: chuyển thành log
+    var savedAlert = alert;
+    alert = function (msg) { jlLog('[alert] ' + msg); };
+    JOB_PARAMS = job.params || {};
+    try {
+        $.evalFile(scriptFile);
+    } catch (e) {
+        out.state = 'error';
+        out.message = 'Exception: ' + e;
+    }
+    JOB_PARAMS = null;
+    alert = savedAlert;
+
+    // Script có ghi status -> dùng state/message/result của nó
+    if (out.state === 'done' && statusFile.exists) {
+        var status = null;
+        try { status = eval('(' + jlReadFile(statusFile.fsName) + ')'); } catch (e2) {}
+        if (status) {
+            out.state = status.state === 'error' ? 'error' : 'done';
+            out.message = status.message || '';
+            out.result = status.result || {};
+        }
+    }
+
+    out.elapsed_ms = jlNow() - t0;
+    return out;
+}
+
+function jlNextJob() {
+    var files = new Folder(JL_JOBS_DIR).getFiles('*.json');
+    if (!files || files.length === 0) return null;
+    // id có prefix thời gian -> sort theo tên = FIFO
+    files.sort(function (a, b) { return a.name < b.name ? -1 : (a.name > b.name ? 1 : 0); });
+    return files[0];
+}
+
+function jlListen() {
+    jlEnsureFolder(JL_QUEUE_DIR);
+    jlEnsureFolder(JL_JOBS_DIR);
+    jlEnsureFolder(JL_RESULTS_DIR);
+
+    jlLog('Listening on ' + JL_QUEUE_DIR);
+    var lastBeat = 0;
+    var lastJob = jlNow();
+
+    while (true) {
+        var now = jlNow();
+        if (now - lastBeat >= JL_HEARTBEAT_MS) {
+            jlHeartbeat('idle');
+            lastBeat = now;
+        }
+
+        var jobFile = jlNextJob();
+        if (!jobFile) {
+            if (now - lastJob >= JL_IDLE_EXIT_MS) {
+                jlLog('Idle timeout, exiting');
+                break;
+            }
+            $.sleep(JL_POLL_MS);
+            continue;
+        }
+
+        var raw = jlReadFile(jobFile.fsName);
+        jobFile.remove();
+        lastJob = now;
+
+        var job = null;
+        try { job = eval('(' + raw + ')'); } catch (e) {}
+        if (!job || !job.id) {
+            jlLog('Bad job file: ' + jobFile.name);
+            continue;
+        }
+
+        if (job.script === '__stop__') {
+            jlWriteAtomic(JL_RESULTS_DIR + '/' + job.id + '.json',
+                jlStringify({ id: job.id, state: 'done', message: 'stopped', result: {}, elapsed_ms: 0 }));
+            jlLog('Stop requested');
+            break;
+        }
+
+        jlLog('Job ' + job.id + ': ' + job.script);
+        jlHeartbeat('busy', job.id);
+        var res = jlRunJob(job);
+        jlWriteAtomic(JL_RESULTS_DIR + '/' + job.id + '.json', jlStringify(res));
+        jlLog('Job ' + job.id + ' -> ' + res.state + ' (' + res.elapsed_ms + 'ms)');
+        lastBeat = 0;
+    }
+
+    jlHeartbeat('stopped');
+}
+
+jlListen();
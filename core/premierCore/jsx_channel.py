@@ -0,0 +1,305 @@
+"""
+jsx_channel.py
+
+Kênh lệnh thường trú tới Premiere (thay cho giả lập phím qua VS Code).
+
+Hàng đợi dạng file trong `data/_jsx_queue`:
+    jobs/<id>.json      Python ghi (atomic), jsxListener.jsx đọc + xoá
+    results/<id>.json   jsxListener.jsx ghi kết quả
+    listener.json       heartbeat của listener (idle | busy | stopped)
+
+Dùng:
+    channel = JsxChannel()
+    if channel.listener_alive():
+        res = channel.run("extractTrack3Keywords", {"data_folder": "..."})
+        res["state"]  # "done" | "error" | "timeout"
+
+`FakeHost` chạy listener giả trong thread (handler Python theo tên script)
+để test / đo overhead round-trip mà không cần Premiere.
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+try:
+    from .jsx_status import DATA_DIR, read_status
+except ImportError:
+    from jsx_status import DATA_DIR, read_status
+
+QUEUE_DIRNAME = "_jsx_queue"
+HEARTBEAT_FILENAME = "listener.json"
+STOP_SCRIPT = "__stop__"
+
+# Listener idle mà heartbeat cũ hơn ngưỡng này -> coi như đã chết
+LISTENER_STALE_SEC = 5.0
+# Listener chỉ ghi "busy" 1 lần lúc nhận job; busy lâu hơn 1 job dài nhất
+# (mặc định theo RUNALL_TIMEOUT_SEC) -> Premiere đã crash/bị kill giữa job
+LISTENER_BUSY_MAX_SEC = float(os.getenv("LISTENER_BUSY_MAX_SEC", os.getenv("RUNALL_TIMEOUT_SEC", "3600")))
+DEFAULT_POLL = 0.01
+DEFAULT_TIMEOUT = 1800.0
+
+PathLike = Union[str, Path]
+
+_job_counter = itertools.count()
+
+
+def _write_json_atomic(path: Path, data: Dict[str, Any]) -> None:
+    tmp = str(path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+def new_job_id() -> str:
+    """Prefix thời gian (ms) + pid + counter: sort theo tên = thứ tự gửi."""
+    return f"{int(time.time() * 1000):013d}_{os.getpid()}_{next(_job_counter):06d}"
+
+
+class JsxChannel:
+    """Client của hàng đợi job cho jsxListener.jsx."""
+
+    def __init__(self, queue_dir: Optional[PathLike] = None):
+        self.queue_dir = Path(queue_dir or (DATA_DIR / QUEUE_DIRNAME))
+        self.jobs_dir = self.queue_dir / "jobs"
+        self.results_dir = self.queue_dir / "results"
+        self.heartbeat_path = self.queue_dir / HEARTBEAT_FILENAME
+
+    def ensure_dirs(self) -> None:
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    def listener_status(self) -> Optional[Dict[str, Any]]:
+        return _read_json(self.heartbeat_path)
+
+    def listener_alive(self, stale_sec: float = LISTENER_STALE_SEC, busy_max_sec: float = LISTENER_BUSY_MAX_SEC) -> bool:
+        """
+        Listener còn sống nếu heartbeat idle mới hơn stale_sec, hoặc đang
+        busy (job dài không heartbeat) chưa quá busy_max_sec.
+        """
+        hb = self.listener_status()
+        if not hb:
+            return False
+        state = hb.get("state")
+        age = time.time() - float(hb.get("updated", 0) or 0) / 1000.0
+        if state == "busy":
+            return age <= busy_max_sec
+        if state != "idle":
+            return False
+        return age <= stale_sec
+
+    # ------------------------------------------------------------------
+    def submit(self, script: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Đưa job vào hàng đợi, trả về job id."""
+        self.ensure_dirs()
+        job_id = new_job_id()
+        job = {"id": job_id, "script": str(script).replace("\\", "/"), "params": params or {}}
+        _write_json_atomic(self.jobs_dir / f"{job_id}.json", job)
+        return job_id
+
+    def wait(
+        self,
+        job_id: str,
+        timeout: float = DEFAULT_TIMEOUT,
+        poll: float = DEFAULT_POLL,
+        status_file: Optional[PathLike] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Chờ kết quả job. Nếu có status_file (data/_status_<script>.json) thì
+        chuyển heartbeat của script qua on_progress trong lúc chờ.
+        Hết giờ -> {"state": "timeout"} (job chưa chạy thì bị rút khỏi hàng đợi).
+        """
+        result_path = self.results_dir / f"{job_id}.json"
+        t0 = time.monotonic()
+        last_status: Optional[Dict[str, Any]] = None
+
+        while True:
+            res = _read_json(result_path)
+            if res is not None:
+                try:
+                    os.remove(result_path)
+                except OSError:
+                    pass
+                return res
+
+            if status_file and on_progress:
+                st = read_status(status_file)
+                if st is not None and st != last_status:
+                    last_status = st
+                    try:
+                        on_progress(st)
+                    except Exception as e:
+                        print(f"[jsx_channel][WARN] on_progress lỗi: {e}")
+
+            if time.monotonic() - t0 >= timeout:
+                try:
+                    os.remove(self.jobs_dir / f"{job_id}.json")
+                except OSError:
+                    pass
+                return {"id": job_id, "state": "timeout", "message": f"No result after {timeout}s", "result": {}}
+
+            time.sleep(poll)
+
+    def run(
+        self,
+        script: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        poll: float = DEFAULT_POLL,
+        status_file: Optional[PathLike] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """submit + wait."""
+        job_id = self.submit(script, params)
+        return self.wait(job_id, timeout=timeout, poll=poll, status_file=status_file, on_progress=on_progress)
+
+    def stop_listener(self, timeout: float = 10.0) -> bool:
+        if not self.listener_alive():
+            return True
+        res = self.run(STOP_SCRIPT, timeout=timeout)
+        return res.get("state") == "done"
+
+
+class FakeHost:
+    """
+    Listener giả (thread) cùng giao thức với jsxListener.jsx.
+
+        host = FakeHost(queue_dir, {"extractTrack3Keywords": lambda params: {...}})
+        host.start(); ...; host.stop()
+
+    Handler trả về dict result (state done) hoặc raise (state error).
+    """
+
+    def __init__(
+        self,
+        queue_dir: Optional[PathLike] = None,
+        handlers: Optional[Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]]] = None,
+        poll: float = 0.005,
+        heartbeat_sec: float = 1.0,
+    ):
+        self.channel = JsxChannel(queue_dir)
+        self.handlers = dict(handlers or {})
+        self.poll = poll
+        self.heartbeat_sec = heartbeat_sec
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _heartbeat(self, state: str, job: str = "") -> None:
+        _write_json_atomic(
+            self.channel.heartbeat_path,
+            {"state": state, "job": job, "updated": int(time.time() * 1000)},
+        )
+
+    def _run_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        t0 = time.monotonic()
+        name = Path(str(job.get("script", ""))).stem
+        out: Dict[str, Any] = {"id": job["id"], "state": "done", "message": "", "result": {}}
+        handler = self.handlers.get(name)
+        if handler is None:
+            out.update(state="error", message=f"Script not found: {job.get('script')}")
+        else:
+            try:
+                out["result"] = handler(job.get("params") or {}) or {}
+            except Exception as e:
+                out.update(state="error", message=f"Exception: {e}")
+        out["elapsed_ms"] = int((time.monotonic() - t0) * 1000)
+        return out
+
+    def _loop(self) -> None:
+        ch = self.channel
+        ch.ensure_dirs()
+        last_beat = 0.0
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now - last_beat >= self.heartbeat_sec:
+                self._heartbeat("idle")
+                last_beat = now
+
+            jobs = sorted(p for p in ch.jobs_dir.glob("*.json"))
+            if not jobs:
+                time.sleep(self.poll)
+                continue
+
+            job_path = jobs[0]
+            job = _read_json(job_path)
+            try:
+                os.remove(job_path)
+            except OSError:
+                pass
+            if not job or not job.get("id"):
+                continue
+
+            if job.get("script") == STOP_SCRIPT:
+                _write_json_atomic(
+                    ch.results_dir / f"{job['id']}.json",
+                    {"id": job["id"], "state": "done", "message": "stopped", "result": {}, "elapsed_ms": 0},
+                )
+                break
+
+            self._heartbeat("busy", job["id"])
+            _write_json_atomic(ch.results_dir / f"{job['id']}.json", self._run_job(job))
+            last_beat = 0.0
+
+        self._heartbeat("stopped")
+
+    def start(self) -> "FakeHost":
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        # Chờ heartbeat đầu tiên để listener_alive() đúng ngay sau start()
+        deadline = time.monotonic() + 2.0
+        while not self.channel.listener_alive() and time.monotonic() < deadline:
+            time.sleep(self.poll)
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def benchmark_round_trip(n: int = 200, queue_dir: Optional[PathLike] = None) -> Dict[str, float]:
+    """Đo overhead round-trip (ms) qua FakeHost với job rỗng."""
+    import tempfile
+
+    queue_dir = queue_dir or tempfile.mkdtemp(prefix="jsx_queue_")
+    host = FakeHost(queue_dir, {"noop": lambda params: {"echo": params.get("i")}}).start()
+    channel = JsxChannel(queue_dir)
+    samples = []
+    try:
+        for i in range(n):
+            t0 = time.perf_counter()
+            res = channel.run("noop", {"i": i}, timeout=10, poll=0.001)
+            samples.append((time.perf_counter() - t0) * 1000)
+            if res.get("state") != "done":
+                raise RuntimeError(f"Job lỗi: {res}")
+    finally:
+        host.stop()
+    samples.sort()
+    return {
+        "n": n,
+        "mean_ms": round(sum(samples) / n, 3),
+        "p50_ms": round(samples[n // 2], 3),
+        "p95_ms": round(samples[int(n * 0.95) - 1], 3),
+    }
+
+
+# Test function
+if __name__ == "__main__":
+    print(benchmark_round_trip())
@@ -0,0 +1,199 @@
+"""
+jsx_status.py
+
+Tín hiệu hoàn thành cho JSX chạy trong Premiere (thay cho sleep cố định).
+
+Mỗi JSX ghi 1 file status/heartbeat vào `data/_status_<tên script>.json`:
+{
+  "script": "extractTrack3Keywords",
+  "state": "running" | "done" | "error",
+  "progress": 0.0 - 1.0,
+  "message": "...",
+  "result": {...},
+  "updated": <ms epoch>
+}
+
+Python xoá file cũ trước khi chạy script rồi `wait_for_status()` tới khi
+state là done/error (hoặc hết timeout), nên mỗi bước chờ đúng bằng thời
+gian host cần.
+
+`StatusWriter` ghi cùng format từ Python - dùng làm host giả khi test.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+THIS_DIR = Path(__file__).parent.resolve()
+ROOT_DIR = THIS_DIR.parent.parent
+DATA_DIR = ROOT_DIR / "data"
+
+STATUS_PREFIX = "_status_"
+FINAL_STATES = ("done", "error")
+
+# Không thấy file status sau khoảng này -> coi như script không được chạy
+DEFAULT_START_TIMEOUT = 60.0
+DEFAULT_TIMEOUT = 1800.0
+DEFAULT_POLL = 0.25
+
+PathLike = Union[str, Path]
+
+
+def status_path_for(script: PathLike, data_dir: Optional[PathLike] = None) -> Path:
+    """data/_status_<stem>.json cho 1 file JSX (hoặc tên script)."""
+    stem = Path(str(script)).stem
+    return Path(data_dir or DATA_DIR) / f"{STATUS_PREFIX}{stem}.json"
+
+
+def status_file_for_script(jsx_path: PathLike, data_dir: Optional[PathLike] = None) -> Optional[Path]:
+    """File status nếu JSX có gọi writeStatus(), ngược lại None (script cũ -> sleep cố định)."""
+    try:
+        with open(jsx_path, "r", encoding="utf-8", errors="ignore") as f:
+            if "writeStatus(" not in f.read():
+                return None
+    except OSError:
+        return None
+    return status_path_for(jsx_path, data_dir)
+
+
+def clear_status(path: PathLike) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"[jsx_status][WARN] Không xoá được {path}: {e}")
+
+
+def read_status(path: PathLike) -> Optional[Dict[str, Any]]:
+    """Đọc status; None nếu chưa có hoặc JSX đang ghi dở."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+def wait_for_status(
+    path: PathLike,
+    timeout: float = DEFAULT_TIMEOUT,
+    poll: float = DEFAULT_POLL,
+    start_timeout: float = DEFAULT_START_TIMEOUT,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    on_tick: Optional[Callable[[float], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Chờ tới khi file status có state done/error.
+
+    Args:
+        timeout: tổng thời gian chờ tối đa (giây)
+        start_timeout: chờ tối đa tới khi file status xuất hiện
+        on_progress: gọi mỗi khi status thay đổi (heartbeat mới)
+        on_tick: gọi mỗi lượt poll với số giây đã chờ (vd. đóng popup)
+
+    Returns:
+        status cuối. Hết giờ -> state "timeout" (kèm progress/message cuối cùng).
+    """
+    t0 = time.monotonic()
+    last: Dict[str, Any] = {}
+
+    while True:
+        elapsed = time.monotonic() - t0
+        # File status rất nhỏ -> đọc lại mỗi lượt (mtime có thể không đổi
+        # giữa 2 lần ghi liên tiếp trên FS có độ phân giải thô)
+        status = read_status(path)
+        if status is not None and status != last:
+            last = status
+            if on_progress:
+                try:
+                    on_progress(status)
+                except Exception as e:
+                    print(f"[jsx_status][WARN] on_progress lỗi: {e}")
+            if status.get("state") in FINAL_STATES:
+                out = dict(status)
+                out["elapsed"] = round(elapsed, 3)
+                return out
+
+        if not last and elapsed >= start_timeout:
+            return {"state": "timeout", "message": "Script không ghi status (chưa chạy?)", "elapsed": round(elapsed, 3)}
+        if elapsed >= timeout:
+            out = dict(last)
+            out["state"] = "timeout"
+            out["elapsed"] = round(elapsed, 3)
+            return out
+
+        if on_tick:
+            try:
+                on_tick(elapsed)
+            except Exception as e:
+                print(f"[jsx_status][WARN] on_tick lỗi: {e}")
+        time.sleep(poll)
+
+
+def format_status(status: Dict[str, Any]) -> str:
+    """1 dòng log: [state 42%] message"""
+    pct = status.get("progress")
+    pct_txt = f" {int(float(pct) * 100)}%" if isinstance(pct, (int, float)) else ""
+    return f"[{status.get('state', '?')}{pct_txt}] {status.get('message', '')}".rstrip()
+
+
+class StatusWriter:
+    """Ghi status theo đúng format của writeStatus() trong JSX (host giả khi test)."""
+
+    def __init__(self, path: PathLike, script: str = ""):
+        self.path = Path(path)
+        self.script = script or self.path.stem[len(STATUS_PREFIX):]
+
+    def write(
+        self,
+        state: str,
+        progress: float = 0.0,
+        message: str = "",
+        result: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        data = {
+            "script": self.script,
+            "state": state,
+            "progress": progress,
+            "message": message,
+            "result": result or {},
+            "updated": int(time.time() * 1000),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = str(self.path) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def running(self, progress: float, message: str = "") -> None:
+        self.write("running", progress, message)
+
+    def done(self, message: str = "", result: Optional[Dict[str, Any]] = None) -> None:
+        self.write("done", 1.0, message, result)
+
+    def error(self, message: str, result: Optional[Dict[str, Any]] = None) -> None:
+        self.write("error", 1.0, message, result)
+
+
+# Test function
+if __name__ == "__main__":
+    import tempfile
+    import threading
+
+    tmp_dir = tempfile.mkdtemp()
+    path = status_path_for("demoScript.jsx", tmp_dir)
+    writer = StatusWriter(path)
+
+    def fake_host():
+        for i in range(5):
+            writer.running(i / 5, f"step {i + 1}/5")
+            time.sleep(0.05)
+        writer.done("ok", {"count": 5})
+
+    clear_status(path)
+    threading.Thread(target=fake_host, daemon=True).start()
+    final = wait_for_status(path, timeout=5, poll=0.01, on_progress=lambda s: print(format_status(s)))
+    print(final)
@@ -0,0 +1,293 @@
+"""
+proxies.py
+
+Proxy độ phân giải thấp cho media full-res (H.264 long-GOP) mà
+importResource.jsx đưa vào project, để scrub timeline không giật.
+
+Nguồn proxy cho mỗi file, theo thứ tự:
+    1. Proxy <=480p genmini đã tải khi phân tích:
+       data/.cache/analysis_videos/<id>/<id>_proxy.mp4 (tra qua url/id trong
+       `_manifest.json` của group) - chỉ nhận nếu cùng fps + tỉ lệ khung
+       (điều kiện attachProxy của Premiere).
+    2. Proxy đã transcode lần trước: <group>/_proxy/<tên file>_proxy.mp4
+    3. Transcode local bằng ffmpeg trong process pool.
+
+Kết quả ghi ra data/<slug>/proxy_map.json cho attachProxies.jsx:
+    {"version": 1, "items": [{"media": "<abs path>", "proxy": "<abs path>"}, ...]}
+
+    python core/premierCore/proxies.py --resource <project>/resource --data-folder data/<slug>
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    from ..ai.media_index import VIDEO_EXTENSIONS, MediaIndex, probe_media
+    from ..downloadTool.catalog import ResourceCatalog
+    from ..downloadTool.manifest import read_manifest
+except (ImportError, ValueError):
+    _ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    if _ROOT not in sys.path:
+        sys.path.insert(0, _ROOT)
+    from core.ai.media_index import VIDEO_EXTENSIONS, MediaIndex, probe_media
+    from core.downloadTool.catalog import ResourceCatalog
+    from core.downloadTool.manifest import read_manifest
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+ANALYSIS_CACHE_DIR = ROOT_DIR / "data" / ".cache" / "analysis_videos"
+
+PROXY_DIRNAME = "_proxy"
+PROXY_SUFFIX = "_proxy.mp4"
+PROXY_MAP_FILENAME = "proxy_map.json"
+PROXY_MAP_VERSION = 1
+
+PROXY_HEIGHT = int(os.environ.get("PROXY_HEIGHT", "480"))
+# 0 = số core CPU
+PROXY_WORKERS = int(os.environ.get("PROXY_WORKERS", "0"))
+PROXY_TIMEOUT_SEC = int(os.environ.get("PROXY_TIMEOUT_SEC", "1800"))
+
+FFMPEG_PATH = shutil.which("ffmpeg")
+HAS_FFMPEG = FFMPEG_PATH is not None
+
+PathLike = Union[str, Path]
+
+
+def _posix(p: PathLike) -> str:
+    return str(p).replace("\\", "/")
+
+
+def analysis_cache_key(video_url: str) -> str:
+    """Tên thư mục cache của genmini_analyze.analyze_video_production_standard."""
+    return re.sub(r"\W+", "_", video_url.split("v=")[-1] if "v=" in video_url else video_url)[-40:]
+
+
+def cached_analysis_proxy(url: str = "", video_id: str = "") -> Optional[Path]:
+    """Proxy MP4 genmini đã tải cho url/id (None nếu chưa có)."""
+    keys = []
+    if url:
+        keys.append(analysis_cache_key(url))
+    if video_id and video_id not in keys:
+        keys.append(video_id)
+    for key in keys:
+        d = ANALYSIS_CACHE_DIR / key
+        if not d.is_dir():
+            continue
+        # webm/mkv (VP9...) Premiere không dùng làm proxy được -> transcode
+        for p in sorted(d.glob("*_proxy.mp4")):
+            if p.stat().st_size > 1024:
+                return p
+    return None
+
+
+def _compatible(media: Dict[str, Any], proxy: Dict[str, Any]) -> bool:
+    """Cùng fps và tỉ lệ khung (Premiere từ chối attachProxy nếu khác)."""
+    if not media or not proxy:
+        return False
+    if abs(float(media.get("fps") or 0) - float(proxy.get("fps") or 0)) > 0.01:
+        return False
+    mw, mh = media.get("width") or 0, media.get("height") or 0
+    pw, ph = proxy.get("width") or 0, proxy.get("height") or 0
+    if not (mw and mh and pw and ph):
+        return False
+    return abs(mw / mh - pw / ph) <= 0.01 * (mw / mh)
+
+
+def local_proxy_path(media_path: PathLike) -> Path:
+    p = Path(media_path)
+    return p.parent / PROXY_DIRNAME / (p.stem + PROXY_SUFFIX)
+
+
+def _fresh(proxy: Path, media_path: PathLike) -> bool:
+    try:
+        return proxy.stat().st_size > 1024 and proxy.stat().st_mtime >= os.stat(media_path).st_mtime
+    except OSError:
+        return False
+
+
+def transcode_proxy(args: Tuple[str, str, int]) -> Tuple[str, Optional[str], str]:
+    """
+    (src, dst, height) -> (src, dst | None, lỗi). Chạy trong process con.
+    H.264 GOP ngắn không B-frame để scrub mượt; audio giữ số kênh gốc
+    (attachProxy yêu cầu khớp kênh audio).
+    """
+    src, dst, height = args
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp = dst + ".part.mp4"
+    cmd = [
+        FFMPEG_PATH, "-y", "-v", "error",
+        "-i", src,
+        "-vf", f"scale=-2:{height}",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "26",
+        "-g", "15", "-bf", "0", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", "128k",
+        "-movflags", "+faststart",
+        tmp,
+    ]
+    try:
+        p = subprocess.run(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            text=True, encoding="utf-8", errors="ignore", timeout=PROXY_TIMEOUT_SEC,
+        )
+        if p.returncode != 0:
+            raise RuntimeError((p.stderr or "").strip()[:300] or f"exit {p.returncode}")
+        os.replace(tmp, dst)
+        return src, dst, ""
+    except Exception as e:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return src, None, f"{type(e).__name__}: {e}"
+
+
+def collect_media(resource_dir: PathLike) -> List[str]:
+    """Video trong các thư mục con trực tiếp của resource (giống importMultipleFolders)."""
+    root = Path(resource_dir)
+    if not root.is_dir():
+        return []
+    try:
+        with ResourceCatalog(str(root)) as cat:
+            cat.rescan()
+            # Chỉ file nằm ngay trong <group>/, không lấy thư mục con sâu hơn
+            return [p for p in cat.videos()
+                    if os.path.dirname(os.path.dirname(p)) == cat.root and p.lower().endswith(VIDEO_EXTENSIONS)]
+    except Exception as e:
+        print(f"[proxies][WARN] Catalog lỗi ({e}) -> duyệt thư mục")
+    out: List[str] = []
+    for group in sorted(root.iterdir()):
+        if not group.is_dir() or group.name.startswith((".", "_")):
+            continue
+        for f in sorted(group.iterdir()):
+            if f.is_file() and f.suffix.lower() in VIDEO_EXTENSIONS:
+                out.append(str(f))
+    return out
+
+
+def media_from_import_list(import_list_path: PathLike) -> List[str]:
+    """File video trong import_list.json (core/premierCore/import_list.py)."""
+    with open(import_list_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    out: List[str] = []
+    for b in data.get("bins") or []:
+        out.extend(p for p in b.get("files") or [] if p.lower().endswith(VIDEO_EXTENSIONS))
+    return out
+
+
+def build_proxy_map(
+    media_files: Iterable[PathLike],
+    transcode_missing: bool = True,
+    max_workers: Optional[int] = None,
+    height: int = PROXY_HEIGHT,
+) -> Dict[str, str]:
+    """{media path: proxy path}. File không có proxy (và không transcode được) bị bỏ qua."""
+    mapping: Dict[str, str] = {}
+    pending: List[Tuple[str, str, int]] = []
+    manifests: Dict[str, Dict[str, Any]] = {}
+    indexes: Dict[str, MediaIndex] = {}
+
+    for media in media_files:
+        media = os.path.abspath(str(media))
+        if not os.path.isfile(media):
+            continue
+        group_dir = os.path.dirname(media)
+
+        local = local_proxy_path(media)
+        if _fresh(local, media):
+            mapping[media] = str(local)
+            continue
+
+        if group_dir not in manifests:
+            manifests[group_dir] = read_manifest(group_dir).get("items") or {}
+        entry = manifests[group_dir].get(os.path.basename(media)) or {}
+        cached = cached_analysis_proxy(entry.get("url") or "", entry.get("id") or "")
+        if cached is not None:
+            # Metadata media gốc lấy từ catalog của resource (probe 1 lần)
+            resource_dir = os.path.dirname(group_dir)
+            if resource_dir not in indexes:
+                indexes[resource_dir] = MediaIndex(resource_dir)
+                indexes[resource_dir].refresh()
+            meta = indexes[resource_dir].get(media) or probe_media(media)
+            if _compatible(meta, probe_media(str(cached))):
+                mapping[media] = str(cached)
+                continue
+
+        if transcode_missing:
+            pending.append((media, str(local), height))
+
+    if pending and not HAS_FFMPEG:
+        print(f"[proxies][WARN] Không có ffmpeg, bỏ qua {len(pending)} file chưa có proxy.")
+        pending = []
+
+    if pending:
+        workers = max_workers or PROXY_WORKERS or os.cpu_count() or 1
+        workers = max(1, min(workers, len(pending)))
+        print(f"[proxies] Transcode {len(pending)} proxy ({workers} tiến trình)...")
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = [ex.submit(transcode_proxy, job) for job in pending]
+            for done, fut in enumerate(as_completed(futures), start=1):
+                src, dst, err = fut.result()
+                if dst:
+                    mapping[src] = dst
+                    print(f"[proxies] ({done}/{len(pending)}) OK {os.path.basename(src)}")
+                else:
+                    print(f"[proxies][WARN] ({done}/{len(pending)}) {os.path.basename(src)}: {err}")
+
+    return mapping
+
+
+def write_proxy_map(data_folder: PathLike, mapping: Dict[str, str]) -> Optional[Path]:
+    """Ghi data_folder/proxy_map.json (atomic). mapping rỗng -> None."""
+    if not mapping:
+        return None
+    out = Path(data_folder) / PROXY_MAP_FILENAME
+    out.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "version": PROXY_MAP_VERSION,
+        "items": [{"media": _posix(m), "proxy": _posix(p)} for m, p in sorted(mapping.items())],
+    }
+    tmp = str(out) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, out)
+    return out
+
+
+def prepare_proxies(
+    data_folder: PathLike,
+    resource_dir: Optional[PathLike] = None,
+    import_list: Optional[PathLike] = None,
+    transcode_missing: bool = True,
+    max_workers: Optional[int] = None,
+) -> Optional[Path]:
+    """Proxy cho media sẽ được import (import_list nếu có, ngược lại cả resource)."""
+    if import_list and os.path.isfile(str(import_list)):
+        media = media_from_import_list(import_list)
+    elif resource_dir:
+        media = collect_media(resource_dir)
+    else:
+        return None
+    return write_proxy_map(data_folder, build_proxy_map(media, transcode_missing, max_workers))
+
+
+# Test function
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sinh proxy_map.json cho attachProxies.jsx")
+    parser.add_argument("--data-folder", required=True)
+    parser.add_argument("--resource")
+    parser.add_argument("--import-list")
+    parser.add_argument("--no-transcode", action="store_true")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    path = prepare_proxies(args.data_folder, args.resource, args.import_list,
+                           transcode_missing=not args.no_transcode, max_workers=args.workers)
+    print(path or "Không có proxy nào")
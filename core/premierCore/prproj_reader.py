@@ -0,0 +1,411 @@
+"""
+prproj_reader.py
+
+Đọc timeline trực tiếp từ file .prproj (gzip XML), không cần Premiere:
+    - track3_keywords.json / .csv   (giống extractTrack3Keywords.jsx)
+    - timeline_export.json / .csv   (giống getTimeline.jsx)
+
+.prproj là danh sách object phẳng nối với nhau bằng tham chiếu:
+    ObjectID="n"   <- <X ObjectRef="n"/>
+    ObjectUID="u"  <- <X ObjectURef="u"/>
+Chuỗi cần đi: Sequence -> VideoTrackGroup -> VideoClipTrack ->
+VideoClipTrackItem (Start/End ticks) -> SubClip (Name) -> VideoClip ->
+VideoMediaSource -> Media (đường dẫn file); text lấy từ InstanceName của
+VideoFilterComponent trong chain component của track item.
+
+LƯU Ý: đọc bản đã LƯU trên đĩa; thay đổi chưa save trong Premiere không có.
+Sequence chọn theo tên (mặc định "Main" như path.txt), không có thì lấy
+sequence nhiều clip nhất (file không lưu activeSequence).
+
+File đọc bằng iterparse (như get_name_list): object cấp 1 không nằm trên
+chuỗi video (Audio*, *ComponentParam - keyframe/tham số effect, phần lớn
+dung lượng project) bị bỏ ngay khi đóng tag, không vào cây / bảng id.
+Thời gian vẫn tỉ lệ với kích thước file (giải nén + parse hết XML: vài
+giây với project vài trăm MB); project_cache giữ kết quả theo mtime.
+"""
+
+import argparse
+import gzip
+import json
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+TICKS_PER_SECOND = 254016000000
+TRACK3_INDEX = 2  # Track 3 = index 2 (0-based)
+
+PathLike = Union[str, Path]
+
+
+def _skip_object(tag: str) -> bool:
+    """Object cấp 1 không bao giờ được deref khi đọc timeline video."""
+    return tag.startswith("Audio") or tag.endswith("ComponentParam")
+
+
+# =============================
+# Format số / timecode giống ExtendScript
+# =============================
+
+def js_number(x: float) -> Union[int, float]:
+    """Số nguyên dạng float -> int để JSON/CSV ra '5' như JS thay vì '5.0'."""
+    if isinstance(x, float) and x.is_integer() and abs(x) < 1e21:
+        return int(x)
+    return x
+
+
+def js_str(x: Any) -> str:
+    return str(js_number(x)) if isinstance(x, float) else str(x)
+
+
+def seconds_to_timecode(seconds: float) -> str:
+    """HH:MM:SS.mmm, cùng công thức secondsToTimecode() của extractTrack3Keywords.jsx."""
+    hrs = int(seconds // 3600)
+    mins = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    ms = int((seconds % 1) * 1000)
+    return f"{hrs:02d}:{mins:02d}:{secs:02d}.{ms:03d}"
+
+
+# =============================
+# Document
+# =============================
+
+class PrprojDocument:
+    """Bảng object của .prproj + tra tham chiếu ObjectRef / ObjectURef."""
+
+    def __init__(self, root: ET.Element):
+        self.root = root
+        self.by_id: Dict[str, ET.Element] = {}
+        self.by_uid: Dict[str, ET.Element] = {}
+        for el in root:
+            oid = el.get("ObjectID")
+            if oid:
+                self.by_id[oid] = el
+            uid = el.get("ObjectUID")
+            if uid:
+                self.by_uid[uid] = el
+
+    @classmethod
+    def load(cls, path: PathLike) -> "PrprojDocument":
+        # Giải nén + parse dạng stream; chỉ giữ object cấp 1 cần cho timeline
+        root: Optional[ET.Element] = None
+        kept: List[ET.Element] = []
+        depth = 0
+        with gzip.open(path, "rb") as f:
+            for event, el in ET.iterparse(f, events=("start", "end")):
+                if event == "start":
+                    if root is None:
+                        root = el
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth == 1:
+                    if not _skip_object(el.tag):
+                        kept.append(el)
+                    # Gỡ khỏi root: object bỏ qua được giải phóng ngay
+                    root.clear()
+        if root is None:
+            raise ValueError(f"Project rỗng: {path}")
+        doc_root = ET.Element(root.tag)
+        doc_root.extend(kept)
+        return cls(doc_root)
+
+    def deref(self, el: Optional[ET.Element]) -> Optional[ET.Element]:
+        if el is None:
+            return None
+        ref = el.get("ObjectRef")
+        if ref:
+            return self.by_id.get(ref)
+        uref = el.get("ObjectURef")
+        if uref:
+            return self.by_uid.get(uref)
+        return None
+
+    def deref_path(self, el: Optional[ET.Element], path: str) -> Optional[ET.Element]:
+        return self.deref(el.find(path)) if el is not None else None
+
+    # ------------------------------------------------------------------
+    def sequences(self) -> List[ET.Element]:
+        return [el for el in self.root if el.tag == "Sequence"]
+
+    @staticmethod
+    def sequence_name(seq: ET.Element) -> str:
+        return (seq.findtext("Name") or seq.findtext(".//Node/Properties/Name") or "").strip()
+
+    def video_tracks(self, seq: ET.Element) -> List[ET.Element]:
+        """VideoClipTrack theo thứ tự index (V1, V2, ...)."""
+        for tg in seq.findall(".//TrackGroups/TrackGroup"):
+            group = self.deref(tg.find("Second"))
+            if group is None or group.tag != "VideoTrackGroup":
+                continue
+            refs = group.findall(".//Tracks/Track")
+            refs.sort(key=lambda t: int(t.get("Index", "0")))
+            return [t for t in (self.deref(r) for r in refs) if t is not None]
+        return []
+
+    def frame_rate(self, seq: ET.Element) -> float:
+        """fps của sequence (FrameRate trong VideoTrackGroup = ticks/frame), mặc định 25 như getTimeline.jsx."""
+        for tg in seq.findall(".//TrackGroups/TrackGroup"):
+            group = self.deref(tg.find("Second"))
+            if group is not None and group.tag == "VideoTrackGroup":
+                fr = group.findtext(".//FrameRate")
+                if fr and fr.strip().isdigit() and int(fr) > 0:
+                    return TICKS_PER_SECOND / int(fr)
+        return 25.0
+
+    def frame_size(self, seq: ET.Element) -> Optional[Tuple[int, int]]:
+        """(width, height) của sequence theo FrameRect "l,t,r,b" trong VideoTrackGroup; None nếu không có."""
+        for tg in seq.findall(".//TrackGroups/TrackGroup"):
+            group = self.deref(tg.find("Second"))
+            if group is not None and group.tag == "VideoTrackGroup":
+                rect = [p.strip() for p in (group.findtext(".//FrameRect") or "").split(",")]
+                if len(rect) == 4 and all(p.lstrip("-").isdigit() for p in rect):
+                    w, h = int(rect[2]) - int(rect[0]), int(rect[3]) - int(rect[1])
+                    if w > 0 and h > 0:
+                        return w, h
+        return None
+
+    def track_clips(self, track: ET.Element) -> List[Dict[str, Any]]:
+        """Clip của 1 track, sort theo start như track.clips trong ExtendScript."""
+        clips = []
+        for ref in track.findall(".//ClipItems/TrackItems/TrackItem"):
+            item = self.deref(ref)
+            if item is None:
+                continue
+            clip = self._clip_info(item)
+            if clip is not None:
+                clips.append(clip)
+        clips.sort(key=lambda c: c["start_ticks"])
+        return clips
+
+    def _clip_info(self, item: ET.Element) -> Optional[Dict[str, Any]]:
+        start = item.findtext(".//TrackItem/Start")
+        end = item.findtext(".//TrackItem/End")
+        if end is None:
+            return None
+        start_ticks = int(start) if start and start.strip() else 0
+        end_ticks = int(end)
+
+        subclip = self.deref_path(item, ".//SubClip")
+        name = (subclip.findtext("Name") or "") if subclip is not None else ""
+        master = self.deref_path(subclip, ".//MasterClip")
+        project_name = (master.findtext(".//Name") or "") if master is not None else ""
+
+        media_clip = self.deref_path(subclip, ".//Clip")
+        in_ticks = 0
+        media_path = ""
+        if media_clip is not None:
+            in_p = media_clip.findtext(".//InPoint")
+            in_ticks = int(in_p) if in_p and in_p.strip().lstrip("-").isdigit() else 0
+            source = self.deref_path(media_clip, ".//Source")
+            media = self.deref_path(source, ".//Media")
+            if media is not None:
+                media_path = media.findtext("ActualMediaFilePath") or media.findtext("FilePath") or ""
+
+        return {
+            "name": name or project_name,
+            "project_item_name": project_name,
+            "start_ticks": start_ticks,
+            "end_ticks": end_ticks,
+            "in_ticks": in_ticks,
+            "media_path": media_path,
+            "text": self._clip_text(item),
+        }
+
+    def _clip_text(self, item: ET.Element) -> str:
+        chain = self.deref_path(item, ".//ComponentOwner/Components")
+        if chain is None:
+            return ""
+        for ref in chain.findall(".//Components/Component"):
+            comp = self.deref(ref)
+            if comp is None or comp.tag != "VideoFilterComponent":
+                continue
+            inst = comp.findtext(".//InstanceName")
+            if inst and inst.strip():
+                return inst.strip()
+        return ""
+
+    # ------------------------------------------------------------------
+    def find_sequence(self, name: Optional[str] = None) -> Optional[ET.Element]:
+        seqs = self.sequences()
+        if not seqs:
+            return None
+        if name:
+            for seq in seqs:
+                if self.sequence_name(seq) == name:
+                    return seq
+        if len(seqs) == 1:
+            return seqs[0]
+        return max(
+            seqs,
+            key=lambda s: sum(len(t.findall(".//ClipItems/TrackItems/TrackItem")) for t in self.video_tracks(s)),
+        )
+
+
+# =============================
+# Track 3 keywords (extractTrack3Keywords.jsx)
+# =============================
+
+def extract_track3_keywords(doc: PrprojDocument, sequence_name: str = "Main") -> List[Dict[str, Any]]:
+    seq = doc.find_sequence(sequence_name)
+    if seq is None:
+        raise ValueError("Project không có sequence")
+    tracks = doc.video_tracks(seq)
+    if len(tracks) <= TRACK3_INDEX:
+        raise ValueError("Sequence không có đủ 3 video tracks")
+
+    keywords = []
+    for i, clip in enumerate(doc.track_clips(tracks[TRACK3_INDEX])):
+        keyword = clip["name"]
+        if not keyword:
+            continue
+        start = clip["start_ticks"] / TICKS_PER_SECOND
+        end = clip["end_ticks"] / TICKS_PER_SECOND
+        keywords.append({
+            "index": i,
+            "keyword": keyword,
+            "start_seconds": js_number(start),
+            "end_seconds": js_number(end),
+            "duration_seconds": js_number(end - start),
+            "start_timecode": seconds_to_timecode(start),
+            "end_timecode": seconds_to_timecode(end),
+        })
+    return keywords
+
+
+def write_track3_keywords(keywords: List[Dict[str, Any]], data_folder: PathLike) -> Dict[str, str]:
+    """Ghi track3_keywords.json + .csv cùng format extractTrack3Keywords.jsx."""
+    data_folder = Path(data_folder)
+    data_folder.mkdir(parents=True, exist_ok=True)
+    json_path = data_folder / "track3_keywords.json"
+    csv_path = data_folder / "track3_keywords.csv"
+
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"version": "1.0", "count": len(keywords), "keywords": keywords}, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+    lines = ["index,keyword,start_seconds,end_seconds,duration_seconds,start_timecode,end_timecode"]
+    for kw in keywords:
+        lines.append(
+            f'{kw["index"]},"{kw["keyword"].replace(chr(34), chr(34) * 2)}",'
+            f'{js_str(kw["start_seconds"])},{js_str(kw["end_seconds"])},{js_str(kw["duration_seconds"])},'
+            f'"{kw["start_timecode"]}","{kw["end_timecode"]}"'
+        )
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        f.write("\n".join(lines))
+
+    return {"json_path": str(json_path), "csv_path": str(csv_path)}
+
+
+def export_track3_keywords(
+    prproj_path: PathLike,
+    data_folder: PathLike,
+    sequence_name: str = "Main",
+) -> Dict[str, Any]:
+    keywords = extract_track3_keywords(PrprojDocument.load(prproj_path), sequence_name)
+    paths = write_track3_keywords(keywords, data_folder)
+    return dict(paths, count=len(keywords))
+
+
+# =============================
+# Timeline export (getTimeline.jsx)
+# =============================
+
+def extract_timeline(
+    doc: PrprojDocument,
+    sequence_name: str = "Main",
+    track_index: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    {trackIndex, clips: [...]} như runQuickTimelineTest() của getTimeline.jsx.
+    File không lưu clip đang chọn nên mặc định dùng nhánh fallback của JSX:
+    track video trên cùng có clip.
+    """
+    seq = doc.find_sequence(sequence_name)
+    if seq is None:
+        raise ValueError("Project không có sequence")
+    tracks = [doc.track_clips(t) for t in doc.video_tracks(seq)]
+
+    if track_index is None:
+        track_index = next((i for i in range(len(tracks) - 1, -1, -1) if tracks[i]), -1)
+    if track_index < 0 or track_index >= len(tracks):
+        return {"trackIndex": track_index, "clips": []}
+
+    ranges = []
+    for c, clip in enumerate(tracks[track_index]):
+        start = clip["start_ticks"] / TICKS_PER_SECOND
+        end = clip["end_ticks"] / TICKS_PER_SECOND
+        ranges.append({
+            "indexInTrack": c,
+            "name": clip["name"],
+            "startSeconds": js_number(start),
+            "endSeconds": js_number(end),
+            "durationSeconds": js_number(end - start),
+            "mediaPath": clip["media_path"],
+            "textContent": clip["text"],
+        })
+    return {"trackIndex": track_index, "clips": ranges}
+
+
+def _csv_field(s: str) -> str:
+    """Giống getTimeline.jsx: luôn nhân đôi ", chỉ bọc ngoặc khi có dấu phẩy."""
+    s = (s or "").replace('"', '""')
+    return f'"{s}"' if "," in s else s
+
+
+def write_timeline(timeline: Dict[str, Any], data_folder: PathLike) -> Dict[str, str]:
+    data_folder = Path(data_folder)
+    data_folder.mkdir(parents=True, exist_ok=True)
+    json_path = data_folder / "timeline_export.json"
+    csv_path = data_folder / "timeline_export.csv"
+
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(timeline, f, ensure_ascii=False, indent=2)
+
+    lines = ["indexInTrack,name,startSeconds,endSeconds,durationSeconds,mediaPath,textContent"]
+    for r in timeline["clips"]:
+        lines.append(",".join([
+            str(r["indexInTrack"]),
+            _csv_field(r["name"]),
+            js_str(r["startSeconds"]),
+            js_str(r["endSeconds"]),
+            js_str(r["durationSeconds"]),
+            _csv_field(r["mediaPath"]),
+            _csv_field(r["textContent"]),
+        ]))
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        f.write("\n".join(lines))
+
+    return {"json_path": str(json_path), "csv_path": str(csv_path)}
+
+
+def export_timeline(
+    prproj_path: PathLike,
+    data_folder: PathLike,
+    sequence_name: str = "Main",
+    track_index: Optional[int] = None,
+) -> Dict[str, Any]:
+    timeline = extract_timeline(PrprojDocument.load(prproj_path), sequence_name, track_index)
+    paths = write_timeline(timeline, data_folder)
+    return dict(paths, track_index=timeline["trackIndex"], count=len(timeline["clips"]))
+
+
+# Test function
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description="Đọc Track 3 keywords / timeline từ .prproj (không cần Premiere)")
+    parser.add_argument("prproj")
+    parser.add_argument("--data-folder", default=".")
+    parser.add_argument("--sequence-name", default="Main")
+    parser.add_argument("--timeline", action="store_true", help="Xuất timeline_export.* thay vì track3_keywords.*")
+    parser.add_argument("--track-index", type=int, default=None)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.timeline:
+        res = export_timeline(args.prproj, args.data_folder, args.sequence_name, args.track_index)
+    else:
+        res = export_track3_keywords(args.prproj, args.data_folder, args.sequence_name)
+    res["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    print(json.dumps(res, ensure_ascii=False, indent=2))
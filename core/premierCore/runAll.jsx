@@ -40,10 +40,70 @@ var ROOT_DIR = (function () {
 
 var DATA_DIR = joinPath(ROOT_DIR, 'data');
 
+/**
+ * Status/heartbeat cho Python (core/premierCore/jsx_status.py):
+ * data/_status_<script>.json với state running | done | error
+ */
+var STATUS_SCRIPT = 'runAll';
+var STATUS_PATH = joinPath(DATA_DIR, '_status_' + STATUS_SCRIPT + '.json');
+
+function jsonQuote(s) {
+    return '"' + String(s)
+        .replace(/\\/g, '\\\\')
+        .replace(/"/g, '\\"')
+        .replace(/\r/g, '\\r')
+        .replace(/\n/g, '\\n')
+        .replace(/\t/g, '\\t') + '"';
+}
+
+function jsonValue(v) {
+    if (v === null || v === undefined) return 'null';
+    if (typeof v === 'number') return isFinite(v) ? String(v) : 'null';
+    if (typeof v === 'boolean') return v ? 'true' : 'false';
+    return jsonQuote(v);
+}
+
+function writeStatus(state, progress, message, result) {
+    var parts = [];
+    if (result) {
+        for (var k in result) {
+            if (result.hasOwnProperty(k)) parts.push(jsonQuote(k) + ': ' + jsonValue(result[k]));
+        }
+    }
+    var json = '{"script": ' + jsonQuote(STATUS_SCRIPT) +
+        ', "state": ' + jsonQuote(state) +
+        ', "progress": ' + jsonValue(Math.round((progress || 0) * 1000) / 1000) +
+        ', "message": ' + jsonQuote(message || '') +
+        ', "result": {' + parts.join(', ') + '}' +
+        ', "updated": ' + (new Date()).getTime() + '}';
+    try {
+        var f = new File(STATUS_PATH);
+        f.encoding = 'UTF-8';
+        if (f.open('w')) {
+            f.write(json);
+            f.close();
+        }
+    } catch (e) {
+        log('WARN: Cannot write status: ' + e);
+    }
+}
+
+/**
+ * Job từ jsxListener.jsx: JOB_PARAMS ghi đè giá trị trong path.txt
+ */
+function applyJobParams(cfg) {
+    if (typeof JOB_PARAMS === 'undefined' || !JOB_PARAMS) return cfg;
+    if (!cfg) cfg = {};
+    for (var k in JOB_PARAMS) {
+        if (JOB_PARAMS.hasOwnProperty(k)) cfg[k] = String(JOB_PARAMS[k]);
+    }
+    return cfg;
+}
+
 function readPathConfig() {
     var pathTxt = joinPath(DATA_DIR, 'path.txt');
     log('Reading config: ' + pathTxt);
-    if (!fileExists(pathTxt)) return null;
+    if (!fileExists(pathTxt)) return applyJobParams(null);
 
     var lines = readLines(pathTxt);
     var cfg = {};
@@ -57,32 +117,57 @@ function readPathConfig() {
             cfg[key] = val;
         }
     }
-    return cfg;
+    return applyJobParams(cfg);
 }
 
-function runAll() {
-    var cfg = readPathConfig();
-    if (!cfg) {
-        alert('LOI: Khong tim thay data/path.txt');
-        return;
+function readJSONFile(p) {
+    var f = new File(p);
+    f.encoding = 'UTF-8';
+    if (!f.exists || !f.open('r')) return null;
+    var content = f.read();
+    f.close();
+    try {
+        return eval('(' + content + ')');
+    } catch (e) {
+        log('ERROR parsing JSON ' + p + ': ' + e);
+        return null;
     }
+}
 
-    var projectPath = normalizePath(cfg.project_path || '');
-    var dataFolder  = normalizePath(cfg.data_folder || '');
-    var seqName     = cfg.sequence_name || "Main";
+/**
+ * Mở project (nếu chưa mở) bằng scripting API
+ */
+function openProject(projectPath) {
+    if (app.project && app.project.path && normalizePath(app.project.path) === projectPath) {
+        log('Project already opened.');
+        return true;
+    }
+    log('Opening project: ' + projectPath);
+    app.openDocument(projectPath, true, true, true);
+    return !!(app.project && normalizePath(app.project.path) === projectPath);
+}
 
-    if (projectPath && fileExists(projectPath)) {
-        if (app.project.path && normalizePath(app.project.path) !== projectPath) {
-            log('Opening project: ' + projectPath);
-            app.openDocument(projectPath);
-        } else {
-            log('Project already opened.');
-        }
-    } else {
-        alert('Loi: Duong dan Project sai: ' + projectPath);
-        return;
+/**
+ * Chạy import + cut + save cho 1 project.
+ * job: {project_path, data_folder, resource_dir, csv_path, sequence_name, import_list, proxy_map}
+ * Trả về '' nếu OK, ngược lại message lỗi.
+ */
+function runProject(job) {
+    var projectPath = normalizePath(job.project_path || '');
+    var dataFolder  = normalizePath(job.data_folder || '');
+    var seqName     = job.sequence_name || "Main";
+
+    if (!projectPath || !fileExists(projectPath)) {
+        return 'Invalid project path: ' + projectPath;
+    }
+    if (!openProject(projectPath)) {
+        log('WARN: Active project differs after open: ' + (app.project ? app.project.path : ''));
     }
 
+    // Globals cho importResource.jsx / cutAndPush.jsx (reset mỗi project)
+    RUNALL_RESOURCE_DIR = normalizePath(job.resource_dir || '');
+    RUNALL_IMPORT_LIST = normalizePath(job.import_list || '');
+
     var importScript = joinPath(ROOT_DIR, 'core/premierCore/importResource.jsx');
     if (fileExists(importScript)) {
         try {
@@ -93,14 +178,28 @@ function runAll() {
         }
     }
 
-    var csvPath = joinPath(dataFolder, 'timeline_export_merged.csv');
-    if (!fileExists(csvPath)) {
-        csvPath = joinPath(dataFolder, 'timeline_export.csv');
+    // Proxy low-res (core/premierCore/proxies.py) cho clip vừa import
+    RUNALL_PROXY_MAP = normalizePath(job.proxy_map || '');
+    var proxyScript = joinPath(ROOT_DIR, 'core/premierCore/attachProxies.jsx');
+    if (RUNALL_PROXY_MAP && fileExists(proxyScript)) {
+        try {
+            $.writeln('[runAll] Attaching proxies...');
+            $.evalFile(new File(proxyScript));
+        } catch(e) {
+            log('Proxy Error: ' + e);
+        }
+    }
+
+    var csvPath = normalizePath(job.csv_path || '');
+    if (!csvPath || !fileExists(csvPath)) {
+        csvPath = joinPath(dataFolder, 'timeline_export_merged.csv');
+        if (!fileExists(csvPath)) {
+            csvPath = joinPath(dataFolder, 'timeline_export.csv');
+        }
     }
 
     if (!fileExists(csvPath)) {
-        alert('LOI: Khong tim thay CSV tai ' + dataFolder);
-        return;
+        return 'CSV not found in ' + dataFolder;
     }
 
     log('TARGET CSV: ' + csvPath);
@@ -109,29 +208,111 @@ function runAll() {
     RUNALL_SEQUENCE_NAME = seqName;
 
     var cutScript = joinPath(ROOT_DIR, 'core/premierCore/cutAndPush.jsx');
-    if (fileExists(cutScript)) {
-        try {
-            $.writeln('[runAll] Executing cutAndPush...');
-            $.evalFile(new File(cutScript));
-        } catch(e) {
-            alert('Loi cutAndPush: ' + e);
-            
-        }
-    } else {
-        alert('Khong tim thay cutAndPush.jsx');
+    if (!fileExists(cutScript)) {
+        return 'cutAndPush.jsx not found';
+    }
+    var cutErr = '';
+    try {
+        $.writeln('[runAll] Executing cutAndPush...');
+        $.evalFile(new File(cutScript));
+    } catch(e) {
+        cutErr = 'cutAndPush: ' + e;
     }
 
+    // Lưu cả khi cutAndPush lỗi giữa chừng để giữ phần đã import/cắt
     if (app.project) {
         app.project.save();
         log('Project Saved.');
     }
-    
-    
-    
-    
+    return cutErr;
+}
+
+/**
+ * Batch: 1 file JSON liệt kê nhiều project (core/premierCore/batch_job.py),
+ * chạy tuần tự trong cùng 1 phiên Premiere, đóng project sau khi xong.
+ */
+function runBatch(batchPath) {
+    var batch = readJSONFile(batchPath);
+    if (!batch || !batch.jobs) {
+        writeStatus('error', 1, 'Invalid batch job: ' + batchPath);
+        return;
+    }
+
+    RUNALL_BATCH_MODE = true;
+    var jobs = batch.jobs;
+    var ok = 0;
+    var failed = [];
+
+    for (var i = 0; i < jobs.length; i++) {
+        var job = jobs[i];
+        var name = job.project_slug || job.project_path;
+        writeStatus('running', i / jobs.length, 'Project ' + (i + 1) + '/' + jobs.length + ': ' + name,
+            { ok: ok, failed: failed.length });
+
+        var err = '';
+        try {
+            err = runProject(job);
+        } catch (e) {
+            err = 'Exception: ' + e;
+        }
+
+        if (err) {
+            log('FAILED ' + name + ': ' + err);
+            failed.push(name + ': ' + err);
+        } else {
+            ok++;
+        }
+
+        if (batch.close_projects !== false && app.project && app.project.path) {
+            try {
+                app.project.closeDocument(false, false);
+            } catch (e2) {
+                log('WARN: closeDocument: ' + e2);
+            }
+        }
+    }
+
+    RUNALL_BATCH_MODE = false;
+    writeStatus(failed.length === jobs.length && jobs.length ? 'error' : 'done', 1,
+        'Batch: ' + ok + '/' + jobs.length + ' projects OK',
+        { projects: jobs.length, ok: ok, failed: failed.length, errors: failed.join(' | ') });
+    log('BATCH DONE: ' + ok + '/' + jobs.length);
+}
+
+function runAll() {
+    writeStatus('running', 0, 'Start');
+
+    var cfg = readPathConfig();
+    if (!cfg) {
+        writeStatus('error', 1, 'data/path.txt not found');
+        alert('LOI: Khong tim thay data/path.txt');
+        return;
+    }
+
+    if (cfg.batch_job) {
+        runBatch(normalizePath(cfg.batch_job));
+        return;
+    }
+
+    // 1 project theo path.txt
+    RUNALL_BATCH_MODE = false;
+    writeStatus('running', 0.1, 'Importing and cutting');
+    var err = runProject(cfg);
+    if (err) {
+        writeStatus('error', 1, err);
+        alert('LOI: ' + err);
+        return;
+    }
+
+    writeStatus('done', 1, 'Done', { project_path: normalizePath(cfg.project_path || ''), csv_path: RUNALL_TIMELINE_CSV_PATH });
     log('DONE.');
 }
 
-runAll();
+try {
+    runAll();
+} catch (e) {
+    writeStatus('error', 1, 'Exception: ' + e);
+    log('ERROR: ' + e);
+}
 
 
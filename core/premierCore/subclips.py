@@ -0,0 +1,273 @@
+"""
+subclips.py
+
+Cắt sẵn từng đoạn src_start–src_end của timeline_export_merged.csv thành
+file nhỏ riêng (ffmpeg, process pool), rồi ghi lại CSV trỏ vào các file đó,
+để project chỉ import vài giây mỗi video thay vì cả file 30–60 phút.
+
+    <resource>/_subclips/<bin>_<tên file>_<start ms>_<end ms>.mp4
+    <resource>/_subclips/_index.json    {tên subclip: clip_in}
+
+Cột thêm vào CSV (cutAndPush.jsx, fcp_xml.py, import_list.py đọc):
+    clip_path  - file subclip
+    clip_in    - điểm In trong subclip (giây)
+
+Cách cắt mỗi đoạn:
+    - keyframe trùng src_start            -> stream copy đúng đoạn
+    - keyframe gần nhất trước src_start cách <= SUBCLIP_PREROLL_MAX giây
+                                          -> stream copy từ keyframe đó,
+                                             clip_in = phần pre-roll
+    - còn lại                             -> re-encode đoạn (vài giây)
+Không ghép đầu re-encode + đuôi stream copy trong 1 file: 2 bộ SPS/PPS H.264
+khác nhau trong cùng track MP4 thì Premiere decode không ổn định.
+
+Subclip chỉ có video (timeline của cutAndPush.jsx không dùng audio).
+
+    python core/premierCore/subclips.py --csv data/<slug>/timeline_export_merged.csv \
+        --resource <project>/resource
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    from .fcp_xml import ClipResolver, read_timeline_csv, timeline_row_range
+except ImportError:
+    from fcp_xml import ClipResolver, read_timeline_csv, timeline_row_range
+
+SUBCLIP_DIRNAME = "_subclips"
+# {tên subclip: clip_in} để dùng lại subclip đã cắt mà không probe lại
+SUBCLIP_INDEX_FILENAME = "_index.json"
+BACKUP_SUFFIX = ".orig.csv"
+
+SUBCLIP_PREROLL_MAX = float(os.environ.get("SUBCLIP_PREROLL_MAX", "3"))
+# 0 = số core CPU
+SUBCLIP_WORKERS = int(os.environ.get("SUBCLIP_WORKERS", "0"))
+SUBCLIP_TIMEOUT_SEC = int(os.environ.get("SUBCLIP_TIMEOUT_SEC", "600"))
+# Sai số coi như keyframe trùng điểm cắt (~1 frame 30fps)
+KEYFRAME_TOLERANCE = 0.034
+
+FFMPEG_PATH = shutil.which("ffmpeg")
+FFPROBE_PATH = shutil.which("ffprobe")
+HAS_FFMPEG = FFMPEG_PATH is not None and FFPROBE_PATH is not None
+
+PathLike = Union[str, Path]
+
+
+def _posix(p: PathLike) -> str:
+    return str(p).replace("\\", "/")
+
+
+def subclip_path(resource_dir: PathLike, source: Path, start: float, end: float) -> Path:
+    stem = re.sub(r"[^\w\-]+", "_", f"{source.parent.name}_{source.stem}")
+    return Path(resource_dir) / SUBCLIP_DIRNAME / f"{stem}_{int(round(start * 1000))}_{int(round(end * 1000))}.mp4"
+
+
+def _run(cmd: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        text=True, encoding="utf-8", errors="ignore", timeout=SUBCLIP_TIMEOUT_SEC,
+    )
+
+
+def keyframe_before(src: str, t: float, window: float) -> Optional[float]:
+    """Keyframe video cuối cùng <= t (+ sai số) trong [t - window, t]; None nếu không có."""
+    start = max(0.0, t - window)
+    p = _run([
+        FFPROBE_PATH, "-v", "error",
+        "-select_streams", "v:0", "-skip_frame", "nokey",
+        "-read_intervals", f"{start:.3f}%{t + KEYFRAME_TOLERANCE:.3f}",
+        "-show_entries", "frame=pts_time", "-of", "csv=p=0",
+        src,
+    ])
+    best = None
+    for line in (p.stdout or "").splitlines():
+        try:
+            k = float(line.strip().strip(","))
+        except ValueError:
+            continue
+        if k <= t + KEYFRAME_TOLERANCE and (best is None or k > best):
+            best = k
+    return best
+
+
+def cut_one(args: Tuple[str, str, float, float]) -> Tuple[str, Optional[float], str, str]:
+    """
+    (src, dst, start, end) -> (dst, clip_in | None, cách cắt, lỗi).
+    Chạy trong process con; ghi file .part rồi mới đổi tên.
+    """
+    src, dst, start, end = args
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp = dst[:-4] + ".part.mp4"
+    try:
+        key = keyframe_before(src, start, SUBCLIP_PREROLL_MAX)
+        if key is not None:
+            # -ss trước -i + copy: bắt đầu đúng keyframe `key`
+            mode = "copy" if start - key <= KEYFRAME_TOLERANCE else "copy+preroll"
+            clip_in = max(0.0, start - key) if mode != "copy" else 0.0
+            cmd = [
+                FFMPEG_PATH, "-y", "-v", "error",
+                "-ss", f"{key:.3f}", "-i", src, "-t", f"{end - key:.3f}",
+                "-map", "0:v:0", "-c", "copy", "-an",
+                "-avoid_negative_ts", "make_zero", "-movflags", "+faststart",
+                tmp,
+            ]
+        else:
+            mode, clip_in = "encode", 0.0
+            cmd = [
+                FFMPEG_PATH, "-y", "-v", "error",
+                "-ss", f"{start:.3f}", "-i", src, "-t", f"{end - start:.3f}",
+                "-map", "0:v:0", "-an",
+                "-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-pix_fmt", "yuv420p",
+                "-movflags", "+faststart",
+                tmp,
+            ]
+        p = _run(cmd)
+        if p.returncode != 0:
+            raise RuntimeError((p.stderr or "").strip()[:300] or f"exit {p.returncode}")
+        os.replace(tmp, dst)
+        return dst, round(clip_in, 3), mode, ""
+    except Exception as e:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return dst, None, "", f"{type(e).__name__}: {e}"
+
+
+def _fresh(dst: Path, src: Path) -> bool:
+    try:
+        return dst.stat().st_size > 0 and dst.stat().st_mtime >= src.stat().st_mtime
+    except OSError:
+        return False
+
+
+def _load_index(path: Path) -> Dict[str, float]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {k: float(v) for k, v in data.items()} if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(path: Path, index: Dict[str, float]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = str(path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def extract_subclips(
+    csv_path: PathLike,
+    resource_dir: PathLike,
+    out_csv: Optional[PathLike] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Cắt subclip cho mọi dòng CSV resolve được file nguồn, ghi lại CSV với
+    clip_path / clip_in (mặc định ghi đè csv_path, bản gốc giữ ở *.orig.csv).
+    Dòng đã có clip_path hợp lệ được giữ nguyên; subclip cùng đoạn dùng lại.
+    """
+    csv_path = Path(csv_path)
+    stats: Dict[str, Any] = {"rows": 0, "cut": 0, "reused": 0, "failed": [], "modes": {}}
+    if not HAS_FFMPEG:
+        print("[subclips][WARN] Không có ffmpeg/ffprobe → bỏ qua.")
+        return stats
+
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = [r for r in csv.reader(f) if r]
+    if len(rows) < 2:
+        return stats
+    header = rows[0]
+    lower = [h.strip().lower() for h in header]
+    for name in ("clip_path", "clip_in"):
+        if name not in lower:
+            header.append(name)
+            lower.append(name)
+    i_path, i_in = lower.index("clip_path"), lower.index("clip_in")
+
+    index_path = Path(resource_dir) / SUBCLIP_DIRNAME / SUBCLIP_INDEX_FILENAME
+    index = _load_index(index_path)
+    resolver = ClipResolver(resource_dir)
+    targets: Dict[int, str] = {}                            # dòng -> subclip
+    jobs: Dict[str, Tuple[str, str, float, float]] = {}     # subclip -> job
+    for entry in read_timeline_csv(csv_path):
+        stats["rows"] += 1
+        if entry["clip_path"] and os.path.isfile(entry["clip_path"]):
+            stats["reused"] += 1
+            continue
+        src = resolver.resolve(entry["bin_name"], entry["video_index"], entry["character"], entry["video_id"])
+        if src is None:
+            continue
+        start, duration = timeline_row_range(entry)
+        dst = subclip_path(resource_dir, src, start, start + duration)
+        targets[entry["row"]] = str(dst)
+        if dst.name in index and _fresh(dst, src):
+            continue
+        jobs.setdefault(str(dst), (str(src), str(dst), start, start + duration))
+
+    if jobs:
+        workers = max_workers or SUBCLIP_WORKERS or os.cpu_count() or 1
+        workers = max(1, min(workers, len(jobs)))
+        print(f"[subclips] Cắt {len(jobs)} đoạn ({workers} tiến trình)...")
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = [ex.submit(cut_one, job) for job in jobs.values()]
+            for done, fut in enumerate(as_completed(futures), start=1):
+                dst, clip_in, mode, err = fut.result()
+                name = os.path.basename(dst)
+                if clip_in is None:
+                    index.pop(name, None)
+                    stats["failed"].append((dst, err))
+                    print(f"[subclips][WARN] ({done}/{len(jobs)}) {name}: {err}")
+                    continue
+                index[name] = clip_in
+                stats["cut"] += 1
+                stats["modes"][mode] = stats["modes"].get(mode, 0) + 1
+                print(f"[subclips] ({done}/{len(jobs)}) {mode} {name}")
+        _save_index(index_path, index)
+
+    for row_no, dst in targets.items():
+        name = os.path.basename(dst)
+        if name not in index:
+            continue  # cắt lỗi -> giữ dòng gốc, cutAndPush dùng file nguồn
+        if dst not in jobs:
+            stats["reused"] += 1
+        cols = rows[row_no]
+        cols.extend([""] * (len(header) - len(cols)))
+        cols[i_path] = _posix(dst)
+        cols[i_in] = f"{index[name]:.3f}"
+
+    out = Path(out_csv) if out_csv else csv_path
+    if out == csv_path:
+        backup = csv_path.with_name(csv_path.stem + BACKUP_SUFFIX)
+        if not backup.exists():
+            shutil.copy2(csv_path, backup)
+    tmp = str(out) + ".tmp"
+    with open(tmp, "w", encoding="utf-8-sig", newline="") as f:
+        csv.writer(f).writerows(rows)
+    os.replace(tmp, out)
+    stats["csv_path"] = _posix(out)
+    return stats
+
+
+# Test function
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cắt subclip theo timeline CSV và ghi lại CSV")
+    parser.add_argument("--csv", required=True, help="timeline_export_merged.csv")
+    parser.add_argument("--resource", required=True, help="Thư mục resource (mỗi thư mục con = 1 bin)")
+    parser.add_argument("--out", help="CSV output (mặc định ghi đè --csv, giữ *.orig.csv)")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    res = extract_subclips(args.csv, args.resource, args.out, args.workers)
+    print(f"[subclips] {res['cut']} cắt mới, {res['reused']} dùng lại, {len(res['failed'])} lỗi / {res['rows']} dòng")
@@ -0,0 +1,258 @@
+"""project_cache.py
+Cache introspection của project trong `data/<slug>/_introspection.json`:
+text instance + timebase (get_name_list), sequence settings (prproj_reader)
+và thống kê file text (dl_links.txt, list_name.txt).
+
+Mỗi mục gắn với fingerprint file nguồn {size, mtime_ns, hash}:
+    - size + mtime trùng      -> dùng cache, không đọc file
+    - khác mtime/size         -> băm nội dung; hash trùng (copy/touch) thì
+                                 cập nhật fingerprint và vẫn dùng cache
+    - hash khác               -> tính lại
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from .project_data import DATA_DIR, _sanitize
+except ImportError:
+    from core.project_data import DATA_DIR, _sanitize
+
+CACHE_FILENAME = '_introspection.json'
+CACHE_VERSION = 2
+HASH_CHUNK = 1024 * 1024
+
+__all__ = [
+    'file_fingerprint',
+    'cached_file_result',
+    'links_stats',
+    'read_name_lines',
+    'ProjectIntrospection',
+    'get_project_introspection',
+]
+
+_lock = threading.Lock()
+
+
+def _file_hash(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_fingerprint(path: str, with_hash: bool = True) -> Optional[Dict[str, Any]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    fp: Dict[str, Any] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+    if with_hash:
+        fp['hash'] = _file_hash(path)
+    return fp
+
+
+def _load_cache(cache_path: str) -> Dict[str, Any]:
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict) and data.get('version') == CACHE_VERSION:
+            return data
+    except (OSError, ValueError):
+        pass
+    return {'version': CACHE_VERSION, 'entries': {}}
+
+
+def _save_cache(cache_path: str, data: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp = f'{cache_path}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, cache_path)
+
+
+def _load_value(cache_dir: str, entry: Dict[str, Any]) -> Any:
+    if 'value_file' not in entry:
+        return entry.get('value')
+    with open(os.path.join(cache_dir, entry['value_file']), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def cached_file_result(
+    source_path: str,
+    key: str,
+    compute: Callable[[str], Any],
+    cache_dir: Optional[str] = None,
+    inline: bool = True,
+) -> Any:
+    """
+    compute(source_path) có cache theo fingerprint của source_path.
+    cache_dir mặc định là thư mục chứa file nguồn (data/<slug>/).
+    inline=False: giá trị lớn ghi ra file riêng `_introspection_<key>.json`
+    để kiểm tra fingerprint không phải đọc nó.
+    File nguồn không tồn tại -> gọi compute trực tiếp, không cache.
+    """
+    cache_dir = cache_dir or os.path.dirname(os.path.abspath(source_path))
+    cache_path = os.path.join(cache_dir, CACHE_FILENAME)
+    quick = file_fingerprint(source_path, with_hash=False)
+    if quick is None:
+        return compute(source_path)
+
+    entry_key = f'{key}:{os.path.abspath(source_path)}'
+    with _lock:
+        data = _load_cache(cache_path)
+    entry = data['entries'].get(entry_key)
+
+    if entry:
+        fp = entry.get('fingerprint') or {}
+        try:
+            if fp.get('size') == quick['size'] and fp.get('mtime_ns') == quick['mtime_ns']:
+                return _load_value(cache_dir, entry)
+            if fp.get('size') == quick['size'] and fp.get('hash') == _file_hash(source_path):
+                # Nội dung không đổi (copy/touch): chỉ cập nhật mtime
+                value = _load_value(cache_dir, entry)
+                fp['mtime_ns'] = quick['mtime_ns']
+                with _lock:
+                    data = _load_cache(cache_path)
+                    data['entries'][entry_key] = entry
+                    _save_cache(cache_path, data)
+                return value
+        except (OSError, ValueError):
+            pass  # file giá trị mất/hỏng -> tính lại
+
+    fingerprint = file_fingerprint(source_path)
+    value = compute(source_path)
+    entry = {'fingerprint': fingerprint}
+    if inline:
+        entry['value'] = value
+    else:
+        entry['value_file'] = f'_introspection_{key}.json'
+        _save_cache(os.path.join(cache_dir, entry['value_file']), value)
+    with _lock:
+        data = _load_cache(cache_path)
+        data['entries'][entry_key] = entry
+        _save_cache(cache_path, data)
+    return value
+
+
+# =============================
+# File text trong data/<slug>/
+# =============================
+
+def _compute_links_stats(links_path: str) -> List[int]:
+    groups = 0
+    total_links = 0
+    with open(links_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            s = line.strip()
+            if not s:
+                continue
+            if s.startswith('http://') or s.startswith('https://'):
+                total_links += 1
+            else:
+                groups += 1
+    return [groups, total_links]
+
+
+def links_stats(links_path: str) -> Tuple[int, int]:
+    """(số nhóm, số link) của dl_links.txt, có cache."""
+    if not os.path.isfile(links_path):
+        return 0, 0
+    groups, total = cached_file_result(links_path, 'links_stats', _compute_links_stats)
+    return int(groups), int(total)
+
+
+def _compute_name_lines(names_path: str) -> List[str]:
+    with open(names_path, 'r', encoding='utf-8', errors='ignore') as f:
+        return [ln.strip() for ln in f if ln.strip()]
+
+
+def read_name_lines(names_path: str) -> List[str]:
+    """Các dòng không rỗng của list_name.txt, có cache."""
+    if not os.path.isfile(names_path):
+        return []
+    return list(cached_file_result(names_path, 'name_lines', _compute_name_lines))
+
+
+# =============================
+# .prproj
+# =============================
+
+def _compute_prproj_info(prproj_path: str) -> Dict[str, Any]:
+    try:
+        from .downloadTool.get_name_list import extract_text_instances_and_timebase
+        from .premierCore.prproj_reader import PrprojDocument, TICKS_PER_SECOND
+    except ImportError:
+        from core.downloadTool.get_name_list import extract_text_instances_and_timebase
+        from core.premierCore.prproj_reader import PrprojDocument, TICKS_PER_SECOND
+
+    instances, timebase = extract_text_instances_and_timebase(prproj_path)
+
+    doc = PrprojDocument.load(prproj_path)
+    sequences = []
+    for seq in doc.sequences():
+        tracks = [doc.track_clips(t) for t in doc.video_tracks(seq)]
+        end_ticks = max([c['end_ticks'] for clips in tracks for c in clips] or [0])
+        width, height = doc.frame_size(seq) or (0, 0)
+        sequences.append({
+            'name': doc.sequence_name(seq),
+            'fps': round(doc.frame_rate(seq), 6),
+            'width': width,
+            'height': height,
+            'video_tracks': len(tracks),
+            'clips_per_track': [len(clips) for clips in tracks],
+            'duration_seconds': round(end_ticks / TICKS_PER_SECOND, 4),
+        })
+    del doc
+
+    return {'instances': instances, 'timebase': timebase, 'sequences': sequences}
+
+
+class ProjectIntrospection:
+    """
+    Introspection 1 project có cache trong data/<slug>/:
+
+        info = ProjectIntrospection(prproj_path)
+        info.instances()      # như extract_text_instances_with_timing(save_txt=None)
+        info.timebase()
+        info.sequences()      # [{name, fps, width, height, video_tracks, clips_per_track, duration_seconds}]
+        info.links_stats()    # (groups, links) của dl_links.txt
+        info.name_lines()     # dòng của list_name.txt
+    """
+
+    def __init__(self, prproj_path: str, data_dir: str = DATA_DIR, slug: Optional[str] = None):
+        self.prproj_path = prproj_path
+        self.slug = slug or _sanitize(os.path.splitext(os.path.basename(prproj_path))[0])
+        self.project_dir = os.path.join(data_dir, self.slug)
+        self._info: Optional[Dict[str, Any]] = None
+
+    def _prproj_info(self) -> Dict[str, Any]:
+        if self._info is None:
+            self._info = cached_file_result(
+                self.prproj_path, 'prproj', _compute_prproj_info, cache_dir=self.project_dir, inline=False
+            )
+        return self._info
+
+    def instances(self) -> List[Dict[str, Any]]:
+        return self._prproj_info()['instances']
+
+    def timebase(self) -> int:
+        return self._prproj_info()['timebase']
+
+    def sequences(self) -> List[Dict[str, Any]]:
+        return self._prproj_info()['sequences']
+
+    def links_stats(self) -> Tuple[int, int]:
+        return links_stats(os.path.join(self.project_dir, 'dl_links.txt'))
+
+    def name_lines(self) -> List[str]:
+        return read_name_lines(os.path.join(self.project_dir, 'list_name.txt'))
+
+
+def get_project_introspection(prproj_path: str, data_dir: str = DATA_DIR) -> ProjectIntrospection:
+    return ProjectIntrospection(prproj_path, data_dir)